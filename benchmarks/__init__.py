@@ -0,0 +1,4 @@
+"""
+Benchmarks of the model decoding, log redaction and request overhead of the client, run them with
+`python -m benchmarks`.
+"""
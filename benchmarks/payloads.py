@@ -0,0 +1,134 @@
+"""
+Synthetic OCTo payloads of realistic sizes, built from the responses used by the tests.
+"""
+import copy
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+RESPONSES_DIR = Path(__file__).resolve().parent.parent / "tests" / "responses"
+
+SUPPLIER_ID = "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"
+
+START_DATE = date(2030, 1, 1)
+
+
+def load_response(name: str) -> Any:
+    with open(RESPONSES_DIR / name) as f:
+        return json.load(f)
+
+
+def suppliers(endpoint: str) -> List[Dict[str, Any]]:
+    supplier = load_response("supplier.json")
+    return [{**supplier, "id": SUPPLIER_ID, "endpoint": endpoint}]
+
+
+def product(index: int = 0, options: int = 20, units: int = 6) -> Dict[str, Any]:
+    """
+    Returns a product with `options` options of `units` units each.
+    """
+    template = load_response("product.json")
+    option_template = template["options"][0]
+    unit_template = option_template["units"][0]
+    unit_ids = [f"unit-{unit_index}" for unit_index in range(units)]
+    product = copy.deepcopy(template)
+    product["id"] = f"product-{index}"
+    product["internalName"] = f"Product {index}"
+    product["options"] = [
+        {
+            **copy.deepcopy(option_template),
+            "id": "DEFAULT" if option_index == 0 else f"option-{option_index}",
+            "default": option_index == 0,
+            "internalName": f"Option {option_index}",
+            "availabilityLocalStartTimes": [f"{hour:02d}:00" for hour in range(9, 18)],
+            "units": [
+                {
+                    **copy.deepcopy(unit_template),
+                    "id": unit_id,
+                    "internalName": f"Unit {unit_id}",
+                    "reference": unit_id,
+                }
+                for unit_id in unit_ids
+            ],
+        }
+        for option_index in range(options)
+    ]
+    return product
+
+
+def products(count: int = 50, options: int = 20, units: int = 6) -> List[Dict[str, Any]]:
+    return [product(index, options=options, units=units) for index in range(count)]
+
+
+def calendar(days: int = 365, start: date = START_DATE) -> List[Dict[str, Any]]:
+    """
+    Returns a calendar of `days` days with opening hours.
+    """
+    template = load_response("calendar_opening_hours.json")[0]
+    return [
+        {**copy.deepcopy(template), "localDate": (start + timedelta(days=day)).isoformat()}
+        for day in range(days)
+    ]
+
+
+def availability(
+    days: int = 30, slots_per_day: int = 10, start: date = START_DATE
+) -> List[Dict[str, Any]]:
+    """
+    Returns `slots_per_day` hourly start times for each of `days` days.
+    """
+    template = load_response("availability_start_times.json")[0]
+    items = []
+    for day in range(days):
+        for slot in range(slots_per_day):
+            starts_at = datetime.combine(start + timedelta(days=day), datetime.min.time())
+            starts_at += timedelta(hours=8 + slot)
+            start_str = f"{starts_at.isoformat()}+01:00"
+            items.append(
+                {
+                    **template,
+                    "id": start_str,
+                    "localDateTimeStart": start_str,
+                    "localDateTimeEnd": f"{(starts_at + timedelta(hours=1)).isoformat()}+01:00",
+                    "utcCutoffAt": f"{(starts_at - timedelta(hours=2)).isoformat()}Z",
+                }
+            )
+    return items
+
+
+def booking(index: int = 0, unit_items: int = 4) -> Dict[str, Any]:
+    """
+    Returns a confirmed booking with a contact and `unit_items` unit items.
+    """
+    template = load_response("reservation.json")
+    unit_item_template = template["unitItems"][0]
+    contact = {
+        "fullName": f"Traveller {index}",
+        "firstName": "Traveller",
+        "lastName": str(index),
+        "emailAddress": f"traveller-{index}@example.com",
+        "phoneNumber": "+31 20 123 4567",
+        "locales": ["en"],
+        "country": "NL",
+        "notes": None,
+    }
+    booking = copy.deepcopy(template)
+    booking["id"] = f"booking-{index}"
+    booking["uuid"] = f"00000000-0000-4000-8000-{index:012d}"
+    booking["status"] = "CONFIRMED"
+    booking["contact"] = contact
+    booking["unitItems"] = [
+        {
+            **copy.deepcopy(unit_item_template),
+            "uuid": f"00000000-0000-4000-9000-{index * unit_items + item:012d}",
+            "status": "CONFIRMED",
+            "contact": dict(contact),
+        }
+        for item in range(unit_items)
+    ]
+    return booking
+
+
+def bookings(count: int = 300, unit_items: int = 4) -> List[Dict[str, Any]]:
+    return [booking(index, unit_items=unit_items) for index in range(count)]
@@ -0,0 +1,225 @@
+"""
+Runner of the benchmarks: measures them, compares the results with a baseline and appends them
+to a history file, so they can be tracked over time.
+
+    python -m benchmarks                   # run all benchmarks
+    python -m benchmarks -k decode         # run the benchmarks whose name contains "decode"
+    python -m benchmarks --save-baseline   # store the results as the baseline
+
+The exit status is 1 when a benchmark is slower than its baseline by more than its tolerance.
+Baselines are only comparable on the same machine, so they are not committed.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+DEFAULT_TOLERANCE = 0.2
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[["Context"], Callable[[], Any]]
+    # allowed slowdown against the baseline, e.g. 0.2 for 20%, the runner's default when None
+    tolerance: Optional[float] = None
+
+
+@dataclass
+class Result:
+    name: str
+    # seconds per call, the best and the median of the repeats
+    best: float
+    median: float
+    # number of calls per repeat
+    number: int
+
+
+class Context(object):
+    """
+    Resources shared by the benchmarks of a run, the local server is started on the first use.
+    """
+
+    def __init__(self) -> None:
+        self._server: Any = None
+        self._cleanups: List[Callable[[], None]] = []
+
+    @property
+    def server_url(self) -> str:
+        if self._server is None:
+            from benchmarks import payloads
+            from octo_client.stub_server import StubServer
+
+            # the supplier endpoints are replaced with the URL of the server
+            self._server = StubServer(
+                {
+                    ("GET", "suppliers"): payloads.suppliers(""),
+                    ("GET", "products"): payloads.products(),
+                    ("POST", "availability"): payloads.availability(),
+                    ("POST", "availability/calendar"): payloads.calendar(),
+                    ("GET", "bookings"): payloads.bookings(),
+                }
+            )
+            self.on_close(self._server.close)
+        return self._server.url
+
+    def on_close(self, cleanup: Callable[[], None]) -> None:
+        self._cleanups.append(cleanup)
+
+    def close(self) -> None:
+        while self._cleanups:
+            self._cleanups.pop()()
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Result:
+    """
+    Calls the function in `repeat` rounds lasting at least `min_time` seconds each.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [total / number for total in timer.repeat(repeat, number)]
+    return Result("", min(times), statistics.median(times), number)
+
+
+def run(benchmarks: Sequence[Benchmark], repeat: int = 5, min_time: float = 0.2) -> List[Result]:
+    results = []
+    context = Context()
+    try:
+        for benchmark in benchmarks:
+            result = measure(benchmark.setup(context), repeat=repeat, min_time=min_time)
+            result.name = benchmark.name
+            results.append(result)
+    finally:
+        context.close()
+    return results
+
+
+def find_regressions(
+    results: Sequence[Result],
+    baseline: Dict[str, float],
+    tolerances: Dict[str, Optional[float]],
+    default_tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """
+    Returns the descriptions of the results slower than their baseline by more than
+    the tolerance, the best times are compared as they are the least noisy.
+    """
+    regressions = []
+    for result in results:
+        if result.name not in baseline:
+            continue
+        tolerance = tolerances.get(result.name)
+        if tolerance is None:
+            tolerance = default_tolerance
+        limit = baseline[result.name] * (1 + tolerance)
+        if result.best > limit:
+            regressions.append(
+                f"{result.name}: {_format(result.best)} > {_format(limit)} "
+                f"(baseline {_format(baseline[result.name])} + {tolerance:.0%})"
+            )
+    return regressions
+
+
+def _format(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    return f"{seconds * 1e3:.2f}ms"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+            text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.strip() or None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from benchmarks.suite import BENCHMARKS
+
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Runs the benchmarks of the client."
+    )
+    parser.add_argument("-k", "--filter", help="run the benchmarks whose name contains FILTER")
+    parser.add_argument("--repeat", type=int, default=5, help="number of rounds")
+    parser.add_argument("--min-time", type=float, default=0.2, help="min seconds of a round")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed slowdown against the baseline, e.g. 0.2 for 20%%",
+    )
+    parser.add_argument("--baseline", type=Path, default=RESULTS_DIR / "baseline.json")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument("--history", type=Path, default=RESULTS_DIR / "history.jsonl")
+    parser.add_argument("--no-history", action="store_true", help="don't append to the history")
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        benchmark
+        for name, benchmark in BENCHMARKS.items()
+        if args.filter is None or args.filter in name
+    ]
+    baseline: Dict[str, float] = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+
+    print(f"{'benchmark':<32} {'best':>10} {'median':>10} {'baseline':>8}")
+    results = []
+    for benchmark in benchmarks:
+        [result] = run([benchmark], repeat=args.repeat, min_time=args.min_time)
+        results.append(result)
+        change = ""
+        if result.name in baseline:
+            change = f"{result.best / baseline[result.name] - 1:+.1%}"
+        print(
+            f"{result.name:<32} {_format(result.best):>10} {_format(result.median):>10} "
+            f"{change:>8}"
+        )
+
+    if not args.no_history:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": {result.name: result.best for result in results},
+        }
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.update({result.name: result.best for result in results})
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        return 0
+
+    regressions = find_regressions(
+        results,
+        baseline,
+        {benchmark.name: benchmark.tolerance for benchmark in benchmarks},
+        args.tolerance,
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,129 @@
+"""
+The benchmarks, registered with `benchmark`. A benchmark builds its payloads upfront and returns
+the function measured by the runner.
+"""
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+from benchmarks import payloads
+from benchmarks.runner import Benchmark, Context
+from octo_client import OctoClient
+from octo_client import models as m
+from octo_client.utils import filter_log_data, hide_sensitive_data
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+Setup = Callable[[Context], Callable[[], Any]]
+
+
+def benchmark(name: str, tolerance: Optional[float] = None) -> Callable[[Setup], Setup]:
+    """
+    Registers the setup function of a benchmark, `tolerance` overrides the tolerance
+    of the runner for noisy benchmarks.
+    """
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = Benchmark(name, setup, tolerance)
+        return setup
+
+    return register
+
+
+@benchmark("decode.products")
+def decode_products(context: Context) -> Callable[[], Any]:
+    data = payloads.products()
+    return lambda: [m.Product.from_dict(item) for item in data]
+
+
+@benchmark("decode.availability")
+def decode_availability(context: Context) -> Callable[[], Any]:
+    data = payloads.availability()
+    return lambda: [m.Availability.from_dict(item) for item in data]
+
+
+@benchmark("decode.calendar")
+def decode_calendar(context: Context) -> Callable[[], Any]:
+    data = payloads.calendar()
+    return lambda: [m.AvailabilityCalendarItem.from_dict(item) for item in data]
+
+
+@benchmark("decode.bookings")
+def decode_bookings(context: Context) -> Callable[[], Any]:
+    data = payloads.bookings()
+    return lambda: [m.Booking.from_dict(item) for item in data]
+
+
+@benchmark("decode.lazy_bookings")
+def decode_lazy_bookings(context: Context) -> Callable[[], Any]:
+    data = payloads.bookings()
+    return lambda: [m.LazyBooking.from_dict(item) for item in data]
+
+
+@benchmark("encode.products")
+def encode_products(context: Context) -> Callable[[], Any]:
+    products = [m.Product.from_dict(item) for item in payloads.products()]
+    return lambda: [product.as_dict() for product in products]
+
+
+@benchmark("encode.bookings")
+def encode_bookings(context: Context) -> Callable[[], Any]:
+    bookings = [m.Booking.from_dict(item) for item in payloads.bookings()]
+    return lambda: [booking.as_dict() for booking in bookings]
+
+
+@benchmark("redact.bookings")
+def redact_bookings(context: Context) -> Callable[[], Any]:
+    data = payloads.bookings()
+    return lambda: hide_sensitive_data(data)
+
+
+@benchmark("redact.bookings_truncated")
+def redact_truncated_bookings(context: Context) -> Callable[[], Any]:
+    data = payloads.bookings()
+    return lambda: filter_log_data(data, size_limit=10_000)
+
+
+def _client(context: Context) -> OctoClient:
+    client = OctoClient(context.server_url, "secret-token")
+    context.on_close(client.close)
+    # resolving the supplier upfront, so it's not part of the first measurement
+    client.get_suppliers()
+    return client
+
+
+@benchmark("client.get_suppliers", tolerance=0.5)
+def client_get_suppliers(context: Context) -> Callable[[], Any]:
+    client = _client(context)
+    return client.get_suppliers
+
+
+@benchmark("client.get_products", tolerance=0.5)
+def client_get_products(context: Context) -> Callable[[], Any]:
+    client = _client(context)
+    return lambda: client.get_products(payloads.SUPPLIER_ID)
+
+
+@benchmark("client.availability_check", tolerance=0.5)
+def client_availability_check(context: Context) -> Callable[[], Any]:
+    client = _client(context)
+    return lambda: client.availability_check(
+        payloads.SUPPLIER_ID,
+        "product-0",
+        "DEFAULT",
+        local_date_start=date(2030, 1, 1),
+        local_date_end=date(2030, 1, 30),
+    )
+
+
+@benchmark("client.get_calendar", tolerance=0.5)
+def client_get_calendar(context: Context) -> Callable[[], Any]:
+    client = _client(context)
+    return lambda: client.get_calendar(
+        payloads.SUPPLIER_ID, "product-0", "DEFAULT", date(2030, 1, 1), date(2030, 12, 31)
+    )
+
+
+@benchmark("client.list_bookings", tolerance=0.5)
+def client_list_bookings(context: Context) -> Callable[[], Any]:
+    client = _client(context)
+    return lambda: client.list_bookings(payloads.SUPPLIER_ID, supplier_reference="XOPSUT")
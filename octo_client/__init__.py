@@ -1,7 +1,9 @@
 from typing import Any, Sequence
 
+from .async_client import AsyncOctoClient
 from .client import OctoClient
 
 __all__: Sequence[Any] = (
+    AsyncOctoClient,
     OctoClient,
 )
@@ -0,0 +1,1053 @@
+import asyncio
+import logging
+import time
+from datetime import date
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from octo_client import batch, exceptions, models
+from octo_client.cache import AsyncSingleFlight, CacheKey, ResponseCache
+from octo_client.circuit_breaker import CircuitBreaker
+from octo_client.client import BaseOctoClient
+from octo_client.codec import JSONCodec
+from octo_client.hedging import HedgingPolicy
+from octo_client.instrumentation import MetricsHook, RequestMetrics
+from octo_client.rate_limit import RateLimiter
+from octo_client.retry import RetryPolicy
+from octo_client.streaming import STREAM_CHUNK_SIZE, aiter_json_array
+from octo_client.timeouts import DEFAULT_TIMEOUT, Deadline, Timeout, get_deadline
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+T = TypeVar("T")
+
+
+class AsyncOctoClient(BaseOctoClient):
+    """
+    Asyncio HTTP client for OCTo (Open Connection for Tourism) APIs.
+
+    Mirrors the `OctoClient` interface with coroutines, requires the `httpx` package
+    (`pip install octo-api-client[async]`).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        custom_logger: Optional[logging.Logger] = None,
+        log_size_limit: Optional[int] = None,
+        requests_loglevel: int = logging.DEBUG,
+        language: str = "en",
+        strict: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        pool_idle_timeout: Optional[float] = 5.0,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+        calendar_chunk_days: Optional[int] = None,
+        calendar_max_workers: int = 4,
+        cache: Optional[ResponseCache] = None,
+        supplier_map_ttl: Optional[float] = None,
+        unknown_supplier_ttl: float = 60,
+        lazy_bookings: bool = False,
+        codec: Optional[JSONCodec] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        supplier_timeouts: Optional[Dict[str, Timeout]] = None,
+        metrics_hook: Optional[MetricsHook] = None,
+    ) -> None:
+        """
+        Args:
+            url (str): URL under which the OCTO interface is available
+            token (str): secret bearer token for the authorization
+            custom_logger (Logger): custom logger which the client will use for logging
+            log_size_limit (int): max size in bytes of the logged request or response data, longer
+                                  data is logged as the prefix of its JSON
+            requests_loglevel (int): default log level that will be used to log requests and
+                                     responses
+            language (str): language that will be used in the Accept-Language header of each request
+            strict (bool): in the strict mode client will raise an error if the response will
+                           contain any additional data outside of the data model provided
+                           by the specification
+            max_connections (int): max number of concurrent connections to all suppliers
+            max_keepalive_connections (int): max number of idle keep-alive connections
+            pool_idle_timeout (float): number of seconds after which an idle connection is closed
+            transport (AsyncBaseTransport): custom httpx transport used to send the requests
+            calendar_chunk_days (int): when set, calendars for longer ranges of dates are fetched
+                                       in chunks of this many days and merged
+            calendar_max_workers (int): max number of calendar chunks fetched concurrently
+            cache (ResponseCache): cache of the responses, see `ResponseCache` for the endpoints
+                                   and backends, disabled by default
+            supplier_map_ttl (float): number of seconds after which the endpoints of the suppliers
+                                      are refreshed in the background, never by default
+            unknown_supplier_ttl (float): number of seconds during which requests for a supplier
+                                          missing from the suppliers fail without refreshing them
+            lazy_bookings (bool): when set, bookings are returned as `LazyBooking`, whose nested
+                                  objects are parsed on the first access
+            codec (JSONCodec): codec encoding the requests and decoding the responses, the fastest
+                               installed JSON library by default. The arrays streamed by the
+                               `iter_*` methods are parsed with the standard library.
+            retry_policy (RetryPolicy): policy of retrying the requests failed with a connection
+                                        error, a timeout or a temporary error status, the requests
+                                        are not retried by default
+            rate_limiter (RateLimiter): client-side limit of the rate of the requests to the
+                                        suppliers, unlimited by default
+            circuit_breaker (CircuitBreaker): circuit breakers of the supplier endpoints failing
+                                              fast when an endpoint keeps failing, disabled
+                                              by default
+            hedging (HedgingPolicy): policy of sending a duplicate `availability_check` request
+                                     when the response is late, disabled by default
+            timeout (Timeout): number of seconds to wait for the connection and for the data of
+                               the responses, see `timeouts.call_timeout` and `timeouts.deadline`
+                               for the timeouts of single calls
+            supplier_timeouts (dict): timeouts by supplier ID, their missing values are taken
+                                      from `timeout`
+            metrics_hook (MetricsHook): receiver of the timings of the requests and of parsing
+                                        the responses, see `octo_client.instrumentation`
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncOctoClient requires httpx, "
+                "install it with `pip install octo-api-client[async]`"
+            )
+        super().__init__(
+            url,
+            token,
+            custom_logger=custom_logger,
+            log_size_limit=log_size_limit,
+            requests_loglevel=requests_loglevel,
+            language=language,
+            strict=strict,
+            calendar_chunk_days=calendar_chunk_days,
+            calendar_max_workers=calendar_max_workers,
+            cache=cache,
+            supplier_map_ttl=supplier_map_ttl,
+            unknown_supplier_ttl=unknown_supplier_ttl,
+            lazy_bookings=lazy_bookings,
+            codec=codec,
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            hedging=hedging,
+            timeout=timeout,
+            supplier_timeouts=supplier_timeouts,
+            metrics_hook=metrics_hook,
+        )
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.pool_idle_timeout = pool_idle_timeout
+        self.transport = transport
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._single_flight = AsyncSingleFlight()
+        self._suppliers_flight = AsyncSingleFlight()
+        self._suppliers_refresh: Optional["asyncio.Future[None]"] = None
+
+    async def __aenter__(self) -> "AsyncOctoClient":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Closes the connection pool.
+        """
+        if self._suppliers_refresh is not None:
+            self._suppliers_refresh.cancel()
+        if self._http_client is not None:
+            http_client, self._http_client = self._http_client, None
+            await http_client.aclose()
+
+    def _get_http_client(self) -> "httpx.AsyncClient":
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.pool_idle_timeout,
+                ),
+                transport=self.transport,
+            )
+        return self._http_client
+
+    async def _cached_call(
+        self,
+        cache_key: Optional[CacheKey],
+        load: Callable[[], Awaitable[Any]],
+        decode: Callable[[Any], T],
+    ) -> T:
+        """
+        Asyncio counterpart of `OctoClient._cached_call`.
+        """
+        if cache_key is None:
+            return decode(await load())
+        caches_objects = self._caches_objects()
+
+        async def load_value() -> Any:
+            response = await load()
+            return decode(response) if caches_objects else response
+
+        value = self._get_cached(cache_key)
+        if value is None:
+            value = await self._single_flight.do(
+                cache_key, lambda: self._load_cached(cache_key, load_value)
+            )
+        return self._cached_models(value) if caches_objects else decode(value)
+
+    async def _load_cached(
+        self, cache_key: Optional[CacheKey], load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = self._get_cached(cache_key)
+        if value is None:
+            value = await load()
+            self._set_cached(cache_key, value)
+        return value
+
+    async def _hedged_call(self, supplier_id: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asyncio counterpart of `OctoClient._hedged_call`, the slower request is cancelled.
+        """
+        if self.hedging is None:
+            return await load()
+        hedging: HedgingPolicy = self.hedging
+        hedging.record_request()
+
+        async def timed_load() -> Any:
+            started_at = time.monotonic()
+            result = await load()
+            hedging.record_latency(supplier_id, time.monotonic() - started_at)
+            return result
+
+        calls = [asyncio.ensure_future(timed_load())]
+        try:
+            done, _ = await asyncio.wait(calls, timeout=hedging.get_delay(supplier_id))
+            if not done and hedging.acquire_hedge():
+                self.logger.info("Hedging the request to %s", supplier_id)
+                calls.append(asyncio.ensure_future(timed_load()))
+            pending = set(calls)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    if call.exception() is None:
+                        return call.result()
+            return calls[0].result()
+        finally:
+            for call in calls:
+                if not call.done():
+                    call.cancel()
+
+    async def _build_endpoint_url_for_request(self, supplier_id: str, path: str) -> str:
+        """Builds the endpoint's URL for making requests to a given supplier.
+
+        Args:
+            supplier_id: builds the URL for a supplier with this ID.
+            path: use this path to build the URL.
+
+        See `OctoClient._build_endpoint_url_for_request` for the refreshes of the suppliers.
+
+        Returns: the full URL.
+        Raises:
+            - `exceptions.InvalidRequest` if the supplier ID is unknown.
+
+        """
+
+        if supplier_id not in self.supplier_url_map:
+            if not self._is_unknown_supplier(supplier_id):
+                await self._refresh_suppliers()
+                self._remember_unknown_supplier(supplier_id)
+        elif self._claim_supplier_map_refresh():
+            self._refresh_suppliers_in_background()
+
+        return self._get_endpoint_url(supplier_id, path)
+
+    async def _refresh_suppliers(self) -> None:
+        await self._suppliers_flight.do("suppliers", self.get_suppliers)
+
+    def _refresh_suppliers_in_background(self) -> None:
+        """
+        Refreshes the suppliers in a background task, the current map is used in the meantime.
+        """
+
+        async def refresh() -> None:
+            try:
+                await self._refresh_suppliers()
+            except Exception:
+                self.logger.warning("Failed to refresh the suppliers", exc_info=True)
+
+        self._suppliers_refresh = asyncio.ensure_future(refresh())
+
+    async def _make_request(
+        self,
+        http_method: str,
+        path: str,
+        supplier_id=None,
+        json: Optional[Dict] = None,
+        params=None,
+        headers: Optional[Dict] = None,
+    ):
+        if headers is None:
+            headers = {}
+
+        if params is None:
+            params = {}
+
+        if supplier_id:
+            full_url = await self._build_endpoint_url_for_request(str(supplier_id), path)
+        else:
+            full_url = f"{self.url}/{path}"
+
+        self._log_request(full_url, http_method, json, params)
+        base_headers = self._get_headers()
+        headers = {**base_headers, **headers}
+        with self._request_metrics(http_method, path, supplier_id) as metrics:
+            response = await self._send(
+                http_method,
+                path,
+                supplier_id,
+                full_url,
+                params=params,
+                content=self._encode_body(json),
+                headers=headers,
+                metrics=metrics,
+            )
+            self._raise_for_status(response)
+            try:
+                response_json: dict = self._loads(response.content, metrics)
+            except Exception as exc:
+                self._log_non_json_response(response.text)
+                raise exceptions.ApiError("Non-JSON response") from exc
+        self._log_response(full_url, http_method, response_json)
+        return response_json
+
+    async def _send(
+        self,
+        http_method: str,
+        path: str,
+        supplier_id: Optional[str],
+        full_url: str,
+        params: Dict,
+        content: Optional[bytes],
+        headers: Dict,
+        stream: bool = False,
+        metrics: Optional[RequestMetrics] = None,
+    ) -> "httpx.Response":
+        """
+        Sends the request, retrying it according to the `retry_policy` until the deadline of
+        the call. Every attempt waits for the `rate_limiter` and is refused by an open
+        `circuit_breaker`. The timings of the last attempt are set in `metrics`.
+        """
+        http_client = self._get_http_client()
+        circuit_key = self._circuit_key(supplier_id)
+        retries = 0
+        started_at = time.monotonic()
+        while True:
+            self._before_call(circuit_key)
+            try:
+                if self.rate_limiter is not None and not await self.rate_limiter.acquire_async(
+                    supplier_id, full_url, self._get_max_wait()
+                ):
+                    raise exceptions.DeadlineExceededError(
+                        "Deadline exceeded waiting for the rate limit"
+                    )
+                timeout = self._get_timeout(supplier_id)
+            except BaseException:
+                # the call waiting for a token may hold the trial call of a half-open circuit
+                self._release_call(circuit_key)
+                raise
+            attempt_started_at = time.monotonic()
+            trace_events: Dict[str, float] = {}
+            if metrics is not None:
+                metrics.attempts = retries + 1
+            try:
+                request = http_client.build_request(
+                    http_method,
+                    full_url,
+                    params=params,
+                    content=content,
+                    headers=headers,
+                    timeout=httpx.Timeout(timeout.read, connect=timeout.connect),
+                    extensions=None if metrics is None else {"trace": _tracer(trace_events)},
+                )
+                deadline = get_deadline()
+                # the timeout applies to each read, the body is read here to limit its reading
+                # to the deadline
+                response = await http_client.send(request, stream=stream or deadline is not None)
+                if deadline is not None and not stream:
+                    await _read_body(response, deadline)
+            except httpx.TransportError as exc:
+                self._record_call(circuit_key, attempt_started_at)
+                delay = self._get_retry_delay(
+                    http_method,
+                    path,
+                    retries,
+                    started_at,
+                    sent=not isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)),
+                )
+                if delay is None:
+                    raise
+            except exceptions.DeadlineExceededError:
+                # the supplier is too slow to send the response before the deadline
+                self._record_call(circuit_key, attempt_started_at)
+                raise
+            except BaseException:
+                self._release_call(circuit_key)
+                raise
+            else:
+                self._record_call(circuit_key, attempt_started_at, response.status_code)
+                if metrics is not None:
+                    metrics.status_code = response.status_code
+                    _set_transport_timings(metrics, attempt_started_at, trace_events)
+                delay = self._get_retry_delay(
+                    http_method,
+                    path,
+                    retries,
+                    started_at,
+                    status_code=response.status_code,
+                    retry_after=response.headers.get("Retry-After"),
+                )
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            retries += 1
+
+    async def _stream_request(
+        self,
+        http_method: str,
+        path: str,
+        supplier_id: str,
+        json: Optional[Dict] = None,
+        params=None,
+        headers: Optional[Dict] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Sends the request when iterated and yields the elements of the JSON array in the response
+        as they are received, the response itself is not logged.
+        """
+        full_url = await self._build_endpoint_url_for_request(str(supplier_id), path)
+
+        self._log_request(full_url, http_method, json, params)
+        headers = {**self._get_headers(), **(headers or {})}
+        response = await self._send(
+            http_method,
+            path,
+            supplier_id,
+            full_url,
+            params=params or {},
+            content=self._encode_body(json),
+            headers=headers,
+            stream=True,
+        )
+        try:
+            if response.status_code >= 400:
+                await response.aread()
+                self._raise_for_status(response)
+            self._log_streamed_response(full_url, http_method)
+            chunks = _check_deadline(response.aiter_bytes(STREAM_CHUNK_SIZE), get_deadline())
+            try:
+                async for element in aiter_json_array(chunks):
+                    yield element
+            except ValueError as exc:
+                raise exceptions.ApiError("Non-JSON array response") from exc
+        finally:
+            await response.aclose()
+
+    async def _http_get(
+        self,
+        path: str,
+        supplier_id: Optional[str] = None,
+        params=None,
+        headers: Optional[Dict] = None,
+    ):
+        return await self._make_request(
+            "GET", path, supplier_id=supplier_id, params=params, headers=headers
+        )
+
+    async def _http_post(
+        self, path: str, json: dict, supplier_id: str, params=None, headers: Optional[Dict] = None
+    ):
+        if headers is None:
+            headers = {}
+        return await self._make_request(
+            "POST",
+            path,
+            json=json,
+            supplier_id=supplier_id,
+            params=params,
+            headers={"Content-Type": "application/json", **headers},
+        )
+
+    async def _http_patch(
+        self, path: str, json: dict, supplier_id: str, params=None, headers: Optional[Dict] = None
+    ):
+        if headers is None:
+            headers = {}
+        return await self._make_request(
+            "PATCH",
+            path,
+            json=json,
+            supplier_id=supplier_id,
+            params=params,
+            headers={"Content-Type": "application/json", **headers},
+        )
+
+    async def _http_delete(
+        self, path: str, supplier_id: str, json: dict, params=None, headers: Optional[Dict] = None
+    ):
+        if headers is None:
+            headers = {}
+        return await self._make_request(
+            "DELETE",
+            path,
+            supplier_id=supplier_id,
+            json=json,
+            params=params,
+            headers={"Content-Type": "application/json", **headers},
+        )
+
+    async def get_supplier(
+        self, supplier_id: str, headers: Optional[Dict] = None
+    ) -> models.Supplier:
+        cache_key = self._cache_key("supplier", supplier_id, f"suppliers/{supplier_id}", headers)
+        return await self._cached_call(
+            cache_key,
+            lambda: self._http_get(
+                f"suppliers/{supplier_id}", supplier_id=supplier_id, headers=headers
+            ),
+            self._decoder("suppliers/{id}", supplier_id, self._parse_supplier),
+        )
+
+    async def get_suppliers(self, headers: Optional[Dict] = None) -> List[models.Supplier]:
+        response = await self._http_get("suppliers", headers=headers)
+        return self._decode("suppliers", None, self._parse_suppliers, response)
+
+    async def get_products(
+        self, supplier_id: str, headers: Optional[Dict] = None
+    ) -> List[models.Product]:
+        cache_key = self._cache_key("products", supplier_id, "products", headers)
+        return await self._cached_call(
+            cache_key,
+            lambda: self._http_get("products", supplier_id=supplier_id, headers=headers),
+            self._decoder("products", supplier_id, self._parse_products),
+        )
+
+    async def iter_products(
+        self, supplier_id: str, headers: Optional[Dict] = None
+    ) -> AsyncIterator[models.Product]:
+        """
+        Yields the products of the supplier while the response is received, see `get_products`.
+        The response is not cached.
+        """
+        async for product in self._stream_request("GET", "products", supplier_id, headers=headers):
+            yield models.Product.from_dict(product, strict=self.strict)
+
+    async def get_product(
+        self, supplier_id: str, product_id: str, headers: Optional[Dict] = None
+    ) -> models.Product:
+        cache_key = self._cache_key("product", supplier_id, f"products/{product_id}", headers)
+        return await self._cached_call(
+            cache_key,
+            lambda: self._http_get(
+                f"products/{product_id}", supplier_id=supplier_id, headers=headers
+            ),
+            self._decoder("products/{id}", supplier_id, self._parse_product),
+        )
+
+    async def availability_check(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        units: Optional[List[models.UnitQuantity]] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        local_date: Optional[date] = None,
+        availability_ids: Optional[List[str]] = None,
+        headers: Optional[Dict] = None,
+    ) -> List[models.Availability]:
+        payload = self._availability_payload(
+            product_id,
+            option_id,
+            units=units,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+            local_date=local_date,
+            availability_ids=availability_ids,
+        )
+
+        cache_key = self._cache_key("availability", supplier_id, "availability", headers, payload)
+        return await self._cached_call(
+            cache_key,
+            lambda: self._hedged_call(
+                supplier_id,
+                lambda: self._http_post(
+                    "availability", supplier_id=supplier_id, json=payload, headers=headers
+                ),
+            ),
+            self._decoder("availability", supplier_id, self._parse_availability),
+        )
+
+    async def iter_availability(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        units: Optional[List[models.UnitQuantity]] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        local_date: Optional[date] = None,
+        availability_ids: Optional[List[str]] = None,
+        headers: Optional[Dict] = None,
+    ) -> AsyncIterator[models.Availability]:
+        """
+        Yields the availability while the response is received, see `availability_check`.
+        The response is not cached.
+        """
+        payload = self._availability_payload(
+            product_id,
+            option_id,
+            units=units,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+            local_date=local_date,
+            availability_ids=availability_ids,
+        )
+        async for availability in self._stream_request(
+            "POST", "availability", supplier_id, json=payload, headers=headers
+        ):
+            yield models.Availability.from_dict(availability, strict=self.strict)
+
+    async def get_calendar(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]] = None,
+        headers: Optional[Dict] = None,
+        chunk_days: Optional[int] = None,
+    ) -> List[models.AvailabilityCalendarItem]:
+        """This method retrieve the availability calendar for a range of dates.
+
+        See `OctoClient.get_calendar` for the description of the arguments.
+        """
+
+        payload = self._calendar_payload(
+            product_id, option_id, local_date_start, local_date_end, units=units
+        )
+        cache_key = self._cache_key(
+            "calendar", supplier_id, "availability/calendar", headers, payload
+        )
+        return await self._cached_call(
+            cache_key,
+            lambda: self._get_calendar_chunks(
+                supplier_id,
+                product_id,
+                option_id,
+                local_date_start,
+                local_date_end,
+                units,
+                headers,
+                chunk_days or self.calendar_chunk_days,
+            ),
+            self._decoder("availability/calendar", supplier_id, self._parse_calendar),
+        )
+
+    async def iter_calendar(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]] = None,
+        headers: Optional[Dict] = None,
+    ) -> AsyncIterator[models.AvailabilityCalendarItem]:
+        """
+        Yields the days of the calendar while the response is received, see `get_calendar`.
+        The calendar is fetched in a single request and the response is not cached.
+        """
+        payload = self._calendar_payload(
+            product_id, option_id, local_date_start, local_date_end, units=units
+        )
+        async for availability in self._stream_request(
+            "POST", "availability/calendar", supplier_id, json=payload, headers=headers
+        ):
+            yield models.AvailabilityCalendarItem.from_dict(availability, strict=self.strict)
+
+    async def _get_calendar_chunks(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]],
+        headers: Optional[Dict],
+        chunk_days: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        chunks = self._calendar_chunks(local_date_start, local_date_end, chunk_days)
+        if len(chunks) == 1:
+            return await self._get_calendar_chunk(
+                supplier_id, product_id, option_id, local_date_start, local_date_end, units, headers
+            )
+
+        # resolving the supplier upfront so the chunks don't refresh the suppliers concurrently
+        await self._build_endpoint_url_for_request(supplier_id, "availability/calendar")
+        semaphore = asyncio.Semaphore(self.calendar_max_workers)
+
+        async def get_chunk(chunk: Tuple[date, date]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._get_calendar_chunk(
+                    supplier_id, product_id, option_id, chunk[0], chunk[1], units, headers
+                )
+
+        calendars = await asyncio.gather(*(get_chunk(chunk) for chunk in chunks))
+        return self._merge_calendar_chunks(calendars)
+
+    async def _get_calendar_chunk(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]],
+        headers: Optional[Dict],
+    ) -> List[Dict[str, Any]]:
+        payload = self._calendar_payload(
+            product_id, option_id, local_date_start, local_date_end, units=units
+        )
+        return await self._http_post(
+            "availability/calendar", supplier_id=supplier_id, json=payload, headers=headers
+        )
+
+    async def availability_check_batch(
+        self, queries: Iterable[batch.AvailabilityQuery], max_concurrency: int = 50
+    ) -> AsyncIterator[batch.BatchResult]:
+        """Checks the availability for many products and options concurrently.
+
+        Args:
+            queries: availability queries, the dates of a query are optional.
+            max_concurrency: max number of requests in flight at the same time.
+
+        Returns: an async iterator of `BatchResult` objects yielded in the order of completion.
+            A failed query does not stop the batch, its exception is stored in the result.
+        """
+        async for result in batch.run_batch_async(
+            self._availability_check_query, queries, max_concurrency
+        ):
+            yield result
+
+    async def _availability_check_query(self, query: batch.AvailabilityQuery) -> List[Any]:
+        return await self.availability_check(
+            query.supplier_id,
+            query.product_id,
+            query.option_id,
+            units=query.units,
+            local_date_start=query.local_date_start,
+            local_date_end=query.local_date_end,
+            headers=query.headers,
+        )
+
+    async def get_calendar_batch(
+        self, queries: Iterable[batch.AvailabilityQuery], max_concurrency: int = 50
+    ) -> AsyncIterator[batch.BatchResult]:
+        """Retrieves the availability calendars for many products and options concurrently.
+
+        Args:
+            queries: calendar queries, each of them requires `local_date_start`
+                and `local_date_end`.
+            max_concurrency: max number of requests in flight at the same time.
+
+        Returns: an async iterator of `BatchResult` objects yielded in the order of completion.
+            A failed query does not stop the batch, its exception is stored in the result.
+        """
+        async for result in batch.run_batch_async(
+            self._get_calendar_query, queries, max_concurrency
+        ):
+            yield result
+
+    async def _get_calendar_query(self, query: batch.AvailabilityQuery) -> List[Any]:
+        if not (query.local_date_start and query.local_date_end):
+            raise ValueError("local_date_start and local_date_end are required")
+        return await self.get_calendar(
+            query.supplier_id,
+            query.product_id,
+            query.option_id,
+            query.local_date_start,
+            query.local_date_end,
+            units=query.units,
+            headers=query.headers,
+        )
+
+    async def booking_reservation(
+        self,
+        supplier_id: str,
+        uuid: str,
+        product_id: str,
+        option_id: str,
+        availability_id: str,
+        unit_items: List[models.UnitItem],
+        expiration_minutes: Optional[int] = None,
+        notes: Optional[str] = None,
+        headers: Optional[Dict] = None,
+    ) -> models.Booking:
+        payload = self._reservation_payload(
+            uuid,
+            product_id,
+            option_id,
+            availability_id,
+            unit_items,
+            expiration_minutes=expiration_minutes,
+            notes=notes,
+        )
+        response = await self._http_post(
+            "bookings",
+            supplier_id=supplier_id,
+            json=payload,
+            headers=headers,
+        )
+        self.logger.info("Booking created", extra={"booking": response})
+        return self._decode("bookings", supplier_id, self._parse_booking, response)
+
+    async def list_bookings(
+        self,
+        supplier_id: str,
+        reseller_reference: Optional[str] = None,
+        supplier_reference: Optional[str] = None,
+        local_date: Optional[date] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        headers: Optional[Dict] = None,
+    ) -> List[models.Booking]:
+        params = self._list_bookings_params(
+            reseller_reference=reseller_reference,
+            supplier_reference=supplier_reference,
+            local_date=local_date,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+        )
+        response = await self._http_get(
+            "bookings", supplier_id=supplier_id, params=params, headers=headers
+        )
+        return self._decode("bookings", supplier_id, self._parse_bookings, response)
+
+    async def iter_bookings(
+        self,
+        supplier_id: str,
+        reseller_reference: Optional[str] = None,
+        supplier_reference: Optional[str] = None,
+        local_date: Optional[date] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        headers: Optional[Dict] = None,
+    ) -> AsyncIterator[models.Booking]:
+        """
+        Yields the bookings while the response is received, see `list_bookings`.
+        """
+        params = self._list_bookings_params(
+            reseller_reference=reseller_reference,
+            supplier_reference=supplier_reference,
+            local_date=local_date,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+        )
+        async for booking in self._stream_request(
+            "GET", "bookings", supplier_id, params=params, headers=headers
+        ):
+            yield self.booking_model.from_dict(booking)
+
+    async def get_booking(
+        self,
+        supplier_id: str,
+        uuid: str,
+        headers: Optional[Dict] = None,
+    ) -> models.Booking:
+        response = await self._http_get(
+            f"bookings/{uuid}", supplier_id=supplier_id, headers=headers
+        )
+        return self._decode("bookings/{id}", supplier_id, self._parse_booking, response)
+
+    async def booking_confirmation(
+        self,
+        supplier_id: str,
+        uuid: str,
+        email_receipt: bool = False,
+        reseller_reference: Optional[str] = None,
+        contact_full_name: Optional[str] = None,
+        contact_first_name: Optional[str] = None,
+        contact_last_name: Optional[str] = None,
+        contact_email_address: Optional[str] = None,
+        contact_phone_number: Optional[str] = None,
+        contact_locales: Optional[List[str]] = None,
+        contact_postal_code: Optional[str] = None,
+        contact_country: Optional[str] = None,
+        contact_notes: Optional[str] = None,
+        unit_items: Optional[List[models.ConfirmationUnitItem]] = None,
+        headers: Optional[Dict] = None,
+    ) -> models.Booking:
+        payload = self._confirmation_payload(
+            email_receipt=email_receipt,
+            reseller_reference=reseller_reference,
+            contact_full_name=contact_full_name,
+            contact_first_name=contact_first_name,
+            contact_last_name=contact_last_name,
+            contact_email_address=contact_email_address,
+            contact_phone_number=contact_phone_number,
+            contact_locales=contact_locales,
+            contact_postal_code=contact_postal_code,
+            contact_country=contact_country,
+            contact_notes=contact_notes,
+            unit_items=unit_items,
+        )
+        response = await self._http_post(
+            f"bookings/{uuid}/confirm", supplier_id=supplier_id, json=payload, headers=headers
+        )
+        return self._decode("bookings/{id}/confirm", supplier_id, self._parse_booking, response)
+
+    async def extend_reservation(
+        self,
+        supplier_id: str,
+        uuid: str,
+        expiration_minutes: int,
+        headers: Optional[Dict] = None,
+    ) -> models.Booking:
+        payload = {"expirationMinutes": expiration_minutes}
+        response = await self._http_post(
+            f"bookings/{uuid}/extend", supplier_id=supplier_id, json=payload, headers=headers
+        )
+        return self._decode("bookings/{id}/extend", supplier_id, self._parse_booking, response)
+
+    async def booking_cancellation(
+        self,
+        supplier_id: str,
+        uuid: str,
+        reason: Optional[str] = None,
+        force: Optional[bool] = False,
+        headers: Optional[Dict] = None,
+    ) -> models.Booking:
+        payload = self._cancellation_payload(reason=reason, force=force)
+        response = await self._http_delete(
+            f"bookings/{uuid}", supplier_id=supplier_id, json=payload, headers=headers
+        )
+        return self._decode("bookings/{id}", supplier_id, self._parse_booking, response)
+
+    async def booking_update(
+        self,
+        supplier_id: str,
+        uuid: str,
+        product_id: Optional[str] = None,
+        option_id: Optional[str] = None,
+        availability_id: Optional[str] = None,
+        notes: Optional[str] = None,
+        email_receipt: bool = False,
+        reseller_reference: Optional[str] = None,
+        contact_full_name: Optional[str] = None,
+        contact_first_name: Optional[str] = None,
+        contact_last_name: Optional[str] = None,
+        contact_email_address: Optional[str] = None,
+        contact_phone_number: Optional[str] = None,
+        contact_locales: Optional[List[str]] = None,
+        contact_postal_code: Optional[str] = None,
+        contact_country: Optional[str] = None,
+        contact_notes: Optional[str] = None,
+        unit_items: Optional[List[models.ConfirmationUnitItem]] = None,
+        headers: Optional[Dict] = None,
+    ):
+        payload = self._update_payload(
+            product_id=product_id,
+            option_id=option_id,
+            availability_id=availability_id,
+            notes=notes,
+            email_receipt=email_receipt,
+            reseller_reference=reseller_reference,
+            contact_full_name=contact_full_name,
+            contact_first_name=contact_first_name,
+            contact_last_name=contact_last_name,
+            contact_email_address=contact_email_address,
+            contact_phone_number=contact_phone_number,
+            contact_locales=contact_locales,
+            contact_postal_code=contact_postal_code,
+            contact_country=contact_country,
+            contact_notes=contact_notes,
+            unit_items=unit_items,
+        )
+        response = await self._http_patch(
+            f"bookings/{uuid}", supplier_id=supplier_id, json=payload, headers=headers
+        )
+        return self._decode("bookings/{id}", supplier_id, self._parse_booking, response)
+
+
+async def _read_body(response: "httpx.Response", deadline: Deadline) -> None:
+    """
+    Reads the body of a streamed response, until the deadline at the latest.
+    """
+    try:
+        await asyncio.wait_for(response.aread(), deadline.remaining())
+    except asyncio.TimeoutError:
+        await response.aclose()
+        raise exceptions.DeadlineExceededError("Deadline exceeded") from None
+    except BaseException:
+        await response.aclose()
+        raise
+
+
+async def _check_deadline(
+    chunks: AsyncIterable[bytes], deadline: Optional[Deadline]
+) -> AsyncIterator[bytes]:
+    """
+    Yields the chunks of a streamed response, checking the deadline before each one.
+    """
+    async for chunk in chunks:
+        if deadline is not None:
+            deadline.check()
+        yield chunk
+
+
+def _tracer(events: Dict[str, float]) -> Callable[[str, Dict], Awaitable[None]]:
+    """
+    Returns an httpcore trace callback storing the time of every event.
+    """
+
+    async def trace(event_name: str, info: Dict) -> None:
+        events[event_name] = time.monotonic()
+
+    return trace
+
+
+def _set_transport_timings(
+    metrics: RequestMetrics, started_at: float, events: Dict[str, float]
+) -> None:
+    """
+    Sets the timings of an attempt from its trace events, the connect timing is set only when
+    a new connection was opened.
+    """
+    connected_at = events.get("connection.start_tls.complete") or events.get(
+        "connection.connect_tcp.complete"
+    )
+    if connected_at is not None and "connection.connect_tcp.started" in events:
+        metrics.connect = connected_at - events["connection.connect_tcp.started"]
+    headers_at = events.get("http11.receive_response_headers.complete") or events.get(
+        "http2.receive_response_headers.complete"
+    )
+    if headers_at is not None:
+        metrics.ttfb = headers_at - started_at
+        metrics.download = time.monotonic() - headers_at
@@ -0,0 +1,128 @@
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
+
+from octo_client import models
+from octo_client.timeouts import with_context
+
+
+@dataclass
+class AvailabilityQuery:
+    """
+    Single availability or calendar lookup executed as a part of a batch.
+    """
+
+    supplier_id: str
+    product_id: str
+    option_id: str
+    local_date_start: Optional[date] = None
+    local_date_end: Optional[date] = None
+    units: Optional[List[models.UnitQuantity]] = None
+    headers: Optional[Dict] = None
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of a single query of a batch, either `result` or `error` is set.
+    """
+
+    query: AvailabilityQuery
+    result: Optional[List[Any]] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_batch(
+    func: Callable[[AvailabilityQuery], List[Any]],
+    queries: Iterable[AvailabilityQuery],
+    max_workers: int,
+) -> Iterator[BatchResult]:
+    """
+    Runs `func` for every query on a pool of `max_workers` threads and yields the results in the
+    order of completion. Queries are submitted lazily, so at most `max_workers` of them are in
+    flight at any time, and an error of a single query is returned in its `BatchResult` instead
+    of being raised. The queries share the deadline of the caller, see `timeouts.deadline`.
+    """
+    func = with_context(func)
+    pending_queries = iter(queries)
+    in_flight: Dict[Future, AvailabilityQuery] = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit_next() -> bool:
+        query = next(pending_queries, None)
+        if query is None:
+            return False
+        in_flight[executor.submit(func, query)] = query
+        return True
+
+    try:
+        while len(in_flight) < max_workers and submit_next():
+            pass
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                query = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield BatchResult(query=query, result=future.result())
+                else:
+                    yield BatchResult(query=query, error=error)
+                submit_next()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def run_batch_async(
+    func: Callable[[AvailabilityQuery], Awaitable[List[Any]]],
+    queries: Iterable[AvailabilityQuery],
+    max_concurrency: int,
+) -> AsyncIterator[BatchResult]:
+    """
+    Asyncio counterpart of `run_batch`, at most `max_concurrency` queries run concurrently.
+    """
+    pending_queries = iter(queries)
+    in_flight: Dict["asyncio.Future[List[Any]]", AvailabilityQuery] = {}
+
+    def submit_next() -> bool:
+        query = next(pending_queries, None)
+        if query is None:
+            return False
+        in_flight[asyncio.ensure_future(func(query))] = query
+        return True
+
+    try:
+        while len(in_flight) < max_concurrency and submit_next():
+            pass
+        while in_flight:
+            done: Set["asyncio.Future[List[Any]]"]
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                query = in_flight.pop(task)
+                error = task.exception()
+                if error is None:
+                    yield BatchResult(query=query, result=task.result())
+                else:
+                    yield BatchResult(query=query, error=error)
+                submit_next()
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -0,0 +1,504 @@
+import asyncio
+import fnmatch
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from octo_client.codec import JSONCodec, default_codec
+
+logger = logging.getLogger("octo_client")
+
+CacheKey = str
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "supplier": 3600,
+    "products": 600,
+    "product": 600,
+}
+
+
+def normalise_payload(payload: Dict) -> str:
+    """
+    Serialises the request payload into a canonical string, the order of the keys and units
+    does not matter.
+    """
+    if isinstance(payload.get("units"), list):
+        payload = {
+            **payload,
+            "units": sorted(payload["units"], key=lambda unit: json.dumps(unit, sort_keys=True)),
+        }
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+class TTLCache(object):
+    """
+    Thread-safe LRU cache with a time to live of each entry.
+    """
+
+    def __init__(self, maxsize: int = 1024, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            maxsize (int): max number of entries, the least recently used entry is evicted when
+                           the limit is reached
+            clock (Callable): function returning the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value or None when the key is missing or its entry has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_matching(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Deletes all entries whose key matches the predicate and returns their number.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CacheBackend(object):
+    """
+    Storage of the responses cached by `ResponseCache`.
+
+    Implement this interface to share the cache between processes, e.g. in a network cache.
+    Keys are strings without whitespace and values are bytes. Patterns passed to
+    `delete_matching` use the glob syntax of `fnmatch` (`*` matches any sequence of characters),
+    which is also understood by SQLite's `GLOB` and Redis' `SCAN MATCH`.
+    """
+
+    # True when the backend keeps the values as they are in the memory of the process, the parsed
+    # models are then cached instead of the serialised responses
+    stores_objects = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the stored value or None when the key is missing or its entry has expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Stores the value for `ttl` seconds.
+        """
+        raise NotImplementedError
+
+    def delete_matching(self, pattern: str) -> int:
+        """
+        Deletes all entries whose key matches the glob pattern and returns their number.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU backend, the default backend of `ResponseCache`. The values are stored as they
+    are, without serialising them.
+    """
+
+    stores_objects = True
+
+    def __init__(self, maxsize: int = 1024, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            maxsize (int): max number of entries, the least recently used entry is evicted when
+                           the limit is reached
+            clock (Callable): function returning the current time in seconds
+        """
+        self._cache = TTLCache(maxsize=maxsize, clock=clock)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._cache.set(key, value, ttl)
+
+    def delete_matching(self, pattern: str) -> int:
+        return self._cache.delete_matching(lambda key: fnmatch.fnmatchcase(key, pattern))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Backend storing the entries in a local SQLite file shared by all processes of the host.
+
+    Expiration uses the wall clock, as the monotonic clock is not comparable between processes.
+    When the file holds more than `maxsize` entries, the entries closest to their expiration are
+    removed first.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.time,
+        purge_interval: int = 100,
+    ) -> None:
+        """
+        Args:
+            path (str): path of the database file, created when it does not exist
+            maxsize (int): max number of entries stored in the file
+            clock (Callable): function returning the current time in seconds
+            purge_interval (int): number of writes of a process after which the expired and the
+                                  excess entries are removed
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.clock = clock
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the current thread, the connections are not shared between
+        threads.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS octo_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS octo_cache_expires_at ON octo_cache (expires_at)"
+            )
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM octo_cache WHERE key = ? AND expires_at > ?",
+                (key, self.clock()),
+            )
+            .fetchone()
+        )
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO octo_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self.clock() + ttl),
+        )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.purge_interval == 0
+        if purge:
+            self.purge()
+
+    def purge(self) -> None:
+        """
+        Removes the expired entries and the entries above `maxsize`.
+        """
+        connection = self._connection()
+        connection.execute("DELETE FROM octo_cache WHERE expires_at <= ?", (self.clock(),))
+        connection.execute(
+            "DELETE FROM octo_cache WHERE key IN (SELECT key FROM octo_cache "
+            "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def delete_matching(self, pattern: str) -> int:
+        cursor = self._connection().execute("DELETE FROM octo_cache WHERE key GLOB ?", (pattern,))
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM octo_cache")
+
+    def close(self) -> None:
+        """
+        Closes the connections of all threads.
+        """
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend storing the entries in Redis, or any other server implementing its commands.
+
+    The client is not created by the backend, pass an instance of `redis.Redis` or of another
+    client providing the `get`, `set`, `scan_iter` and `delete` methods.
+    """
+
+    def __init__(self, client: Any, prefix: str = "octo_client:") -> None:
+        """
+        Args:
+            client: Redis client
+            prefix (str): prefix of the stored keys, must not contain glob special characters
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def delete_matching(self, pattern: str) -> int:
+        keys = list(self.client.scan_iter(match=self.prefix + pattern))
+        if not keys:
+            return 0
+        return self.client.delete(*keys)
+
+    def clear(self) -> None:
+        self.delete_matching("*")
+
+
+class ResponseCache(object):
+    """
+    Opt-in cache of the responses of the OCTo client.
+
+    Responses of an endpoint are cached only when the endpoint has a TTL, by default the
+    catalogue endpoints (`supplier`, `products` and `product`) are cached. The availability
+    endpoints (`availability` and `calendar`) can be enabled with a short TTL, e.g.
+    `ResponseCache(ttls={**DEFAULT_TTLS, "availability": 5, "calendar": 5})`.
+
+    The default in-memory backend stores the parsed models, every hit returns shallow copies of
+    them: their fields can be set, but their nested models and lists are shared by the callers
+    and must not be modified. The other backends store the raw JSON responses, serialised as compact
+    JSON and compressed above `compress_threshold` bytes, and parsed into models on every hit.
+    A backend shared between processes therefore doesn't depend on the Python version or on
+    the definition of the models.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        backend: Optional[CacheBackend] = None,
+        compress_threshold: int = 1024,
+        codec: Optional[JSONCodec] = None,
+    ) -> None:
+        """
+        Args:
+            maxsize (int): max number of cached responses of the default in-memory backend
+            ttls (dict): number of seconds a response of an endpoint stays cached, by endpoint name
+            clock (Callable): function returning the current time in seconds, used by the default
+                              in-memory backend
+            backend (CacheBackend): storage of the cached responses, in memory of the process
+                                    by default
+            compress_threshold (int): size in bytes above which the stored responses are
+                                      compressed
+            codec (JSONCodec): codec serialising the stored responses, the fastest installed
+                               JSON library by default
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.backend = backend or MemoryCacheBackend(maxsize=maxsize, clock=clock)
+        self.compress_threshold = compress_threshold
+        self.codec = codec or default_codec()
+
+    @staticmethod
+    def make_key(
+        endpoint: str,
+        url: str,
+        supplier_id: Optional[str],
+        path: str,
+        language: str,
+        headers: Optional[Dict],
+        payload: Optional[Dict] = None,
+        token: Optional[str] = None,
+    ) -> CacheKey:
+        """
+        Returns a key of the form `<endpoint>:<supplier_id>:<digest of the request>`, so the
+        responses can be invalidated by endpoint and supplier with a glob pattern. The token
+        of the client is part of the digest, clients with different credentials sharing a cache
+        don't get each other's responses.
+        """
+        request = json.dumps(
+            [
+                url,
+                token,
+                path,
+                language,
+                sorted(headers.items()) if headers else [],
+                normalise_payload(payload) if payload else None,
+            ],
+            separators=(",", ":"),
+            default=str,
+        )
+        digest = hashlib.sha1(request.encode("utf-8")).hexdigest()
+        return f"{quote(endpoint, safe='')}:{quote(supplier_id or '', safe='')}:{digest}"
+
+    @property
+    def stores_objects(self) -> bool:
+        """
+        True when the values are stored without serialising them, see `CacheBackend`.
+        """
+        return self.backend.stores_objects
+
+    def is_cached(self, endpoint: str) -> bool:
+        return endpoint in self.ttls
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        if not self.is_cached(self._endpoint(key)):
+            return None
+        try:
+            value = self.backend.get(key)
+            if value is None or self.stores_objects:
+                return value
+            return self._loads(value)
+        except Exception:
+            logger.warning("Failed to read the cached response %s", key, exc_info=True)
+            return None
+
+    def set(self, key: CacheKey, value: Any) -> None:
+        ttl = self.ttls.get(self._endpoint(key))
+        if not ttl:
+            return
+        try:
+            self.backend.set(key, value if self.stores_objects else self._dumps(value), ttl)
+        except Exception:
+            logger.warning("Failed to cache the response %s", key, exc_info=True)
+
+    def invalidate(self, supplier_id: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        """Removes cached responses.
+
+        Args:
+            supplier_id: only remove the responses of this supplier.
+            endpoint: only remove the responses of this endpoint.
+
+        Returns: the number of removed responses.
+        """
+        endpoint_pattern = "*" if endpoint is None else quote(endpoint, safe="")
+        supplier_pattern = "*" if supplier_id is None else quote(supplier_id, safe="")
+        return self.backend.delete_matching(f"{endpoint_pattern}:{supplier_pattern}:*")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    @staticmethod
+    def _endpoint(key: CacheKey) -> str:
+        return unquote(key.partition(":")[0])
+
+    def _dumps(self, value: Any) -> bytes:
+        data = self.codec.dumps(value)
+        if len(data) > self.compress_threshold:
+            return b"z" + zlib.compress(data)
+        return b"j" + data
+
+    def _loads(self, value: bytes) -> Any:
+        data = zlib.decompress(value[1:]) if value[:1] == b"z" else value[1:]
+        return self.codec.loads(data)
+
+
+class _Call(object):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key into a single call whose result (or error)
+    is shared by all callers.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight(object):
+    """
+    Asyncio counterpart of `SingleFlight`.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # a cancelled caller must not cancel the call shared with the other callers
+        return await asyncio.shield(task)
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from octo_client import exceptions
+
+logger = logging.getLogger("octo_client")
+
+# statuses of the responses counted as failures of the supplier
+FAILURE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+StateChangeCallback = Callable[[str, CircuitState, CircuitState], None]
+
+
+class _Circuit(object):
+    def __init__(self, window_size: int) -> None:
+        self.state = CircuitState.CLOSED
+        # (failed, slow) outcomes of the most recent calls
+        self.calls: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.trial_calls = 0
+        self.successful_trial_calls = 0
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breakers of the supplier endpoints, failing fast with `CircuitOpenError` instead of
+    sending requests to an endpoint which keeps failing.
+
+    A circuit opens when at least `failure_rate_threshold` of the last `window_size` calls failed,
+    or at least `slow_call_rate_threshold` of them took longer than `slow_call_duration` seconds,
+    once there were `minimum_calls` calls. After `open_duration` seconds the circuit is half-open
+    and lets `trial_calls` calls through, it closes when all of them succeed and opens again
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_duration: float = 10.0,
+        slow_call_rate_threshold: float = 1.0,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30.0,
+        trial_calls: int = 1,
+        on_state_change: Optional[StateChangeCallback] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            failure_rate_threshold (float): ratio of the failed calls opening the circuit
+            slow_call_duration (float): number of seconds after which a call is slow
+            slow_call_rate_threshold (float): ratio of the slow calls opening the circuit
+            window_size (int): number of the most recent calls the ratios are computed from
+            minimum_calls (int): min number of calls before the circuit can open
+            open_duration (float): number of seconds the circuit stays open
+            trial_calls (int): number of calls let through by a half-open circuit
+            on_state_change (Callable): function called with the endpoint, the old and the new
+                                        state when a circuit changes its state
+            clock (Callable): function returning the current time in seconds
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.window_size = window_size
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.trial_calls = trial_calls
+        self.on_state_change = on_state_change
+        self.clock = clock
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, key: str) -> CircuitState:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return CircuitState.CLOSED if circuit is None else circuit.state
+
+    def before_call(self, key: str) -> None:
+        """
+        Raises `CircuitOpenError` when the call to the endpoint must not be made.
+        """
+        changes: List[Tuple[CircuitState, CircuitState]] = []
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if (
+                circuit.state is CircuitState.OPEN
+                and self.clock() - circuit.opened_at >= self.open_duration
+            ):
+                self._change_state(circuit, CircuitState.HALF_OPEN, changes)
+            if circuit.state is CircuitState.HALF_OPEN and circuit.trial_calls < self.trial_calls:
+                circuit.trial_calls += 1
+                allowed = True
+            else:
+                allowed = circuit.state is CircuitState.CLOSED
+        self._notify(key, changes)
+        if not allowed:
+            raise exceptions.CircuitOpenError(f"Circuit of {key} is open")
+
+    def record(self, key: str, duration: float, failed: bool) -> None:
+        """
+        Records the outcome of a call allowed by `before_call`.
+        """
+        slow = duration >= self.slow_call_duration
+        changes: List[Tuple[CircuitState, CircuitState]] = []
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state is CircuitState.HALF_OPEN:
+                if failed or slow:
+                    self._open(circuit, changes)
+                else:
+                    circuit.successful_trial_calls += 1
+                    if circuit.successful_trial_calls >= self.trial_calls:
+                        circuit.calls.clear()
+                        self._change_state(circuit, CircuitState.CLOSED, changes)
+            elif circuit.state is CircuitState.CLOSED:
+                circuit.calls.append((failed, slow))
+                calls = len(circuit.calls)
+                if calls >= self.minimum_calls and (
+                    sum(call[0] for call in circuit.calls) >= self.failure_rate_threshold * calls
+                    or sum(call[1] for call in circuit.calls)
+                    >= self.slow_call_rate_threshold * calls
+                ):
+                    self._open(circuit, changes)
+        self._notify(key, changes)
+
+    def release(self, key: str) -> None:
+        """
+        Releases a call allowed by `before_call` which ended without an outcome, e.g. cancelled.
+        """
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state is CircuitState.HALF_OPEN and circuit.trial_calls:
+                circuit.trial_calls -= 1
+
+    def _get_circuit(self, key: str) -> _Circuit:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit(self.window_size)
+        return circuit
+
+    def _open(self, circuit: _Circuit, changes: List[Tuple[CircuitState, CircuitState]]) -> None:
+        circuit.opened_at = self.clock()
+        self._change_state(circuit, CircuitState.OPEN, changes)
+
+    @staticmethod
+    def _change_state(
+        circuit: _Circuit,
+        state: CircuitState,
+        changes: List[Tuple[CircuitState, CircuitState]],
+    ) -> None:
+        changes.append((circuit.state, state))
+        circuit.state = state
+        circuit.trial_calls = 0
+        circuit.successful_trial_calls = 0
+
+    def _notify(self, key: str, changes: List[Tuple[CircuitState, CircuitState]]) -> None:
+        # called without the lock, so the callback can use the circuit breaker
+        for old_state, new_state in changes:
+            logger.warning(
+                "Circuit of %s changed from %s to %s", key, old_state.value, new_state.value
+            )
+            if self.on_state_change is not None:
+                try:
+                    self.on_state_change(key, old_state, new_state)
+                except Exception:
+                    logger.warning("State change callback failed", exc_info=True)
@@ -1,18 +1,772 @@
 import copy
 import logging
-from datetime import date
-from typing import Any, Callable, Dict, List, Optional, Union
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
-from octo_client import exceptions, models
-from octo_client.utils import hide_sensitive_data
+from octo_client import batch, exceptions, models
+from octo_client.cache import CacheKey, ResponseCache, SingleFlight, TTLCache
+from octo_client.circuit_breaker import FAILURE_STATUSES, CircuitBreaker
+from octo_client.codec import JSONCodec, default_codec
+from octo_client.hedging import HedgingPolicy
+from octo_client.instrumentation import (
+    DecodeMetrics,
+    MetricsHook,
+    RequestMetrics,
+    endpoint_name,
+)
+from octo_client.rate_limit import RateLimiter
+from octo_client.retry import RetryPolicy
+from octo_client.streaming import STREAM_CHUNK_SIZE, iter_json_array
+from octo_client.timeouts import (
+    DEFAULT_TIMEOUT,
+    Deadline,
+    Timeout,
+    get_call_timeout,
+    get_deadline,
+    with_context,
+)
+from octo_client.utils import filter_log_data
 
 logger = logging.getLogger("octo_client")
 logger.setLevel(logging.INFO)
 
+T = TypeVar("T")
 
-class OctoClient(object):
+# bytes read between two checks of the deadline of a call
+DEADLINE_CHUNK_SIZE = 4 * 1024
+
+
+class BaseOctoClient(object):
+    """
+    Transport independent part of the OCTo clients: configuration, logging, request payloads
+    and response parsing shared by `OctoClient` and `AsyncOctoClient`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        custom_logger: Optional[logging.Logger] = None,
+        log_size_limit: Optional[int] = None,
+        requests_loglevel: int = logging.DEBUG,
+        language: str = "en",
+        strict: bool = False,
+        calendar_chunk_days: Optional[int] = None,
+        calendar_max_workers: int = 4,
+        cache: Optional[ResponseCache] = None,
+        supplier_map_ttl: Optional[float] = None,
+        unknown_supplier_ttl: float = 60,
+        lazy_bookings: bool = False,
+        codec: Optional[JSONCodec] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        supplier_timeouts: Optional[Dict[str, Timeout]] = None,
+        metrics_hook: Optional[MetricsHook] = None,
+    ) -> None:
+        if calendar_chunk_days is not None and calendar_chunk_days < 1:
+            raise ValueError("calendar_chunk_days has to be a positive number")
+        self.url = url.rstrip("/")
+        self.token = token
+        self.logger = custom_logger or logger
+        self.supplier_url_map: Dict[str, str] = {}
+        self.requests_loglevel = requests_loglevel
+        self.log_responses = False
+        self.log_requests = False
+        self.log_size_limit = log_size_limit
+        self.language = language
+        self.strict = strict
+        self.calendar_chunk_days = calendar_chunk_days
+        self.calendar_max_workers = calendar_max_workers
+        self.cache = cache
+        self.supplier_map_ttl = supplier_map_ttl
+        self.unknown_supplier_ttl = unknown_supplier_ttl
+        self._suppliers_refreshed_at: Optional[float] = None
+        self._suppliers_lock = threading.Lock()
+        self._unknown_suppliers = TTLCache(maxsize=1024)
+        self.booking_model = models.LazyBooking if lazy_bookings else models.Booking
+        self.codec = codec or default_codec()
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.hedging = hedging
+        self.timeout = timeout
+        self.supplier_timeouts = dict(supplier_timeouts or {})
+        self.metrics_hook = metrics_hook
+
+    def invalidate_cache(
+        self, supplier_id: Optional[str] = None, endpoint: Optional[str] = None
+    ) -> int:
+        """Removes cached responses, see `ResponseCache.invalidate`.
+
+        Returns: the number of removed responses.
+        """
+        if self.cache is None:
+            return 0
+        return self.cache.invalidate(supplier_id=supplier_id, endpoint=endpoint)
+
+    def _cache_key(
+        self,
+        endpoint: str,
+        supplier_id: Optional[str],
+        path: str,
+        headers: Optional[Dict],
+        payload: Optional[Dict] = None,
+    ) -> Optional[CacheKey]:
+        if self.cache is None or not self.cache.is_cached(endpoint):
+            return None
+        return self.cache.make_key(
+            endpoint, self.url, supplier_id, path, self.language, headers, payload, self.token
+        )
+
+    def _get_cached(self, cache_key: Optional[CacheKey]) -> Optional[Any]:
+        if self.cache is None or cache_key is None:
+            return None
+        return self.cache.get(cache_key)
+
+    def _set_cached(self, cache_key: Optional[CacheKey], value: Any) -> None:
+        if self.cache is not None and cache_key is not None:
+            self.cache.set(cache_key, value)
+
+    def _caches_objects(self) -> bool:
+        return self.cache is not None and self.cache.stores_objects
+
+    @staticmethod
+    def _cached_models(value: Any) -> Any:
+        """
+        Returns shallow copies of the cached models, the callers may set their fields without
+        affecting the cache. Their nested models and lists are shared.
+        """
+        if isinstance(value, list):
+            return [copy.copy(model) for model in value]
+        return copy.copy(value)
+
+    def _is_unknown_supplier(self, supplier_id: str) -> bool:
+        """
+        Returns True when the supplier was missing from a recent refresh of the suppliers.
+        """
+        return self._unknown_suppliers.get(supplier_id) is not None
+
+    def _remember_unknown_supplier(self, supplier_id: str) -> None:
+        if supplier_id not in self.supplier_url_map and self.unknown_supplier_ttl > 0:
+            self._unknown_suppliers.set(supplier_id, True, self.unknown_supplier_ttl)
+
+    def _claim_supplier_map_refresh(self) -> bool:
+        """
+        Returns True when the map of the supplier endpoints is older than `supplier_map_ttl`.
+        The map is marked as refreshed, so only one caller refreshes it and a failed refresh
+        is retried after another `supplier_map_ttl`.
+        """
+        if self.supplier_map_ttl is None or self._suppliers_refreshed_at is None:
+            return False
+        with self._suppliers_lock:
+            now = time.monotonic()
+            if now - self._suppliers_refreshed_at < self.supplier_map_ttl:
+                return False
+            self._suppliers_refreshed_at = now
+            return True
+
+    def _get_retry_delay(
+        self,
+        http_method: str,
+        path: str,
+        retries: int,
+        started_at: float,
+        status_code: Optional[int] = None,
+        retry_after: Optional[str] = None,
+        sent: bool = True,
+    ) -> Optional[float]:
+        """
+        Returns the number of seconds to wait before retrying a failed request, None when
+        the request is not retried, see `RetryPolicy.get_retry_delay`.
+        """
+        if self.retry_policy is None:
+            return None
+        delay = self.retry_policy.get_retry_delay(
+            http_method,
+            path,
+            retries,
+            time.monotonic() - started_at,
+            status_code=status_code,
+            retry_after=retry_after,
+            sent=sent,
+        )
+        deadline = get_deadline()
+        if delay is not None and deadline is not None and delay >= deadline.remaining():
+            return None
+        if delay is not None:
+            self.logger.warning(
+                "Retrying %s %s in %.2f seconds (%s)",
+                http_method,
+                path,
+                delay,
+                status_code or "connection error",
+            )
+        return delay
+
+    def _get_timeout(self, supplier_id: Optional[str]) -> Timeout:
+        """
+        Returns the timeout of a request: the timeout of the call, of the supplier and of
+        the client, in this order, cut to the time left until the deadline of the call.
+
+        Raises: `DeadlineExceededError` when the deadline passed.
+        """
+        timeout = self.timeout
+        if supplier_id and str(supplier_id) in self.supplier_timeouts:
+            timeout = self.supplier_timeouts[str(supplier_id)].with_defaults(timeout)
+        call_timeout = get_call_timeout()
+        if call_timeout is not None:
+            timeout = call_timeout.with_defaults(timeout)
+        deadline = get_deadline()
+        if deadline is not None:
+            deadline.check()
+            timeout = timeout.limit(deadline.remaining())
+        return timeout
+
+    @staticmethod
+    def _get_max_wait() -> Optional[float]:
+        """
+        Returns the number of seconds left until the deadline of the call, None without
+        a deadline.
+
+        Raises: `DeadlineExceededError` when the deadline passed.
+        """
+        deadline = get_deadline()
+        if deadline is None:
+            return None
+        deadline.check()
+        return deadline.remaining()
+
+    @contextmanager
+    def _request_metrics(
+        self, http_method: str, path: str, supplier_id: Optional[str]
+    ) -> Iterator[Optional[RequestMetrics]]:
+        """
+        Yields the metrics of a request, filled in by the caller and reported to the `metrics_hook`
+        on exit together with the error of the request. Yields None without the hook.
+        """
+        if self.metrics_hook is None:
+            yield None
+            return
+        metrics = RequestMetrics(
+            http_method, endpoint_name(path), str(supplier_id) if supplier_id else None, time.time()
+        )
+        started_at = time.monotonic()
+        try:
+            yield metrics
+        except BaseException as exc:
+            metrics.error = exc
+            raise
+        finally:
+            metrics.duration = time.monotonic() - started_at
+            self._notify_metrics_hook(self.metrics_hook.on_request, metrics)
+
+    def _loads(self, content: bytes, metrics: Optional[RequestMetrics]) -> Any:
+        if metrics is None:
+            return self.codec.loads(content)
+        started_at = time.monotonic()
+        try:
+            return self.codec.loads(content)
+        finally:
+            metrics.json_decode = time.monotonic() - started_at
+
+    def _decode(
+        self, endpoint: str, supplier_id: Optional[str], parse: Callable[[Any], T], response: Any
+    ) -> T:
+        """
+        Parses the models of the response with `parse`, the time spent is reported to
+        the `metrics_hook`.
+        """
+        if self.metrics_hook is None:
+            return parse(response)
+        started_at = time.time()
+        decode_started_at = time.monotonic()
+        result = parse(response)
+        metrics = DecodeMetrics(
+            endpoint,
+            str(supplier_id) if supplier_id else None,
+            started_at,
+            time.monotonic() - decode_started_at,
+            items=len(result) if isinstance(result, list) else 1,
+        )
+        self._notify_metrics_hook(self.metrics_hook.on_decode, metrics)
+        return result
+
+    def _decoder(
+        self, endpoint: str, supplier_id: Optional[str], parse: Callable[[Any], T]
+    ) -> Callable[[Any], T]:
+        return lambda response: self._decode(endpoint, supplier_id, parse, response)
+
+    def _notify_metrics_hook(self, callback: Callable[[Any], None], metrics: Any) -> None:
+        try:
+            callback(metrics)
+        except Exception:
+            self.logger.warning("Metrics hook failed", exc_info=True)
+
+    def _circuit_key(self, supplier_id: Optional[str]) -> str:
+        """
+        Returns the key of the circuit breaker, the endpoint of the supplier.
+        """
+        if supplier_id:
+            return self.supplier_url_map.get(str(supplier_id), self.url)
+        return self.url
+
+    def _before_call(self, circuit_key: str) -> None:
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call(circuit_key)
+
+    def _record_call(
+        self, circuit_key: str, started_at: float, status_code: Optional[int] = None
+    ) -> None:
+        """
+        Records the outcome of a call in the circuit breaker, calls without a status failed
+        with a connection error or a timeout.
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(
+                circuit_key,
+                time.monotonic() - started_at,
+                failed=status_code is None or status_code in FAILURE_STATUSES,
+            )
+
+    def _release_call(self, circuit_key: str) -> None:
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release(circuit_key)
+
+    @staticmethod
+    def _raise_for_status(response: Any) -> None:
+        """
+        Raises the exception of an error status of the response, `requests` or `httpx` one.
+        The body is only decoded to text for the errors.
+        """
+        CODE_EXCEPTION_MAP = {
+            400: exceptions.InvalidRequest,
+            403: exceptions.Unauthorized,
+            404: exceptions.ApiError,
+            429: exceptions.ApiError,
+            500: exceptions.ApiError,
+            502: exceptions.ApiError,
+            503: exceptions.ApiError,
+            504: exceptions.ApiError,
+        }
+        if response.status_code in CODE_EXCEPTION_MAP:
+            raise CODE_EXCEPTION_MAP[response.status_code](response.text)
+
+    def _get_supplier_endpoint(self, supplier_id: str) -> str:
+        # the map is replaced as a whole by the refreshes of the suppliers, it is read once
+        supplier_url_map = self.supplier_url_map
+        endpoint_url = supplier_url_map.get(supplier_id)
+        if endpoint_url is None:
+            raise exceptions.InvalidRequest("Incorrect supplierId")
+        return endpoint_url
+
+    @staticmethod
+    def _join_endpoint_url(endpoint_url: str, path: str) -> str:
+        cleaned_endpoint = endpoint_url.rstrip("/")
+
+        return cleaned_endpoint if cleaned_endpoint.endswith(path) else f"{cleaned_endpoint}/{path}"
+
+    def _get_endpoint_url(self, supplier_id: str, path: str) -> str:
+        return self._join_endpoint_url(self._get_supplier_endpoint(supplier_id), path)
+
+    def _log_request(self, full_url: str, http_method: str, json: Optional[Dict], params) -> None:
+        # the log data is only built when the record is emitted
+        if not self.logger.isEnabledFor(self.requests_loglevel):
+            return
+        request_log_data: dict = {"json": json, "params": params}
+
+        self.logger.log(
+            self.requests_loglevel,
+            "Sending request to %s (%s)",
+            full_url,
+            http_method,
+            extra={"request": self._filter_request_log_data(request_log_data)},
+        )
+
+    def _log_response(self, full_url: str, http_method: str, response_json: Any) -> None:
+        if not self.logger.isEnabledFor(self.requests_loglevel):
+            return
+        self.logger.log(
+            self.requests_loglevel,
+            "Got response from %s (%s)",
+            full_url,
+            http_method,
+            extra={"response": self._filter_response_log_data(response_json)},
+        )
+
+    def _log_streamed_response(self, full_url: str, http_method: str) -> None:
+        self.logger.log(
+            self.requests_loglevel,
+            "Streaming response from %s (%s)",
+            full_url,
+            http_method,
+        )
+
+    def _log_non_json_response(self, response_text: str) -> None:
+        if not self.logger.isEnabledFor(self.requests_loglevel):
+            return
+        self.logger.log(
+            self.requests_loglevel,
+            "Received non-JSON response",
+            extra={"response": self._filter_response_log_data(response_text)},
+        )
+
+    def _filter_request_log_data(
+        self, request_content: Union[str, dict, list]
+    ) -> Optional[Union[str, dict, list]]:
+        if self.log_requests:
+            return filter_log_data(request_content, self.log_size_limit)
+        return None
+
+    def _filter_response_log_data(
+        self, response_content: Union[str, dict, list]
+    ) -> Optional[Union[str, dict, list]]:
+        if self.log_responses:
+            return filter_log_data(response_content, self.log_size_limit)
+        return None
+
+    def _encode_body(self, json: Optional[Dict]) -> Optional[bytes]:
+        return None if json is None else self.codec.dumps(json)
+
+    def _get_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.token}",
+            "Accept-Language": self.language,
+        }
+
+    @staticmethod
+    def _availability_payload(
+        product_id: str,
+        option_id: str,
+        units: Optional[List[models.UnitQuantity]] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        local_date: Optional[date] = None,
+        availability_ids: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "productId": product_id,
+            "optionId": option_id,
+        }
+        if any([local_date_start, local_date_end]) and not all([local_date_start, local_date_end]):
+            raise ValueError("local_date_start and local_date_end needs to be used together")
+        if local_date_start:
+            payload["localDateStart"] = local_date_start.isoformat()
+        if local_date_end:
+            payload["localDateEnd"] = local_date_end.isoformat()
+        if local_date:
+            payload["localDate"] = local_date.isoformat()
+        if availability_ids:
+            payload["availabilityIds"] = availability_ids
+        if units:
+            payload["units"] = [unit.as_dict() for unit in units]
+        return payload
+
+    @staticmethod
+    def _calendar_payload(
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "productId": product_id,
+            "optionId": option_id,
+        }
+        if local_date_start:
+            payload["localDateStart"] = local_date_start.isoformat()
+        if local_date_end:
+            payload["localDateEnd"] = local_date_end.isoformat()
+        if units:
+            payload["units"] = [unit.as_dict() for unit in units]
+        return payload
+
+    @staticmethod
+    def _calendar_chunks(
+        local_date_start: date, local_date_end: date, chunk_days: Optional[int]
+    ) -> List[Tuple[date, date]]:
+        """
+        Splits the range of dates into consecutive chunks of at most `chunk_days` days.
+        """
+        if chunk_days is not None and chunk_days < 1:
+            raise ValueError("chunk_days has to be a positive number")
+        if not (chunk_days and local_date_start and local_date_end):
+            return [(local_date_start, local_date_end)]
+        chunks = []
+        chunk_start = local_date_start
+        while chunk_start <= local_date_end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), local_date_end)
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+        return chunks or [(local_date_start, local_date_end)]
+
+    @staticmethod
+    def _merge_calendar_chunks(chunks: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Merges calendar responses fetched for consecutive chunks of dates into a single calendar
+        response ordered by date, a day returned by more than one chunk is kept only once.
+        Items without a date are kept after the days, and a response which isn't a list is
+        returned as it is, so their parsing fails as for a calendar fetched at once.
+        """
+        daily_availability: Dict[str, Dict[str, Any]] = {}
+        invalid_items: List[Any] = []
+        for chunk in chunks:
+            if not isinstance(chunk, list):
+                return chunk
+            for item in chunk:
+                day = item.get("localDate") if isinstance(item, dict) else None
+                if isinstance(day, str):
+                    daily_availability.setdefault(day, item)
+                else:
+                    invalid_items.append(item)
+        return [daily_availability[day] for day in sorted(daily_availability)] + invalid_items
+
+    @staticmethod
+    def _reservation_payload(
+        uuid: str,
+        product_id: str,
+        option_id: str,
+        availability_id: str,
+        unit_items: List[models.UnitItem],
+        expiration_minutes: Optional[int] = None,
+        notes: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "uuid": uuid,
+            "productId": product_id,
+            "optionId": option_id,
+            "availabilityId": availability_id,
+            "unitItems": [unit.as_dict() for unit in unit_items],
+        }
+        if expiration_minutes:
+            payload["expirationMinutes"] = expiration_minutes
+        if notes:
+            payload["notes"] = notes
+        return payload
+
+    @staticmethod
+    def _list_bookings_params(
+        reseller_reference: Optional[str] = None,
+        supplier_reference: Optional[str] = None,
+        local_date: Optional[date] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+    ) -> Dict[str, str]:
+        if not any(
+            [reseller_reference, supplier_reference, local_date, local_date_start or local_date_end]
+        ):
+            raise ValueError("One of the query parameters has to be provided.")
+
+        if any([local_date_start, local_date_end]) and not all([local_date_start, local_date_end]):
+            raise ValueError("local_date_start and local_date_end needs to be used together")
+
+        params: Dict[str, str] = {}
+        if reseller_reference:
+            params["resellerReference"] = reseller_reference
+        elif supplier_reference:
+            params["supplierReference"] = supplier_reference
+        elif local_date:
+            params["localDate"] = local_date.isoformat()
+        elif local_date_start and local_date_end:
+            params["localDateStart"] = local_date_start.isoformat()
+            params["localDateEnd"] = local_date_end.isoformat()
+        return params
+
+    @staticmethod
+    def _confirmation_payload(
+        email_receipt: bool = False,
+        reseller_reference: Optional[str] = None,
+        contact_full_name: Optional[str] = None,
+        contact_first_name: Optional[str] = None,
+        contact_last_name: Optional[str] = None,
+        contact_email_address: Optional[str] = None,
+        contact_phone_number: Optional[str] = None,
+        contact_locales: Optional[List[str]] = None,
+        contact_postal_code: Optional[str] = None,
+        contact_country: Optional[str] = None,
+        contact_notes: Optional[str] = None,
+        unit_items: Optional[List[models.ConfirmationUnitItem]] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {}
+        if email_receipt:
+            payload["emailReceipt"] = email_receipt
+        if reseller_reference:
+            payload["resellerReference"] = reseller_reference
+        if any(
+            [
+                contact_full_name,
+                contact_first_name,
+                contact_last_name,
+                contact_email_address,
+                contact_phone_number,
+                contact_locales,
+                contact_postal_code,
+                contact_country,
+                contact_notes,
+            ]
+        ):
+            payload["contact"] = models.BookingContact.from_dict(
+                {
+                    "locales": contact_locales or [],
+                    "fullName": contact_full_name,
+                    "firstName": contact_first_name,
+                    "lastName": contact_last_name,
+                    "emailAddress": contact_email_address,
+                    "phoneNumber": contact_phone_number,
+                    "postalCode": contact_postal_code,
+                    "country": contact_country,
+                    "notes": contact_notes,
+                }
+            ).as_dict()
+        if unit_items:
+            payload["unitItems"] = [unit_item.as_dict() for unit_item in unit_items]
+        return payload
+
+    @staticmethod
+    def _cancellation_payload(
+        reason: Optional[str] = None, force: Optional[bool] = False
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {}
+        if reason:
+            payload["reason"] = reason
+        if force:
+            payload["force"] = force
+        return payload
+
+    @staticmethod
+    def _update_payload(
+        product_id: Optional[str] = None,
+        option_id: Optional[str] = None,
+        availability_id: Optional[str] = None,
+        notes: Optional[str] = None,
+        email_receipt: bool = False,
+        reseller_reference: Optional[str] = None,
+        contact_full_name: Optional[str] = None,
+        contact_first_name: Optional[str] = None,
+        contact_last_name: Optional[str] = None,
+        contact_email_address: Optional[str] = None,
+        contact_phone_number: Optional[str] = None,
+        contact_locales: Optional[List[str]] = None,
+        contact_postal_code: Optional[str] = None,
+        contact_country: Optional[str] = None,
+        contact_notes: Optional[str] = None,
+        unit_items: Optional[List[models.ConfirmationUnitItem]] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {}
+        if product_id:
+            payload["productId"] = product_id
+        if option_id:
+            payload["optionId"] = option_id
+        if availability_id:
+            payload["availabilityId"] = availability_id
+        if notes:
+            payload["notes"] = notes
+        if email_receipt:
+            payload["emailReceipt"] = email_receipt
+        if reseller_reference:
+            payload["resellerReference"] = reseller_reference
+
+        if any(
+            [
+                contact_full_name,
+                contact_first_name,
+                contact_last_name,
+                contact_email_address,
+                contact_phone_number,
+                contact_locales,
+                contact_postal_code,
+                contact_country,
+                contact_notes,
+            ]
+        ):
+            payload["contact"] = {}
+            if contact_locales:
+                payload["contact"]["locales"] = contact_locales or []
+            if contact_full_name:
+                payload["contact"]["fullName"] = contact_full_name
+            if contact_first_name:
+                payload["contact"]["firstName"] = contact_first_name
+            if contact_last_name:
+                payload["contact"]["lastName"] = contact_last_name
+            if contact_email_address:
+                payload["contact"]["emailAddress"] = contact_email_address
+            if contact_phone_number:
+                payload["contact"]["phoneNumber"] = contact_phone_number
+            if contact_postal_code:
+                payload["contact"]["postalCode"] = contact_postal_code
+            if contact_country:
+                payload["contact"]["country"] = contact_country
+            if contact_notes:
+                payload["contact"]["notes"] = contact_notes
+
+        if unit_items:
+            payload["unitItems"] = [unit_item.as_dict() for unit_item in unit_items]
+        return payload
+
+    def _parse_supplier(self, response) -> models.Supplier:
+        try:
+            supplier = models.Supplier.from_dict(response, strict=self.strict)
+        except AttributeError as e:
+            raise exceptions.ApiError(response) from e
+        return supplier
+
+    def _parse_suppliers(self, response) -> List[models.Supplier]:
+        try:
+            suppliers = [
+                models.Supplier.from_dict(supplier, strict=self.strict) for supplier in response
+            ]
+        except AttributeError as e:
+            raise exceptions.ApiError(response) from e
+        self.logger.info("Found %s suppliers", len(suppliers), extra={"suppliers": response})
+        self.supplier_url_map = {supplier.id: supplier.endpoint for supplier in suppliers}
+        self._suppliers_refreshed_at = time.monotonic()
+        return suppliers
+
+    def _parse_products(self, response) -> List[models.Product]:
+        products = [models.Product.from_dict(product, strict=self.strict) for product in response]
+        self.logger.info("Found %s products", len(products), extra={"products": products})
+        return products
+
+    def _parse_product(self, response) -> models.Product:
+        return models.Product.from_dict(response, strict=self.strict)
+
+    def _parse_availability(self, response) -> List[models.Availability]:
+        detailed_availability = [
+            models.Availability.from_dict(availability, strict=self.strict)
+            for availability in response
+        ]
+        self.logger.info("Found %s items", len(detailed_availability))
+        return detailed_availability
+
+    def _parse_calendar(self, response) -> List[models.AvailabilityCalendarItem]:
+        daily_availability = [
+            models.AvailabilityCalendarItem.from_dict(availability, strict=self.strict)
+            for availability in response
+        ]
+        self.logger.info("Found %s days", len(daily_availability))
+        return daily_availability
+
+    def _parse_booking(self, response) -> models.Booking:
+        return self.booking_model.from_dict(response)
+
+    def _parse_bookings(self, response) -> List[models.Booking]:
+        return [self.booking_model.from_dict(booking) for booking in response]
+
+
+class OctoClient(BaseOctoClient):
     """
     HTTP client for OCTo (Open Connection for Tourism) APIs.
     """
@@ -26,41 +780,252 @@ class OctoClient(object):
         requests_loglevel: int = logging.DEBUG,
         language: str = "en",
         strict: bool = False,
+        pool_size: int = 32,
+        pool_connections_per_host: int = 10,
+        pool_idle_timeout: Optional[float] = None,
+        calendar_chunk_days: Optional[int] = None,
+        calendar_max_workers: int = 4,
+        cache: Optional[ResponseCache] = None,
+        supplier_map_ttl: Optional[float] = None,
+        unknown_supplier_ttl: float = 60,
+        lazy_bookings: bool = False,
+        codec: Optional[JSONCodec] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        supplier_timeouts: Optional[Dict[str, Timeout]] = None,
+        metrics_hook: Optional[MetricsHook] = None,
     ) -> None:
         """
         Args:
             url (str): URL under which the OCTO interface is available
             token (str): secret bearer token for the authorization
             custom_logger (Logger): custom logger which the client will use for logging
-            log_size_limit (int): max limit of the log size above which the log will be truncated
+            log_size_limit (int): max size in bytes of the logged request or response data, longer
+                                  data is logged as the prefix of its JSON
             requests_loglevel (int): default log level that will be used to log requests and
                                      responses
             language (str): language that will be used in the Accept-Language header of each request
             strict (bool): in the strict mode client will raise an error if the response will
                            contain any additional data outside of the data model provided
                            by the specification
+            pool_size (int): max number of supplier sessions kept open at the same time, the least
+                             recently used session is closed when the limit is reached
+            pool_connections_per_host (int): max number of keep-alive connections kept open for
+                                             a single supplier endpoint
+            pool_idle_timeout (float): number of seconds after which an unused session is closed
+                                       and its connections are dropped
+            calendar_chunk_days (int): when set, calendars for longer ranges of dates are fetched
+                                       in chunks of this many days and merged
+            calendar_max_workers (int): max number of calendar chunks fetched in parallel
+            cache (ResponseCache): cache of the responses, see `ResponseCache` for the endpoints
+                                   and backends, disabled by default
+            supplier_map_ttl (float): number of seconds after which the endpoints of the suppliers
+                                      are refreshed in the background, never by default
+            unknown_supplier_ttl (float): number of seconds during which requests for a supplier
+                                          missing from the suppliers fail without refreshing them
+            lazy_bookings (bool): when set, bookings are returned as `LazyBooking`, whose nested
+                                  objects are parsed on the first access
+            codec (JSONCodec): codec encoding the requests and decoding the responses, the fastest
+                               installed JSON library by default. The arrays streamed by the
+                               `iter_*` methods are parsed with the standard library.
+            retry_policy (RetryPolicy): policy of retrying the requests failed with a connection
+                                        error, a timeout or a temporary error status, the requests
+                                        are not retried by default
+            rate_limiter (RateLimiter): client-side limit of the rate of the requests to the
+                                        suppliers, unlimited by default
+            circuit_breaker (CircuitBreaker): circuit breakers of the supplier endpoints failing
+                                              fast when an endpoint keeps failing, disabled
+                                              by default
+            hedging (HedgingPolicy): policy of sending a duplicate `availability_check` request
+                                     when the response is late, disabled by default
+            timeout (Timeout): number of seconds to wait for the connection and for the data of
+                               the responses, see `timeouts.call_timeout` and `timeouts.deadline`
+                               for the timeouts of single calls
+            supplier_timeouts (dict): timeouts by supplier ID, their missing values are taken
+                                      from `timeout`
+            metrics_hook (MetricsHook): receiver of the timings of the requests and of parsing
+                                        the responses, see `octo_client.instrumentation`
         """
-        self.url = url.rstrip("/")
-        self.token = token
-        self.logger = custom_logger or logger
-        self.supplier_url_map: Dict[str, str] = {}
-        self.requests_loglevel = requests_loglevel
-        self.log_responses = False
-        self.log_requests = False
-        self.log_size_limit = log_size_limit
-        self.language = language
-        self.strict = strict
+        super().__init__(
+            url,
+            token,
+            custom_logger=custom_logger,
+            log_size_limit=log_size_limit,
+            requests_loglevel=requests_loglevel,
+            language=language,
+            strict=strict,
+            calendar_chunk_days=calendar_chunk_days,
+            calendar_max_workers=calendar_max_workers,
+            cache=cache,
+            supplier_map_ttl=supplier_map_ttl,
+            unknown_supplier_ttl=unknown_supplier_ttl,
+            lazy_bookings=lazy_bookings,
+            codec=codec,
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            hedging=hedging,
+            timeout=timeout,
+            supplier_timeouts=supplier_timeouts,
+            metrics_hook=metrics_hook,
+        )
+        self.pool_size = pool_size
+        self.pool_connections_per_host = pool_connections_per_host
+        self.pool_idle_timeout = pool_idle_timeout
+        self._sessions: "OrderedDict[str, Tuple[requests.Session, float]]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._suppliers_flight = SingleFlight()
+        self._suppliers_refresh: Optional[threading.Thread] = None
+        self._hedging_executor: Optional[ThreadPoolExecutor] = None
+        self._hedged_request_executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "OctoClient":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes all pooled sessions together with their keep-alive connections.
+        """
+        with self._sessions_lock:
+            sessions = [session for session, _ in self._sessions.values()]
+            self._sessions.clear()
+            executors = [self._hedging_executor, self._hedged_request_executor]
+            self._hedging_executor = self._hedged_request_executor = None
+        for session in sessions:
+            session.close()
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # the client is stateless, cookies set by a supplier must not leak into other requests
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_maxsize=self.pool_connections_per_host)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get_session(self, base_url: str) -> requests.Session:
+        """Returns the pooled session used for requests to the given base URL.
+
+        Sessions idle for longer than `pool_idle_timeout` are closed and replaced, and the least
+        recently used session is closed when the pool grows above `pool_size`.
+        """
+        now = time.monotonic()
+        expired: List[requests.Session] = []
+        with self._sessions_lock:
+            if self.pool_idle_timeout is not None:
+                for url, (idle_session, last_used) in list(self._sessions.items()):
+                    if now - last_used > self.pool_idle_timeout:
+                        expired.append(idle_session)
+                        del self._sessions[url]
+            if base_url in self._sessions:
+                session, _ = self._sessions.pop(base_url)
+            else:
+                session = self._create_session()
+            self._sessions[base_url] = (session, now)
+            while len(self._sessions) > max(self.pool_size, 1):
+                _, (evicted_session, _) = self._sessions.popitem(last=False)
+                expired.append(evicted_session)
+        for expired_session in expired:
+            expired_session.close()
+        return session
+
+    def _cached_call(
+        self, cache_key: Optional[CacheKey], load: Callable[[], Any], decode: Callable[[Any], T]
+    ) -> T:
+        """
+        Returns the models of the cached response for the key, or loads the raw response and
+        decodes it. Concurrent calls for the same key are coalesced into a single request.
+        The in-memory cache keeps the decoded models, the other caches keep the raw response which
+        is decoded on every hit, see `ResponseCache`.
+        """
+        if cache_key is None:
+            return decode(load())
+        caches_objects = self._caches_objects()
+        load_value = (lambda: decode(load())) if caches_objects else load
+        value = self._get_cached(cache_key)
+        if value is None:
+            value = self._single_flight.do(
+                cache_key, lambda: self._load_cached(cache_key, load_value)
+            )
+        return self._cached_models(value) if caches_objects else decode(value)
+
+    def _load_cached(self, cache_key: Optional[CacheKey], load: Callable[[], Any]) -> Any:
+        value = self._get_cached(cache_key)
+        if value is None:
+            value = load()
+            self._set_cached(cache_key, value)
+        return value
+
+    def _hedged_call(self, supplier_id: str, load: Callable[[], Any]) -> Any:
+        """
+        Returns the result of `load`, calling it again in parallel when it takes longer than
+        the hedging delay, see `HedgingPolicy`. The result of the first successful call is used.
+        """
+        if self.hedging is None:
+            return load()
+        hedging: HedgingPolicy = self.hedging
+        hedging.record_request()
+
+        def timed_load() -> Any:
+            started_at = time.monotonic()
+            result = load()
+            hedging.record_latency(supplier_id, time.monotonic() - started_at)
+            return result
+
+        timed_load = with_context(timed_load)
+        request_executor, hedging_executor = self._get_hedging_executors(hedging)
+        calls = [request_executor.submit(timed_load)]
+        done, _ = wait(calls, timeout=hedging.get_delay(supplier_id))
+        if not done and hedging.acquire_hedge():
+            self.logger.info("Hedging the request to %s", supplier_id)
+            calls.append(hedging_executor.submit(timed_load))
+        return self._first_result(calls)
 
     @staticmethod
-    def _raise_for_status(status_code: int, response_text: str) -> None:
-        CODE_EXCEPTION_MAP = {
-            400: exceptions.InvalidRequest,
-            403: exceptions.Unauthorized,
-            404: exceptions.ApiError,
-            500: exceptions.ApiError,
-        }
-        if status_code in CODE_EXCEPTION_MAP:
-            raise CODE_EXCEPTION_MAP[status_code](response_text)
+    def _first_result(calls: List[Future]) -> Any:
+        """
+        Returns the first successful result of the calls and cancels the others, raises the error
+        of the first call when all of them failed. A call already sent can't be interrupted, its
+        result is discarded.
+        """
+        pending = set(calls)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for call in done:
+                if call.exception() is None:
+                    for other_call in pending:
+                        other_call.cancel()
+                    return call.result()
+        return calls[0].result()
+
+    def _get_hedging_executors(
+        self, hedging: HedgingPolicy
+    ) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """
+        Returns the executors of the hedged requests and of their duplicates. They are separate,
+        so the requests aren't limited by the hedges and a hedge doesn't wait for the requests.
+        """
+        with self._sessions_lock:
+            if self._hedged_request_executor is None:
+                self._hedged_request_executor = ThreadPoolExecutor(
+                    max_workers=hedging.max_request_workers,
+                    thread_name_prefix="octo-client-hedged-request",
+                )
+            if self._hedging_executor is None:
+                self._hedging_executor = ThreadPoolExecutor(
+                    max_workers=hedging.max_workers, thread_name_prefix="octo-client-hedging"
+                )
+            return self._hedged_request_executor, self._hedging_executor
 
     def _build_endpoint_url_for_request(self, supplier_id: str, path: str) -> str:
         """Builds the endpoint's URL for making requests to a given supplier.
@@ -69,27 +1034,53 @@ class OctoClient(object):
             supplier_id: builds the URL for a supplier with this ID.
             path: use this path to build the URL.
 
+        Unknown suppliers are looked up by refreshing the suppliers, concurrent refreshes are
+        coalesced into one and a supplier missing from the refreshed suppliers is not looked up
+        again for `unknown_supplier_ttl` seconds.
+
         Returns: the full URL.
         Raises:
             - `exceptions.InvalidRequest` if the supplier ID is unknown.
 
         """
 
+        return self._join_endpoint_url(self._resolve_supplier_endpoint(supplier_id), path)
+
+    def _resolve_supplier_endpoint(self, supplier_id: str) -> str:
+        """
+        Returns the endpoint of the supplier, refreshing the suppliers when it is unknown.
+        """
         if supplier_id not in self.supplier_url_map:
-            self.get_suppliers()
+            if not self._is_unknown_supplier(supplier_id):
+                self._refresh_suppliers()
+                self._remember_unknown_supplier(supplier_id)
+        elif self._claim_supplier_map_refresh():
+            self._refresh_suppliers_in_background()
 
-        try:
-            endpoint_url = self.supplier_url_map[supplier_id]
-        except KeyError as e:
-            raise exceptions.InvalidRequest("Incorrect supplierId") from e
+        return self._get_supplier_endpoint(supplier_id)
 
-        cleaned_endpoint = endpoint_url.rstrip("/")
+    def _refresh_suppliers(self) -> None:
+        self._suppliers_flight.do("suppliers", self.get_suppliers)
 
-        return cleaned_endpoint if cleaned_endpoint.endswith(path) else f"{cleaned_endpoint}/{path}"
+    def _refresh_suppliers_in_background(self) -> None:
+        """
+        Refreshes the suppliers in a daemon thread, the current map is used in the meantime.
+        """
+
+        def refresh() -> None:
+            try:
+                self._refresh_suppliers()
+            except Exception:
+                self.logger.warning("Failed to refresh the suppliers", exc_info=True)
+
+        self._suppliers_refresh = threading.Thread(
+            target=refresh, name="octo-client-suppliers-refresh", daemon=True
+        )
+        self._suppliers_refresh.start()
 
     def _make_request(
         self,
-        http_method: Callable,
+        http_method: str,
         path: str,
         supplier_id=None,
         json: Optional[Dict] = None,
@@ -102,73 +1093,171 @@ class OctoClient(object):
         if params is None:
             params = {}
 
-        full_url: str = (
-            self._build_endpoint_url_for_request(str(supplier_id), path)
-            if supplier_id
-            else f"{self.url}/{path}"
-        )
-
-        request_log_data: dict = {"json": json, "params": params}
+        if supplier_id:
+            base_url = self._resolve_supplier_endpoint(str(supplier_id))
+            full_url = self._join_endpoint_url(base_url, path)
+        else:
+            full_url = f"{self.url}/{path}"
+            base_url = self.url
 
-        self.logger.log(
-            self.requests_loglevel,
-            "Sending request to %s (%s)",
-            full_url,
-            http_method.__name__.upper(),
-            extra={"request": self._filter_request_log_data(request_log_data)},
-        )
+        self._log_request(full_url, http_method, json, params)
         base_headers = self._get_headers()
         headers = {**base_headers, **headers}
-        response = http_method(
-            full_url,
-            params=params,
-            json=json,
-            headers=headers,
-        )
-        self._raise_for_status(response.status_code, response.text)
-        try:
-            response_json: dict = response.json()
-        except Exception as exc:
-            self.logger.log(
-                self.requests_loglevel,
-                "Received non-JSON response",
-                extra={"response": self._filter_response_log_data(response.text)},
+        with self._request_metrics(http_method, path, supplier_id) as metrics:
+            response = self._send(
+                http_method,
+                path,
+                supplier_id,
+                full_url,
+                base_url,
+                params=params,
+                data=self._encode_body(json),
+                headers=headers,
+                metrics=metrics,
             )
-            raise exceptions.ApiError("Non-JSON response") from exc
-        self.logger.log(
-            self.requests_loglevel,
-            "Got response from %s (%s)",
-            full_url,
-            http_method.__name__.upper(),
-            extra={"response": self._filter_response_log_data(response_json)},
-        )
+            self._raise_for_status(response)
+            try:
+                response_json: dict = self._loads(response.content, metrics)
+            except Exception as exc:
+                self._log_non_json_response(response.text)
+                raise exceptions.ApiError("Non-JSON response") from exc
+        self._log_response(full_url, http_method, response_json)
         return response_json
 
-    def _filter_request_log_data(
-        self, request_content: Union[str, dict, list]
-    ) -> Optional[Union[str, dict, list]]:
-        if self.log_requests:
-            content = hide_sensitive_data(copy.deepcopy(request_content))
-            if self.log_size_limit and len(content) > self.log_size_limit:
-                return "TRUNCATED"
-            return content
-        return None
+    def _send(
+        self,
+        http_method: str,
+        path: str,
+        supplier_id: Optional[str],
+        full_url: str,
+        base_url: str,
+        params: Dict,
+        data: Optional[bytes],
+        headers: Dict,
+        stream: bool = False,
+        metrics: Optional[RequestMetrics] = None,
+    ) -> requests.Response:
+        """
+        Sends the request, retrying it according to the `retry_policy` until the deadline of
+        the call. Every attempt waits for the `rate_limiter` and is refused by an open
+        `circuit_breaker`. The timings of the last attempt are set in `metrics`.
+        """
+        circuit_key = self._circuit_key(supplier_id)
+        retries = 0
+        started_at = time.monotonic()
+        while True:
+            self._before_call(circuit_key)
+            try:
+                if self.rate_limiter is not None and not self.rate_limiter.acquire(
+                    supplier_id, full_url, self._get_max_wait()
+                ):
+                    raise exceptions.DeadlineExceededError(
+                        "Deadline exceeded waiting for the rate limit"
+                    )
+                timeout = self._get_timeout(supplier_id)
+            except BaseException:
+                # the call waiting for a token may hold the trial call of a half-open circuit
+                self._release_call(circuit_key)
+                raise
+            deadline = get_deadline()
+            attempt_started_at = time.monotonic()
+            if metrics is not None:
+                metrics.attempts = retries + 1
+            try:
+                response = self._get_session(base_url).request(
+                    http_method,
+                    full_url,
+                    params=params,
+                    data=data,
+                    headers=headers,
+                    # the timeout applies to each read, the body is read here to check
+                    # the deadline while it's received
+                    stream=stream or deadline is not None,
+                    timeout=(timeout.connect, timeout.read),
+                )
+                if deadline is not None and not stream:
+                    _read_body(response, deadline)
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as exc:
+                # a connection dropped while the body is received failed after it was sent
+                self._record_call(circuit_key, attempt_started_at)
+                delay = self._get_retry_delay(
+                    http_method, path, retries, started_at, sent=not _is_connection_failure(exc)
+                )
+                if delay is None:
+                    raise
+            except exceptions.DeadlineExceededError:
+                # the supplier is too slow to send the response before the deadline
+                self._record_call(circuit_key, attempt_started_at)
+                raise
+            except BaseException:
+                self._release_call(circuit_key)
+                raise
+            else:
+                self._record_call(circuit_key, attempt_started_at, response.status_code)
+                if metrics is not None:
+                    # requests measures the time until the headers are parsed, connecting included
+                    metrics.status_code = response.status_code
+                    metrics.ttfb = response.elapsed.total_seconds()
+                    metrics.download = max(
+                        time.monotonic() - attempt_started_at - metrics.ttfb, 0.0
+                    )
+                delay = self._get_retry_delay(
+                    http_method,
+                    path,
+                    retries,
+                    started_at,
+                    status_code=response.status_code,
+                    retry_after=response.headers.get("Retry-After"),
+                )
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            retries += 1
 
-    def _filter_response_log_data(
-        self, response_content: Union[str, dict, list]
-    ) -> Optional[Union[str, dict, list]]:
-        if self.log_responses:
-            content = hide_sensitive_data(copy.deepcopy(response_content))
-            if self.log_size_limit and len(content) > self.log_size_limit:
-                return "TRUNCATED"
-            return content
-        return None
+    def _stream_request(
+        self,
+        http_method: str,
+        path: str,
+        supplier_id: str,
+        json: Optional[Dict] = None,
+        params=None,
+        headers: Optional[Dict] = None,
+    ) -> Iterator[Any]:
+        """
+        Sends the request when iterated and yields the elements of the JSON array in the response
+        as they are received, the response itself is not logged.
+        """
+        base_url = self._resolve_supplier_endpoint(str(supplier_id))
+        full_url = self._join_endpoint_url(base_url, path)
 
-    def _get_headers(self) -> Dict[str, str]:
-        return {
-            "Authorization": f"Bearer {self.token}",
-            "Accept-Language": self.language,
-        }
+        self._log_request(full_url, http_method, json, params)
+        headers = {**self._get_headers(), **(headers or {})}
+        with self._send(
+            http_method,
+            path,
+            supplier_id,
+            full_url,
+            base_url,
+            params=params or {},
+            data=self._encode_body(json),
+            headers=headers,
+            stream=True,
+        ) as response:
+            if response.status_code >= 400:
+                self._raise_for_status(response)
+            self._log_streamed_response(full_url, http_method)
+            chunks = _check_deadline(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE), get_deadline()
+            )
+            try:
+                yield from iter_json_array(chunks)
+            except ValueError as exc:
+                raise exceptions.ApiError("Non-JSON array response") from exc
 
     def _http_get(
         self,
@@ -178,7 +1267,7 @@ class OctoClient(object):
         headers: Optional[Dict] = None,
     ):
         return self._make_request(
-            requests.get, path, supplier_id=supplier_id, params=params, headers=headers
+            "GET", path, supplier_id=supplier_id, params=params, headers=headers
         )
 
     def _http_post(
@@ -187,7 +1276,7 @@ class OctoClient(object):
         if headers is None:
             headers = {}
         return self._make_request(
-            requests.post,
+            "POST",
             path,
             json=json,
             supplier_id=supplier_id,
@@ -201,7 +1290,7 @@ class OctoClient(object):
         if headers is None:
             headers = {}
         return self._make_request(
-            requests.patch,
+            "PATCH",
             path,
             json=json,
             supplier_id=supplier_id,
@@ -215,7 +1304,7 @@ class OctoClient(object):
         if headers is None:
             headers = {}
         return self._make_request(
-            requests.delete,
+            "DELETE",
             path,
             supplier_id=supplier_id,
             json=json,
@@ -224,44 +1313,86 @@ class OctoClient(object):
         )
 
     def get_supplier(self, supplier_id: str, headers: Optional[Dict] = None) -> models.Supplier:
-        response = self._http_get(
-            f"suppliers/{supplier_id}", supplier_id=supplier_id, headers=headers
+        cache_key = self._cache_key("supplier", supplier_id, f"suppliers/{supplier_id}", headers)
+        return self._cached_call(
+            cache_key,
+            lambda: self._http_get(
+                f"suppliers/{supplier_id}", supplier_id=supplier_id, headers=headers
+            ),
+            self._decoder("suppliers/{id}", supplier_id, self._parse_supplier),
         )
-        try:
-            supplier = models.Supplier.from_dict(response, strict=self.strict)
-        except AttributeError as e:
-            raise exceptions.ApiError(response) from e
-        return supplier
 
     def get_suppliers(self, headers: Optional[Dict] = None) -> List[models.Supplier]:
         response = self._http_get("suppliers", headers=headers)
-        try:
-            suppliers = [
-                models.Supplier.from_dict(supplier, strict=self.strict) for supplier in response
-            ]
-        except AttributeError as e:
-            raise exceptions.ApiError(response) from e
-        self.logger.info("Found %s suppliers", len(suppliers), extra={"suppliers": response})
-        self.supplier_url_map = {supplier.id: supplier.endpoint for supplier in suppliers}
-        return suppliers
+        return self._decode("suppliers", None, self._parse_suppliers, response)
 
     def get_products(
         self, supplier_id: str, headers: Optional[Dict] = None
     ) -> List[models.Product]:
-        response = self._http_get("products", supplier_id=supplier_id, headers=headers)
-        products = [models.Product.from_dict(product, strict=self.strict) for product in response]
-        self.logger.info("Found %s products", len(products), extra={"products": products})
-        return products
+        cache_key = self._cache_key("products", supplier_id, "products", headers)
+        return self._cached_call(
+            cache_key,
+            lambda: self._http_get("products", supplier_id=supplier_id, headers=headers),
+            self._decoder("products", supplier_id, self._parse_products),
+        )
+
+    def iter_products(
+        self, supplier_id: str, headers: Optional[Dict] = None
+    ) -> Iterator[models.Product]:
+        """
+        Yields the products of the supplier while the response is received, see `get_products`.
+        The response is not cached.
+        """
+        for product in self._stream_request("GET", "products", supplier_id, headers=headers):
+            yield models.Product.from_dict(product, strict=self.strict)
+
+    def get_product(
+        self, supplier_id: str, product_id: str, headers: Optional[Dict] = None
+    ) -> models.Product:
+        cache_key = self._cache_key("product", supplier_id, f"products/{product_id}", headers)
+        return self._cached_call(
+            cache_key,
+            lambda: self._http_get(
+                f"products/{product_id}", supplier_id=supplier_id, headers=headers
+            ),
+            self._decoder("products/{id}", supplier_id, self._parse_product),
+        )
+
+    def availability_check(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        units: Optional[List[models.UnitQuantity]] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        local_date: Optional[date] = None,
+        availability_ids: Optional[List[str]] = None,
+        headers: Optional[Dict] = None,
+    ) -> List[models.Availability]:
+        payload = self._availability_payload(
+            product_id,
+            option_id,
+            units=units,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+            local_date=local_date,
+            availability_ids=availability_ids,
+        )
 
-    def get_product(
-        self, supplier_id: str, product_id: str, headers: Optional[Dict] = None
-    ) -> models.Product:
-        response = self._http_get(
-            f"products/{product_id}", supplier_id=supplier_id, headers=headers
+        cache_key = self._cache_key("availability", supplier_id, "availability", headers, payload)
+        return self._cached_call(
+            cache_key,
+            lambda: self._hedged_call(
+                supplier_id,
+                lambda: self._http_post(
+                    "availability", supplier_id=supplier_id, json=payload, headers=headers
+                ),
+            ),
+            self._decoder("availability", supplier_id, self._parse_availability),
         )
-        return models.Product.from_dict(response, strict=self.strict)
 
-    def availability_check(
+    def iter_availability(
         self,
         supplier_id: str,
         product_id: str,
@@ -272,33 +1403,24 @@ class OctoClient(object):
         local_date: Optional[date] = None,
         availability_ids: Optional[List[str]] = None,
         headers: Optional[Dict] = None,
-    ) -> List[models.Availability]:
-        payload: Dict[str, Any] = {
-            "productId": product_id,
-            "optionId": option_id,
-        }
-        if any([local_date_start, local_date_end]) and not all([local_date_start, local_date_end]):
-            raise ValueError("local_date_start and local_date_end needs to be used together")
-        if local_date_start:
-            payload["localDateStart"] = local_date_start.isoformat()
-        if local_date_end:
-            payload["localDateEnd"] = local_date_end.isoformat()
-        if local_date:
-            payload["localDate"] = local_date.isoformat()
-        if availability_ids:
-            payload["availabilityIds"] = availability_ids
-        if units:
-            payload["units"] = [unit.as_dict() for unit in units]
-
-        response = self._http_post(
-            "availability", supplier_id=supplier_id, json=payload, headers=headers
+    ) -> Iterator[models.Availability]:
+        """
+        Yields the availability while the response is received, see `availability_check`.
+        The response is not cached.
+        """
+        payload = self._availability_payload(
+            product_id,
+            option_id,
+            units=units,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+            local_date=local_date,
+            availability_ids=availability_ids,
         )
-        detailed_availability = [
-            models.Availability.from_dict(availability, strict=self.strict)
-            for availability in response
-        ]
-        self.logger.info("Found %s items", len(detailed_availability))
-        return detailed_availability
+        for availability in self._stream_request(
+            "POST", "availability", supplier_id, json=payload, headers=headers
+        ):
+            yield models.Availability.from_dict(availability, strict=self.strict)
 
     def get_calendar(
         self,
@@ -309,6 +1431,7 @@ class OctoClient(object):
         local_date_end: date,
         units: Optional[List[models.UnitQuantity]] = None,
         headers: Optional[Dict] = None,
+        chunk_days: Optional[int] = None,
     ) -> List[models.AvailabilityCalendarItem]:
         """This method retrieve the availability calendar for a range of dates.
 
@@ -322,30 +1445,154 @@ class OctoClient(object):
                 - id
                 - quantity
             headers: optional HTTP headers to send in the request.
+            chunk_days: fetch the calendar in parallel requests of at most this many days,
+                overrides the client's `calendar_chunk_days`.
 
         Returns: a list of availability objects; one object per each day in the range of dates.
         """
 
-        payload: Dict[str, Any] = {
-            "productId": product_id,
-            "optionId": option_id,
-        }
-        if local_date_start:
-            payload["localDateStart"] = local_date_start.isoformat()
-        if local_date_end:
-            payload["localDateEnd"] = local_date_end.isoformat()
-        if units:
-            payload["units"] = [unit.as_dict() for unit in units]
+        payload = self._calendar_payload(
+            product_id, option_id, local_date_start, local_date_end, units=units
+        )
+        cache_key = self._cache_key(
+            "calendar", supplier_id, "availability/calendar", headers, payload
+        )
+        return self._cached_call(
+            cache_key,
+            lambda: self._get_calendar_chunks(
+                supplier_id,
+                product_id,
+                option_id,
+                local_date_start,
+                local_date_end,
+                units,
+                headers,
+                chunk_days or self.calendar_chunk_days,
+            ),
+            self._decoder("availability/calendar", supplier_id, self._parse_calendar),
+        )
 
-        response = self._http_post(
+    def iter_calendar(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]] = None,
+        headers: Optional[Dict] = None,
+    ) -> Iterator[models.AvailabilityCalendarItem]:
+        """
+        Yields the days of the calendar while the response is received, see `get_calendar`.
+        The calendar is fetched in a single request and the response is not cached.
+        """
+        payload = self._calendar_payload(
+            product_id, option_id, local_date_start, local_date_end, units=units
+        )
+        for availability in self._stream_request(
+            "POST", "availability/calendar", supplier_id, json=payload, headers=headers
+        ):
+            yield models.AvailabilityCalendarItem.from_dict(availability, strict=self.strict)
+
+    def _get_calendar_chunks(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]],
+        headers: Optional[Dict],
+        chunk_days: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        chunks = self._calendar_chunks(local_date_start, local_date_end, chunk_days)
+        if len(chunks) == 1:
+            return self._get_calendar_chunk(
+                supplier_id, product_id, option_id, local_date_start, local_date_end, units, headers
+            )
+
+        # resolving the supplier upfront so the chunks don't refresh the suppliers concurrently
+        self._build_endpoint_url_for_request(supplier_id, "availability/calendar")
+        with ThreadPoolExecutor(max_workers=min(self.calendar_max_workers, len(chunks))) as pool:
+            calendars = pool.map(
+                with_context(
+                    lambda chunk: self._get_calendar_chunk(
+                        supplier_id, product_id, option_id, chunk[0], chunk[1], units, headers
+                    )
+                ),
+                chunks,
+            )
+            return self._merge_calendar_chunks(calendars)
+
+    def _get_calendar_chunk(
+        self,
+        supplier_id: str,
+        product_id: str,
+        option_id: str,
+        local_date_start: date,
+        local_date_end: date,
+        units: Optional[List[models.UnitQuantity]],
+        headers: Optional[Dict],
+    ) -> List[Dict[str, Any]]:
+        payload = self._calendar_payload(
+            product_id, option_id, local_date_start, local_date_end, units=units
+        )
+        return self._http_post(
             "availability/calendar", supplier_id=supplier_id, json=payload, headers=headers
         )
-        daily_availability = [
-            models.AvailabilityCalendarItem.from_dict(availability, strict=self.strict)
-            for availability in response
-        ]
-        self.logger.info("Found %s days", len(daily_availability))
-        return daily_availability
+
+    def availability_check_batch(
+        self, queries: Iterable[batch.AvailabilityQuery], max_workers: int = 10
+    ) -> Iterator[batch.BatchResult]:
+        """Checks the availability for many products and options concurrently.
+
+        Args:
+            queries: availability queries, the dates of a query are optional.
+            max_workers: max number of requests in flight at the same time.
+
+        Returns: an iterator of `BatchResult` objects yielded in the order of completion.
+            A failed query does not stop the batch, its exception is stored in the result.
+        """
+        return batch.run_batch(self._availability_check_query, queries, max_workers)
+
+    def _availability_check_query(self, query: batch.AvailabilityQuery) -> List[Any]:
+        return self.availability_check(
+            query.supplier_id,
+            query.product_id,
+            query.option_id,
+            units=query.units,
+            local_date_start=query.local_date_start,
+            local_date_end=query.local_date_end,
+            headers=query.headers,
+        )
+
+    def get_calendar_batch(
+        self, queries: Iterable[batch.AvailabilityQuery], max_workers: int = 10
+    ) -> Iterator[batch.BatchResult]:
+        """Retrieves the availability calendars for many products and options concurrently.
+
+        Args:
+            queries: calendar queries, each of them requires `local_date_start`
+                and `local_date_end`.
+            max_workers: max number of requests in flight at the same time.
+
+        Returns: an iterator of `BatchResult` objects yielded in the order of completion.
+            A failed query does not stop the batch, its exception is stored in the result.
+        """
+        return batch.run_batch(self._get_calendar_query, queries, max_workers)
+
+    def _get_calendar_query(self, query: batch.AvailabilityQuery) -> List[Any]:
+        if not (query.local_date_start and query.local_date_end):
+            raise ValueError("local_date_start and local_date_end are required")
+        return self.get_calendar(
+            query.supplier_id,
+            query.product_id,
+            query.option_id,
+            query.local_date_start,
+            query.local_date_end,
+            units=query.units,
+            headers=query.headers,
+        )
 
     def booking_reservation(
         self,
@@ -359,17 +1606,15 @@ class OctoClient(object):
         notes: Optional[str] = None,
         headers: Optional[Dict] = None,
     ) -> models.Booking:
-        payload: Dict[str, Any] = {
-            "uuid": uuid,
-            "productId": product_id,
-            "optionId": option_id,
-            "availabilityId": availability_id,
-            "unitItems": [unit.as_dict() for unit in unit_items],
-        }
-        if expiration_minutes:
-            payload["expirationMinutes"] = expiration_minutes
-        if notes:
-            payload["notes"] = notes
+        payload = self._reservation_payload(
+            uuid,
+            product_id,
+            option_id,
+            availability_id,
+            unit_items,
+            expiration_minutes=expiration_minutes,
+            notes=notes,
+        )
         response = self._http_post(
             "bookings",
             supplier_id=supplier_id,
@@ -377,7 +1622,7 @@ class OctoClient(object):
             headers=headers,
         )
         self.logger.info("Booking created", extra={"booking": response})
-        return models.Booking.from_dict(response)
+        return self._decode("bookings", supplier_id, self._parse_booking, response)
 
     def list_bookings(
         self,
@@ -389,29 +1634,42 @@ class OctoClient(object):
         local_date_end: Optional[date] = None,
         headers: Optional[Dict] = None,
     ) -> List[models.Booking]:
-        if not any(
-            [reseller_reference, supplier_reference, local_date, local_date_start or local_date_end]
-        ):
-            raise ValueError("One of the query parameters has to be provided.")
-
-        if any([local_date_start, local_date_end]) and not all([local_date_start, local_date_end]):
-            raise ValueError("local_date_start and local_date_end needs to be used together")
-
-        params: Dict[str, str] = {}
-        if reseller_reference:
-            params["resellerReference"] = reseller_reference
-        elif supplier_reference:
-            params["supplierReference"] = supplier_reference
-        elif local_date:
-            params["localDate"] = local_date.isoformat()
-        elif local_date_start and local_date_end:
-            params["localDateStart"] = local_date_start.isoformat()
-            params["localDateEnd"] = local_date_end.isoformat()
-
+        params = self._list_bookings_params(
+            reseller_reference=reseller_reference,
+            supplier_reference=supplier_reference,
+            local_date=local_date,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+        )
         response = self._http_get(
             "bookings", supplier_id=supplier_id, params=params, headers=headers
         )
-        return [models.Booking.from_dict(booking) for booking in response]
+        return self._decode("bookings", supplier_id, self._parse_bookings, response)
+
+    def iter_bookings(
+        self,
+        supplier_id: str,
+        reseller_reference: Optional[str] = None,
+        supplier_reference: Optional[str] = None,
+        local_date: Optional[date] = None,
+        local_date_start: Optional[date] = None,
+        local_date_end: Optional[date] = None,
+        headers: Optional[Dict] = None,
+    ) -> Iterator[models.Booking]:
+        """
+        Yields the bookings while the response is received, see `list_bookings`.
+        """
+        params = self._list_bookings_params(
+            reseller_reference=reseller_reference,
+            supplier_reference=supplier_reference,
+            local_date=local_date,
+            local_date_start=local_date_start,
+            local_date_end=local_date_end,
+        )
+        for booking in self._stream_request(
+            "GET", "bookings", supplier_id, params=params, headers=headers
+        ):
+            yield self.booking_model.from_dict(booking)
 
     def get_booking(
         self,
@@ -420,7 +1678,7 @@ class OctoClient(object):
         headers: Optional[Dict] = None,
     ) -> models.Booking:
         response = self._http_get(f"bookings/{uuid}", supplier_id=supplier_id, headers=headers)
-        return models.Booking.from_dict(response)
+        return self._decode("bookings/{id}", supplier_id, self._parse_booking, response)
 
     def booking_confirmation(
         self,
@@ -440,44 +1698,24 @@ class OctoClient(object):
         unit_items: Optional[List[models.ConfirmationUnitItem]] = None,
         headers: Optional[Dict] = None,
     ) -> models.Booking:
-        payload: Dict[str, Any] = {}
-        if email_receipt:
-            payload["emailReceipt"] = email_receipt
-        if reseller_reference:
-            payload["resellerReference"] = reseller_reference
-        if any(
-            [
-                contact_full_name,
-                contact_first_name,
-                contact_last_name,
-                contact_email_address,
-                contact_phone_number,
-                contact_locales,
-                contact_postal_code,
-                contact_country,
-                contact_notes,
-            ]
-        ):
-            payload["contact"] = models.BookingContact.from_dict(
-                {
-                    "locales": contact_locales or [],
-                    "fullName": contact_full_name,
-                    "firstName": contact_first_name,
-                    "lastName": contact_last_name,
-                    "emailAddress": contact_email_address,
-                    "phoneNumber": contact_phone_number,
-                    "postalCode": contact_postal_code,
-                    "country": contact_country,
-                    "notes": contact_notes,
-                }
-            ).as_dict()
-        if unit_items:
-            payload["unitItems"] = [unit_item.as_dict() for unit_item in unit_items]
-
+        payload = self._confirmation_payload(
+            email_receipt=email_receipt,
+            reseller_reference=reseller_reference,
+            contact_full_name=contact_full_name,
+            contact_first_name=contact_first_name,
+            contact_last_name=contact_last_name,
+            contact_email_address=contact_email_address,
+            contact_phone_number=contact_phone_number,
+            contact_locales=contact_locales,
+            contact_postal_code=contact_postal_code,
+            contact_country=contact_country,
+            contact_notes=contact_notes,
+            unit_items=unit_items,
+        )
         response = self._http_post(
             f"bookings/{uuid}/confirm", supplier_id=supplier_id, json=payload, headers=headers
         )
-        return models.Booking.from_dict(response)
+        return self._decode("bookings/{id}/confirm", supplier_id, self._parse_booking, response)
 
     def extend_reservation(
         self,
@@ -490,7 +1728,7 @@ class OctoClient(object):
         response = self._http_post(
             f"bookings/{uuid}/extend", supplier_id=supplier_id, json=payload, headers=headers
         )
-        return models.Booking.from_dict(response)
+        return self._decode("bookings/{id}/extend", supplier_id, self._parse_booking, response)
 
     def booking_cancellation(
         self,
@@ -500,15 +1738,11 @@ class OctoClient(object):
         force: Optional[bool] = False,
         headers: Optional[Dict] = None,
     ) -> models.Booking:
-        payload: Dict[str, Any] = {}
-        if reason:
-            payload["reason"] = reason
-        if force:
-            payload["force"] = force
+        payload = self._cancellation_payload(reason=reason, force=force)
         response = self._http_delete(
             f"bookings/{uuid}", supplier_id=supplier_id, json=payload, headers=headers
         )
-        return models.Booking.from_dict(response)
+        return self._decode("bookings/{id}", supplier_id, self._parse_booking, response)
 
     def booking_update(
         self,
@@ -532,57 +1766,78 @@ class OctoClient(object):
         unit_items: Optional[List[models.ConfirmationUnitItem]] = None,
         headers: Optional[Dict] = None,
     ):
-        payload: Dict[str, Any] = {}
-        if product_id:
-            payload["productId"] = product_id
-        if option_id:
-            payload["optionId"] = option_id
-        if availability_id:
-            payload["availabilityId"] = availability_id
-        if notes:
-            payload["notes"] = notes
-        if email_receipt:
-            payload["emailReceipt"] = email_receipt
-        if reseller_reference:
-            payload["resellerReference"] = reseller_reference
-
-        if any(
-            [
-                contact_full_name,
-                contact_first_name,
-                contact_last_name,
-                contact_email_address,
-                contact_phone_number,
-                contact_locales,
-                contact_postal_code,
-                contact_country,
-                contact_notes,
-            ]
-        ):
-            payload["contact"] = {}
-            if contact_locales:
-                payload["contact"]["locales"] = contact_locales or []
-            if contact_full_name:
-                payload["contact"]["fullName"] = contact_full_name
-            if contact_first_name:
-                payload["contact"]["firstName"] = contact_first_name
-            if contact_last_name:
-                payload["contact"]["lastName"] = contact_last_name
-            if contact_email_address:
-                payload["contact"]["emailAddress"] = contact_email_address
-            if contact_phone_number:
-                payload["contact"]["phoneNumber"] = contact_phone_number
-            if contact_postal_code:
-                payload["contact"]["postalCode"] = contact_postal_code
-            if contact_country:
-                payload["contact"]["country"] = contact_country
-            if contact_notes:
-                payload["contact"]["notes"] = contact_notes
-
-        if unit_items:
-            payload["unitItems"] = [unit_item.as_dict() for unit_item in unit_items]
-
+        payload = self._update_payload(
+            product_id=product_id,
+            option_id=option_id,
+            availability_id=availability_id,
+            notes=notes,
+            email_receipt=email_receipt,
+            reseller_reference=reseller_reference,
+            contact_full_name=contact_full_name,
+            contact_first_name=contact_first_name,
+            contact_last_name=contact_last_name,
+            contact_email_address=contact_email_address,
+            contact_phone_number=contact_phone_number,
+            contact_locales=contact_locales,
+            contact_postal_code=contact_postal_code,
+            contact_country=contact_country,
+            contact_notes=contact_notes,
+            unit_items=unit_items,
+        )
         response = self._http_patch(
             f"bookings/{uuid}", supplier_id=supplier_id, json=payload, headers=headers
         )
-        return models.Booking.from_dict(response)
+        return self._decode("bookings/{id}", supplier_id, self._parse_booking, response)
+
+
+def _read_body(response: requests.Response, deadline: Deadline) -> None:
+    """
+    Reads the body of a streamed response, checking the deadline after every chunk of
+    `DEADLINE_CHUNK_SIZE` bytes. A body trickling in slower than that can still overrun
+    the deadline by the time taken to receive one chunk.
+    """
+    response.raw = _DeadlineBody(response.raw, deadline)
+    try:
+        response.content
+    except BaseException:
+        response.close()
+        raise
+
+
+class _DeadlineBody(object):
+    """
+    Body of a response (`urllib3.HTTPResponse`) checking the deadline of the call while
+    it is streamed.
+    """
+
+    def __init__(self, raw: Any, deadline: Deadline):
+        self._raw = raw
+        self._deadline = deadline
+
+    def stream(self, amt: Optional[int] = None, decode_content: Optional[bool] = None):
+        for chunk in self._raw.stream(DEADLINE_CHUNK_SIZE, decode_content=decode_content):
+            self._deadline.check()
+            yield chunk
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+
+def _check_deadline(chunks: Iterable[bytes], deadline: Optional[Deadline]) -> Iterator[bytes]:
+    """
+    Yields the chunks of a streamed response, checking the deadline before each one.
+    """
+    for chunk in chunks:
+        if deadline is not None:
+            deadline.check()
+        yield chunk
+
+
+def _is_connection_failure(error: requests.RequestException) -> bool:
+    """
+    Returns True when the request failed before it was sent, while connecting to the supplier.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
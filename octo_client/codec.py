@@ -0,0 +1,84 @@
+"""
+JSON codecs encoding the request bodies and decoding the responses.
+
+`default_codec` picks the fastest installed library: orjson, then ujson, then the standard
+library (`pip install octo-api-client[fast]` installs orjson).
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    import ujson  # type: ignore
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JSONCodec(object):
+    """
+    Base class of the JSON codecs, encoding to compact UTF-8 bytes.
+    """
+
+    name = ""
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Raises `ValueError` for invalid JSON.
+        """
+        raise NotImplementedError
+
+
+class StdlibJSONCodec(JSONCodec):
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson, install it with `pip install orjson`")
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self) -> None:
+        if ujson is None:
+            raise ImportError("UjsonCodec requires ujson, install it with `pip install ujson`")
+
+    def dumps(self, value: Any) -> bytes:
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return ujson.loads(data)
+
+
+def default_codec() -> JSONCodec:
+    """
+    Returns the codec of the fastest installed JSON library.
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return StdlibJSONCodec()
@@ -1,12 +1,12 @@
 from enum import Enum
 
 PRIVATE_DATA_REPLACEMENT = "[Filtered private data]"
+LOG_TRUNCATION_MARKER = "...TRUNCATED"
 PRIVATE_DATA_KEYS = [
     "name",
     "email",
     "phone",
     "mobile",
-    "phone",
     "address",
     "street",
     "city",
@@ -0,0 +1,345 @@
+"""
+Decoders populating the models from the API responses.
+
+A decoder is compiled once per model and per set of conversions, it resolves the type hints,
+the type hooks, the enum casts and the default values of the fields upfront and reproduces
+the behaviour of `tonalite.from_dict`, including its exceptions. Values of a shape the compiled
+decoders don't handle are passed to tonalite.
+"""
+import dataclasses
+import threading
+from collections.abc import Mapping
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    get_type_hints,
+)
+
+from tonalite.config import Config
+from tonalite.core import _build_value, _build_value_for_collection, from_dict
+from tonalite.exceptions import (
+    MissingValueError,
+    TonaliteFieldError,
+    UnexpectedDataError,
+    WrongTypeError,
+)
+from tonalite.types import (
+    extract_generic,
+    extract_origin_collection,
+    is_generic_collection,
+    is_init_var,
+    is_instance,
+    is_optional,
+    is_subclass,
+    is_union,
+)
+
+Converter = Callable[[Any], Any]
+T = TypeVar("T", bound=type)
+
+# compilation of the decoders referencing each other has to be serialised
+_compile_lock = threading.RLock()
+
+
+class Conversions(object):
+    """
+    Conversions of the field values applied when a model is parsed.
+
+    The values of the fields of a type with a hook in `type_hooks` are converted with the hook,
+    and the values of the fields whose type is a subclass of a type in `cast` are passed to
+    the type's constructor, e.g. to parse the enums.
+    """
+
+    def __init__(
+        self, type_hooks: Optional[Dict[Any, Converter]] = None, cast: Iterable[type] = ()
+    ) -> None:
+        self.type_hooks = dict(type_hooks or {})
+        self.cast = list(cast)
+        self._decoders: Dict[Tuple[type, bool], "ModelDecoder"] = {}
+        self._compiling: Dict[Tuple[type, bool], "ModelDecoder"] = {}
+
+    def config(self, strict: bool) -> Config:
+        """
+        Returns the tonalite config with the same conversions.
+        """
+        return Config(strict=strict, type_hooks=self.type_hooks, cast=self.cast)
+
+    def get_decoder(self, data_class: type, strict: bool = False) -> "ModelDecoder":
+        """
+        Returns the decoder of the data class, compiled on the first call.
+        """
+        key = (data_class, strict)
+        decoder = self._decoders.get(key)
+        if decoder is not None:
+            return decoder
+        with _compile_lock:
+            decoder = self._decoders.get(key) or self._compiling.get(key)
+            if decoder is None:
+                decoder = ModelDecoder(data_class, self, strict)
+                # a model referencing itself gets the decoder being compiled
+                self._compiling[key] = decoder
+                try:
+                    decoder.compile()
+                finally:
+                    del self._compiling[key]
+                self._decoders[key] = decoder
+            return decoder
+
+
+class _Field(NamedTuple):
+    name: str
+    key: str
+    type: Any
+    convert: Converter
+    check: Callable[[Any], bool]
+    default: Optional[Callable[[], Any]]
+
+
+class ModelDecoder(object):
+    """
+    Parse function of a data class compiled for the given conversions and strict mode.
+
+    Nested data classes with their own `_conversions` are parsed with their conversions in the
+    non-strict mode, other nested data classes with the conversions of the parent, which is how
+    the models' `from_dict` methods behave when called by tonalite.
+    """
+
+    def __init__(self, data_class: type, conversions: Conversions, strict: bool) -> None:
+        self.data_class = data_class
+        self.conversions = conversions
+        self.strict = strict
+        self.config = conversions.config(strict)
+        self.fields: List[_Field] = []
+        self.keys: FrozenSet[str] = frozenset()
+        self.compiled = False
+
+    def __call__(self, data: Any) -> Any:
+        if not (self.compiled and isinstance(data, dict)):
+            return from_dict(self.data_class, data=data, config=self.config)
+        if self.strict:
+            extra_keys = data.keys() - self.keys
+            if extra_keys:
+                raise UnexpectedDataError(keys=extra_keys)
+        values = {}
+        for name, key, field_type, convert, check, default in self.fields:
+            if key in data:
+                try:
+                    value = convert(data[key])
+                except TonaliteFieldError as error:
+                    error.update_path(name)
+                    raise
+                if not check(value):
+                    raise WrongTypeError(field_path=name, field_type=field_type, value=value)
+            elif default is not None:
+                value = default()
+            else:
+                raise MissingValueError(name)
+            values[name] = value
+        return self.data_class(**values)
+
+    def compile(self) -> None:
+        """
+        Compiles the converters of the fields, data classes with fields excluded from `__init__`
+        are left to tonalite.
+        """
+        type_hints = get_type_hints(self.data_class)
+        data_keys: Dict[str, str] = getattr(self.data_class, "_data_keys", {})
+        lazy_fields: FrozenSet[str] = getattr(self.data_class, "_lazy_fields", frozenset())
+        fields = []
+        for field in dataclasses.fields(self.data_class):
+            field_type = type_hints[field.name]
+            if not field.init or is_init_var(field_type):
+                return
+            decoded_field = _Field(
+                name=field.name,
+                key=data_keys.get(field.name, field.name),
+                type=field_type,
+                convert=self._converter(field_type),
+                check=_checker(field_type),
+                default=_default(field, field_type),
+            )
+            if field.name in lazy_fields:
+                decoded_field = decoded_field._replace(
+                    convert=partial(LazyValue, field=decoded_field), check=_is_lazy_value
+                )
+            fields.append(decoded_field)
+        self.fields = fields
+        self.keys = frozenset(field.key for field in fields)
+        self.compiled = True
+
+    def _converter(self, type_: Any) -> Converter:
+        """
+        Returns the function converting the data of a field of the type, the counterpart of
+        tonalite's `_build_value`.
+        """
+        if is_union(type_) and not (is_optional(type_) and len(extract_generic(type_)) == 2):
+            return self._fallback(type_)
+        if is_generic_collection(type_) and extract_origin_collection(type_) is not list:
+            return self._fallback(type_)
+
+        convert = self._build_converter(type_)
+        if any(is_subclass(type_, cast_type) for cast_type in self.conversions.cast):
+            if is_generic_collection(type_):
+                convert = _chain(convert, extract_origin_collection(type_))
+            else:
+                convert = _chain(convert, type_)
+        return _chain(self.conversions.type_hooks.get(type_), convert)
+
+    def _build_converter(self, type_: Any) -> Optional[Converter]:
+        if is_optional(type_):
+            convert_value = self._converter(extract_generic(type_)[0])
+            return lambda data: None if data is None else convert_value(data)
+        if is_generic_collection(type_):
+            convert_item = self._converter(extract_generic(type_, defaults=(Any,))[0])
+            config = self.config
+
+            def convert_list(data: Any) -> Any:
+                if type(data) is list:
+                    return [convert_item(item) for item in data]
+                return _build_value_for_collection(collection=type_, data=data, config=config)
+
+            return convert_list
+        if dataclasses.is_dataclass(type_):
+            decode = self._nested_decoder(type_)
+            return lambda data: (
+                decode(data) if type(data) is dict or isinstance(data, Mapping) else data
+            )
+        return None
+
+    def _nested_decoder(self, data_class: type) -> Converter:
+        if not hasattr(data_class, "_conversions") and hasattr(data_class, "from_dict"):
+            config = self.config
+            return lambda data: data_class.from_dict(data=data, config=config)  # type: ignore
+        conversions = getattr(data_class, "_conversions", None)
+        if conversions is not None:
+            return conversions.get_decoder(data_class)
+        return self.conversions.get_decoder(data_class, self.strict)
+
+    def _fallback(self, type_: Any) -> Converter:
+        config = self.config
+        return lambda data: _build_value(type_=type_, data=data, config=config)
+
+
+class LazyValue(object):
+    """
+    Data of a lazy field, decoded on the first access of the field.
+    """
+
+    __slots__ = ("data", "field")
+
+    def __init__(self, data: Any, field: _Field) -> None:
+        self.data = data
+        self.field = field
+
+    def decode(self) -> Any:
+        field = self.field
+        try:
+            value = field.convert(self.data)
+        except TonaliteFieldError as error:
+            error.update_path(field.name)
+            raise
+        if not field.check(value):
+            raise WrongTypeError(field_path=field.name, field_type=field.type, value=value)
+        return value
+
+
+class LazyField(object):
+    """
+    Descriptor of a lazy field stored in a slot, the value decoded on the first access replaces
+    the `LazyValue` in the slot.
+    """
+
+    def __init__(self, slot: Any) -> None:
+        self.slot = slot
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        if instance is None:
+            return self
+        value = self.slot.__get__(instance, owner)
+        if type(value) is LazyValue:
+            value = value.decode()
+            self.slot.__set__(instance, value)
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        self.slot.__set__(instance, value)
+
+
+def lazy_fields(*field_names: str) -> Callable[[T], T]:
+    """
+    Class decorator of a subclass of a slotted data class whose decoder keeps the data of
+    the given fields and decodes them on their first access.
+    """
+
+    def decorate(cls: T) -> T:
+        for field_name in field_names:
+            slot = next(
+                vars(base)[field_name] for base in cls.__mro__[1:] if field_name in vars(base)
+            )
+            setattr(cls, field_name, LazyField(slot))
+        cls._lazy_fields = frozenset(field_names)  # type: ignore[attr-defined]
+        return cls
+
+    return decorate
+
+
+def _is_lazy_value(value: Any) -> bool:
+    return type(value) is LazyValue
+
+
+def _chain(first: Optional[Converter], second: Optional[Converter]) -> Converter:
+    if first is None:
+        return second or _identity
+    if second is None:
+        return first
+    return lambda data: second(first(data))  # type: ignore
+
+
+def _identity(data: Any) -> Any:
+    return data
+
+
+def _checker(type_: Any) -> Callable[[Any], bool]:
+    """
+    Returns the type check of a field value, the counterpart of tonalite's `is_instance`.
+    """
+    if type_ is Any:
+        return lambda value: True
+    # the numeric tower of PEP 484
+    if type_ is float:
+        return lambda value: isinstance(value, (int, float))
+    if type_ is complex:
+        return lambda value: isinstance(value, (int, float, complex))
+    if isinstance(type_, type):
+        return lambda value: isinstance(value, type_)
+    if is_optional(type_) and len(extract_generic(type_)) == 2:
+        check_value = _checker(extract_generic(type_)[0])
+        return lambda value: value is None or check_value(value)
+    if is_generic_collection(type_) and extract_origin_collection(type_) is list:
+        check_item = _checker(extract_generic(type_, defaults=(Any,))[0])
+        return lambda value: isinstance(value, list) and all(check_item(item) for item in value)
+    return lambda value: is_instance(value, type_)
+
+
+def _default(field: dataclasses.Field, type_: Any) -> Optional[Callable[[], Any]]:
+    """
+    Returns the factory of the value of a field missing from the data, None for required fields.
+    """
+    if field.default is not dataclasses.MISSING:
+        default = field.default
+        return lambda: default
+    if field.default_factory is not dataclasses.MISSING:  # type: ignore
+        return field.default_factory  # type: ignore
+    if is_optional(type_):
+        return lambda: None
+    return None
+
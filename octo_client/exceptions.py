@@ -16,3 +16,15 @@ class InvalidRequest(Exception):
     """
     Invalid request (e.g. missing required parameters).
     """
+
+
+class CircuitOpenError(ApiError):
+    """
+    The circuit breaker of the supplier endpoint is open, the request was not sent.
+    """
+
+
+class DeadlineExceededError(ApiError):
+    """
+    The deadline of the call passed, the request was not sent or retried.
+    """
@@ -0,0 +1,92 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class HedgingPolicy(object):
+    """
+    Policy of hedging the latency-critical idempotent reads, used by `availability_check`.
+
+    When a request gets no response within the hedging delay, a duplicate request is sent and
+    the first response is used, the other request is cancelled. The delay is the `percentile` of
+    the latencies of the last `window_size` responses of the supplier, or `delay` when set or
+    when there are fewer than `min_samples` latencies. Every request adds `budget` to a budget
+    of at most `max_budget` hedges and every hedge takes one from it, so at most `budget` of
+    the requests are hedged in the long run.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        initial_delay: float = 1.0,
+        window_size: int = 100,
+        min_samples: int = 20,
+        budget: float = 0.1,
+        max_budget: float = 10.0,
+        max_workers: int = 16,
+        max_request_workers: int = 64,
+    ) -> None:
+        """
+        Args:
+            delay (float): fixed number of seconds after which the request is hedged, computed
+                           from the latencies of the supplier by default
+            percentile (float): percentile of the latencies used as the delay
+            min_delay (float): min delay in seconds
+            initial_delay (float): delay in seconds before there are `min_samples` latencies
+            window_size (int): number of the most recent latencies of a supplier
+            min_samples (int): min number of latencies the percentile is computed from
+            budget (float): max ratio of the hedged requests
+            max_budget (float): max number of hedges saved up while the responses are fast
+            max_workers (int): max number of threads of `OctoClient` sending the duplicate
+                               requests
+            max_request_workers (int): max number of threads of `OctoClient` sending the hedged
+                                       requests, further requests wait for a free thread
+        """
+        self.delay = delay
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.budget = budget
+        self.max_budget = max_budget
+        self.max_workers = max_workers
+        self.max_request_workers = max_request_workers
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._balance = 0.0
+        self._lock = threading.Lock()
+
+    def get_delay(self, key: str) -> float:
+        """
+        Returns the number of seconds after which a request to the supplier is hedged.
+        """
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        return max(latencies[int(self.percentile * (len(latencies) - 1))], self.min_delay)
+
+    def record_latency(self, key: str, latency: float) -> None:
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if latencies is None:
+                latencies = self._latencies[key] = deque(maxlen=self.window_size)
+            latencies.append(latency)
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._balance = min(self._balance + self.budget, self.max_budget)
+
+    def acquire_hedge(self) -> bool:
+        """
+        Returns True when the budget allows another hedge, which is taken from the budget.
+        """
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
@@ -0,0 +1,217 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    import prometheus_client  # type: ignore
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+# phases of a request reported in `RequestMetrics`
+REQUEST_PHASES = ("connect", "ttfb", "download", "json_decode")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# IDs in the paths of the requests, replaced to keep the number of the endpoints low
+_ID_SEGMENT = re.compile(r"^(suppliers|products|bookings)/[^/]+")
+
+
+def endpoint_name(path: str) -> str:
+    """
+    Returns the path of the endpoint without IDs, e.g. "bookings/{id}/confirm".
+    """
+    return _ID_SEGMENT.sub(r"\1/{id}", path)
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Timings of a request in seconds, the transport timings are of its last attempt.
+
+    `connect` is the time spent connecting to the supplier, reported by `AsyncOctoClient` for
+    new connections only. `ttfb` is the time from the start of the attempt to receiving
+    the response headers, connecting included. `download` is the time spent receiving the body
+    and `json_decode` decoding it. The transport timings are missing when the transport doesn't
+    report them, e.g. a mocked one.
+    """
+
+    http_method: str
+    endpoint: str
+    supplier_id: Optional[str]
+    # wall clock time at which the request started
+    started_at: float
+    status_code: Optional[int] = None
+    attempts: int = 0
+    duration: Optional[float] = None
+    connect: Optional[float] = None
+    ttfb: Optional[float] = None
+    download: Optional[float] = None
+    json_decode: Optional[float] = None
+    error: Optional[BaseException] = None
+
+    def phases(self) -> Dict[str, float]:
+        """
+        Returns the timings of the phases of the request which were measured.
+        """
+        phases = {}
+        for phase in REQUEST_PHASES:
+            value = getattr(self, phase)
+            if value is not None:
+                phases[phase] = value
+        return phases
+
+
+@dataclass
+class DecodeMetrics:
+    """
+    Time in seconds spent parsing the models of a response.
+    """
+
+    endpoint: str
+    supplier_id: Optional[str]
+    # wall clock time at which the parsing started
+    started_at: float
+    duration: float
+    # number of parsed models
+    items: int
+
+
+class MetricsHook(object):
+    """
+    Receiver of the timings of the client, see the `metrics_hook` argument of the clients.
+
+    The methods are no-ops, override the ones you need. They are called synchronously on the hot
+    path, so they should be fast and must not block. Their exceptions are logged and ignored.
+    """
+
+    def on_request(self, metrics: RequestMetrics) -> None:
+        """
+        Called when a request completed or failed, after decoding its JSON.
+        """
+
+    def on_decode(self, metrics: DecodeMetrics) -> None:
+        """
+        Called when the models of a response were parsed.
+        """
+
+
+class PrometheusHook(MetricsHook):
+    """
+    Hook observing the timings in Prometheus histograms:
+
+    - `octo_client_request_duration_seconds` with the `supplier`, `endpoint`, `method`, `status`
+      and `phase` labels, the phase "total" is the duration of the whole request,
+    - `octo_client_decode_duration_seconds` with the `supplier` and `endpoint` labels.
+
+    The histograms are created with `prometheus_client` unless they are given. Any objects with
+    the `labels(**labels).observe(value)` interface can be used instead.
+    """
+
+    def __init__(
+        self,
+        registry: Any = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        request_histogram: Any = None,
+        decode_histogram: Any = None,
+    ) -> None:
+        """
+        Args:
+            registry (CollectorRegistry): registry of the histograms, the default registry
+                                          of `prometheus_client` by default
+            buckets (Sequence): upper bounds of the buckets of the histograms in seconds
+            request_histogram (Histogram): histogram of the request timings
+            decode_histogram (Histogram): histogram of the decoding timings
+        """
+        if request_histogram is None or decode_histogram is None:
+            if prometheus_client is None:
+                raise ImportError(
+                    "PrometheusHook requires prometheus_client, "
+                    "install it with `pip install prometheus-client`"
+                )
+            kwargs = {} if registry is None else {"registry": registry}
+            if request_histogram is None:
+                request_histogram = prometheus_client.Histogram(
+                    "octo_client_request_duration_seconds",
+                    "Duration of the phases of the requests to the OCTo suppliers",
+                    ["supplier", "endpoint", "method", "status", "phase"],
+                    buckets=buckets,
+                    **kwargs,
+                )
+            if decode_histogram is None:
+                decode_histogram = prometheus_client.Histogram(
+                    "octo_client_decode_duration_seconds",
+                    "Duration of parsing the models of the OCTo responses",
+                    ["supplier", "endpoint"],
+                    buckets=buckets,
+                    **kwargs,
+                )
+        self.request_histogram = request_histogram
+        self.decode_histogram = decode_histogram
+
+    def on_request(self, metrics: RequestMetrics) -> None:
+        labels = {
+            "supplier": metrics.supplier_id or "",
+            "endpoint": metrics.endpoint,
+            "method": metrics.http_method,
+            "status": str(metrics.status_code or "error"),
+        }
+        phases = metrics.phases()
+        if metrics.duration is not None:
+            phases["total"] = metrics.duration
+        for phase, value in phases.items():
+            self.request_histogram.labels(phase=phase, **labels).observe(value)
+
+    def on_decode(self, metrics: DecodeMetrics) -> None:
+        self.decode_histogram.labels(
+            supplier=metrics.supplier_id or "", endpoint=metrics.endpoint
+        ).observe(metrics.duration)
+
+
+class OpenTelemetryHook(MetricsHook):
+    """
+    Hook recording the requests and the parsing of the responses as OpenTelemetry spans,
+    "octo_client.request" and "octo_client.decode". The timings of the phases are set as
+    the "octo.<phase>" attributes of the spans.
+    """
+
+    def __init__(self, tracer: Any) -> None:
+        """
+        Args:
+            tracer (Tracer): OpenTelemetry tracer, e.g. `trace.get_tracer("octo_client")`
+        """
+        self.tracer = tracer
+
+    def on_request(self, metrics: RequestMetrics) -> None:
+        attributes: Dict[str, Any] = {
+            "http.request.method": metrics.http_method,
+            "octo.endpoint": metrics.endpoint,
+            "octo.attempts": metrics.attempts,
+        }
+        if metrics.supplier_id:
+            attributes["octo.supplier_id"] = metrics.supplier_id
+        if metrics.status_code is not None:
+            attributes["http.response.status_code"] = metrics.status_code
+        for phase, value in metrics.phases().items():
+            attributes[f"octo.{phase}"] = value
+        span = self.tracer.start_span(
+            "octo_client.request", start_time=_to_ns(metrics.started_at), attributes=attributes
+        )
+        if metrics.error is not None:
+            span.record_exception(metrics.error)
+        span.end(end_time=_to_ns(metrics.started_at + (metrics.duration or 0.0)))
+
+    def on_decode(self, metrics: DecodeMetrics) -> None:
+        attributes: Dict[str, Any] = {
+            "octo.endpoint": metrics.endpoint,
+            "octo.items": metrics.items,
+        }
+        if metrics.supplier_id:
+            attributes["octo.supplier_id"] = metrics.supplier_id
+        span = self.tracer.start_span(
+            "octo_client.decode", start_time=_to_ns(metrics.started_at), attributes=attributes
+        )
+        span.end(end_time=_to_ns(metrics.started_at + metrics.duration))
+
+
+def _to_ns(timestamp: float) -> int:
+    return int(timestamp * 1e9)
@@ -1,21 +1,94 @@
-from dataclasses import asdict, dataclass, field
+import sys
+from dataclasses import asdict, dataclass, field, fields
 from datetime import date, datetime, time
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, ClassVar, Dict, List, Optional, Type, TypeVar
 
 from tonalite.config import Config
 from tonalite.core import from_dict
 
 from octo_client import const
+from octo_client.decoders import Conversions, lazy_fields
+
+# Responses repeat the same dates and timestamps (e.g. the days of a calendar and the cutoffs
+# of its availabilities), so the parsed values are memoised. The parsed objects are immutable
+# and can be shared.
+ISO_FORMAT_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=ISO_FORMAT_CACHE_SIZE)
+def _parse_date(date_str: str) -> date:
+    return date.fromisoformat(date_str)
+
+
+@lru_cache(maxsize=ISO_FORMAT_CACHE_SIZE)
+def _parse_datetime(datetime_str: str) -> datetime:
+    return datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
+
+
+@lru_cache(maxsize=ISO_FORMAT_CACHE_SIZE)
+def _parse_time(time_str: str) -> time:
+    return time.fromisoformat(time_str)
+
+
+def _intern(value: Any) -> Any:
+    """
+    Interns the strings repeated across many objects, e.g. the IDs of the availabilities.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+T = TypeVar("T")
+
+
+def slotted(cls: Type[T]) -> Type[T]:
+    """
+    Recreates a dataclass with `__slots__` for its fields, so its instances don't carry
+    a `__dict__` (the `slots` argument of `dataclass` requires Python 3.10).
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict["__slots__"] = field_names
+    for field_name in field_names:
+        # the default values are kept by __init__ and would conflict with the slots
+        cls_dict.pop(field_name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)  # type: ignore[misc]
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
 
 
 @dataclass
 class BaseModel:
+    __slots__ = ()
+
+    # Conversions of the field values. A model without its own conversions is parsed with
+    # the conversions of its parent model, or with `DEFAULT_CONVERSIONS` when parsed on its own.
+    _conversions: ClassVar[Optional[Conversions]] = None
+    # keys of the fields in the API data, when they differ from the names of the fields
+    _data_keys: ClassVar[Dict[str, str]] = {}
+
+    @staticmethod
+    def _date_from_iso_format(date_str: str) -> date:
+        if type(date_str) is str:
+            return _parse_date(date_str)
+        return date.fromisoformat(date_str)
+
     @staticmethod
     def _datetime_from_iso_format(datetime_str: Optional[str]) -> Optional[datetime]:
+        if type(datetime_str) is str and datetime_str:
+            return _parse_datetime(datetime_str)
         if datetime_str:
             return datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
         return None
 
+    @staticmethod
+    def _time_from_iso_format(time_str: str) -> time:
+        if type(time_str) is str:
+            return _parse_time(time_str)
+        return time.fromisoformat(time_str)
+
     def as_dict(self) -> dict:
         """
         Dumps dataclass into dictionary.
@@ -26,18 +99,25 @@ class BaseModel:
     def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
         """
         Populating data class from a dictionary with strict type checking.
+
+        Models with their own conversions ignore the `config`, the other models are parsed by
+        tonalite when it's given.
         """
-        if config is None:
-            config = Config(
-                strict=strict,
-                type_hooks={
-                    date: date.fromisoformat,
-                    datetime: cls._datetime_from_iso_format,
-                },
-            )
-        return from_dict(cls, data=data, config=config)
+        if cls._conversions is None and config is not None:
+            return from_dict(cls, data=data, config=config)
+        conversions = DEFAULT_CONVERSIONS if cls._conversions is None else cls._conversions
+        return conversions.get_decoder(cls, strict)(data)
 
 
+DEFAULT_CONVERSIONS = Conversions(
+    type_hooks={
+        date: BaseModel._date_from_iso_format,
+        datetime: BaseModel._datetime_from_iso_format,
+    }
+)
+
+
+@slotted
 @dataclass
 class SupplierContact(BaseModel):
     website: Optional[str] = None
@@ -46,6 +126,7 @@ class SupplierContact(BaseModel):
     address: Optional[str] = None
 
 
+@slotted
 @dataclass
 class Supplier(BaseModel):
     id: str
@@ -54,6 +135,7 @@ class Supplier(BaseModel):
     contact: SupplierContact
 
 
+@slotted
 @dataclass
 class Capability(BaseModel):
     id: str
@@ -61,6 +143,7 @@ class Capability(BaseModel):
     required: bool
 
 
+@slotted
 @dataclass
 class UnitRestrictions(BaseModel):
     minAge: int
@@ -72,6 +155,7 @@ class UnitRestrictions(BaseModel):
     maxQuantity: Optional[int] = None
 
 
+@slotted
 @dataclass
 class Unit(BaseModel):
     id: str
@@ -81,27 +165,20 @@ class Unit(BaseModel):
     requiredContactFields: List[const.RequiredContactField] = field(default_factory=list)
     reference: Optional[str] = None
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                cast=[
-                    const.UnitType,
-                    const.RequiredContactField,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={str: _intern},
+        cast=[const.UnitType, const.RequiredContactField],
+    )
 
 
+@slotted
 @dataclass
 class OptionRestriction(BaseModel):
     minUnits: Optional[int] = None
     maxUnits: Optional[int] = None
 
 
+@slotted
 @dataclass
 class Option(BaseModel):
     id: str
@@ -116,21 +193,13 @@ class Option(BaseModel):
     requiredContactFields: List[const.RequiredContactField] = field(default_factory=list)
     units: List[Unit] = field(default_factory=list)
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                cast=[
-                    const.CancellationCutoffUnit,
-                    const.RequiredContactField,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={str: _intern},
+        cast=[const.CancellationCutoffUnit, const.RequiredContactField],
+    )
 
 
+@slotted
 @dataclass
 class Product(BaseModel):
     id: str
@@ -148,39 +217,30 @@ class Product(BaseModel):
     deliveryMethods: List[const.DeliveryMethod] = field(default_factory=list)
     reference: Optional[str] = None
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                cast=[
-                    const.AvailabilityType,
-                    const.RedemptionMethod,
-                    const.DeliveryFormat,
-                    const.DeliveryMethod,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={str: _intern},
+        cast=[
+            const.AvailabilityType,
+            const.RedemptionMethod,
+            const.DeliveryFormat,
+            const.DeliveryMethod,
+        ],
+    )
 
 
+@slotted
 @dataclass
 class OpeningHours(BaseModel):
     from_: time
     to: time
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        # renaming the keyword
-        data["from_"] = data.pop("from")
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(strict=strict, type_hooks={time: time.fromisoformat}),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={time: BaseModel._time_from_iso_format}
+    )
+    _data_keys: ClassVar[Dict[str, str]] = {"from_": "from"}
 
 
+@slotted
 @dataclass
 class AvailabilityCalendarItem(BaseModel):
     localDate: date
@@ -190,23 +250,13 @@ class AvailabilityCalendarItem(BaseModel):
     capacity: Optional[int] = None
     openingHours: List[OpeningHours] = field(default_factory=list)
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    date: date.fromisoformat,
-                },
-                cast=[
-                    const.AvailabilityStatus,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={date: BaseModel._date_from_iso_format},
+        cast=[const.AvailabilityStatus],
+    )
 
 
+@slotted
 @dataclass
 class Availability(BaseModel):
     id: str
@@ -221,29 +271,20 @@ class Availability(BaseModel):
     capacity: Optional[int] = None
     maxUnits: Optional[int] = None
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    datetime: cls._datetime_from_iso_format,
-                },
-                cast=[
-                    const.AvailabilityStatus,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={str: _intern, datetime: BaseModel._datetime_from_iso_format},
+        cast=[const.AvailabilityStatus],
+    )
 
 
+@slotted
 @dataclass
 class UnitItem(BaseModel):
     unitId: str
     uuid: Optional[str] = None
 
 
+@slotted
 @dataclass
 class BookingContact(BaseModel):
     locales: List[str] = field(default_factory=list)
@@ -257,6 +298,7 @@ class BookingContact(BaseModel):
     notes: Optional[str] = None
 
 
+@slotted
 @dataclass
 class ConfirmationUnitItem(BaseModel):
     unitId: str
@@ -265,54 +307,36 @@ class ConfirmationUnitItem(BaseModel):
     contact: Optional[BookingContact] = None
 
 
+@slotted
 @dataclass
 class UnitQuantity(BaseModel):
     id: str
     quantity: int
 
 
+@slotted
 @dataclass
 class DeliveryOption(BaseModel):
     deliveryFormat: const.DeliveryFormat
     deliveryValue: str
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                cast=[
-                    const.DeliveryFormat,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(cast=[const.DeliveryFormat])
 
 
+@slotted
 @dataclass
 class Ticket(BaseModel):
     redemptionMethod: const.RedemptionMethod
     utcRedeemedAt: Optional[datetime] = None
     deliveryOptions: List[DeliveryOption] = field(default_factory=list)
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    datetime: cls._datetime_from_iso_format,
-                },
-                cast=[
-                    const.RedemptionMethod,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={datetime: BaseModel._datetime_from_iso_format},
+        cast=[const.RedemptionMethod],
+    )
 
 
+@slotted
 @dataclass
 class BookingUnitItem(BaseModel):
     uuid: str
@@ -325,23 +349,13 @@ class BookingUnitItem(BaseModel):
     utcRedeemedAt: Optional[datetime] = None
     ticket: Optional[Ticket] = None
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    datetime: cls._datetime_from_iso_format,
-                },
-                cast=[
-                    const.BookingStatus,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={datetime: BaseModel._datetime_from_iso_format},
+        cast=[const.BookingStatus],
+    )
 
 
+@slotted
 @dataclass
 class CancellationRequest(BaseModel):
     reason: str
@@ -354,29 +368,20 @@ class CancellationRequest(BaseModel):
     utcResolvedAt: Optional[datetime] = None
 
 
+@slotted
 @dataclass
 class Cancellation(BaseModel):
     refund: const.Refund
     reason: Optional[str] = None
     utcCancelledAt = datetime
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    datetime: cls._datetime_from_iso_format,
-                },
-                cast=[
-                    const.Refund,
-                ],
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={datetime: BaseModel._datetime_from_iso_format},
+        cast=[const.Refund],
+    )
 
 
+@slotted
 @dataclass
 class BookingAvailability(BaseModel):
     id: str
@@ -385,20 +390,12 @@ class BookingAvailability(BaseModel):
     allDay: bool
     openingHours: List[OpeningHours] = field(default_factory=list)
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    datetime: cls._datetime_from_iso_format,
-                },
-            ),
-        )
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={datetime: BaseModel._datetime_from_iso_format},
+    )
 
 
+@slotted
 @dataclass
 class Booking(BaseModel):
     id: str
@@ -427,19 +424,25 @@ class Booking(BaseModel):
     deliveryMethods: List[const.DeliveryMethod] = field(default_factory=list)
     unitItems: List[BookingUnitItem] = field(default_factory=list)
 
-    @classmethod
-    def from_dict(cls, data: dict, config: Optional[Config] = None, strict: bool = False):
-        return from_dict(
-            data_class=cls,
-            data=data,
-            config=Config(
-                strict=strict,
-                type_hooks={
-                    datetime: cls._datetime_from_iso_format,
-                },
-                cast=[
-                    const.BookingStatus,
-                    const.DeliveryMethod,
-                ],
-            ),
+    _conversions: ClassVar[Conversions] = Conversions(
+        type_hooks={datetime: BaseModel._datetime_from_iso_format},
+        cast=[const.BookingStatus, const.DeliveryMethod],
+    )
+
+
+@lazy_fields("product", "option", "availability", "voucher", "cancellation", "unitItems")
+class LazyBooking(Booking):
+    """
+    Booking whose product, option, availability, voucher, cancellation and unit items are decoded
+    on the first access. Errors in their data are raised on the first access too.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Booking):
+            return NotImplemented
+        return all(
+            getattr(self, booking_field.name) == getattr(other, booking_field.name)
+            for booking_field in fields(Booking)
         )
@@ -0,0 +1,246 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Limit of `rate` requests per second with bursts of up to `burst` requests.
+    """
+
+    rate: float
+    burst: int = 1
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0:
+            raise ValueError("rate has to be a positive number")
+        if self.burst < 1:
+            raise ValueError("burst has to be at least 1")
+
+
+def reserve_token(
+    tokens: float, updated_at: float, now: float, limit: RateLimit
+) -> Tuple[float, float]:
+    """
+    Takes a token from a bucket holding `tokens` at `updated_at`, the bucket is refilled with
+    `limit.rate` tokens per second up to `limit.burst` tokens. The number of tokens drops below
+    zero when the bucket is empty, so the requests waiting for a token are served in order.
+
+    Returns: the number of tokens left and the number of seconds to wait for the token.
+    """
+    tokens = min(tokens + (now - updated_at) * limit.rate, limit.burst) - 1
+    return tokens, max(-tokens / limit.rate, 0.0)
+
+
+class RateLimitBackend(object):
+    """
+    Storage of the token buckets of `RateLimiter`.
+
+    Implement this interface to share the buckets between processes.
+    """
+
+    # True when `reserve` can block, e.g. waiting for a lock or for I/O, `RateLimiter` then calls
+    # it in an executor from the asyncio clients
+    blocking = True
+
+    def reserve(self, key: str, limit: RateLimit, max_delay: Optional[float] = None) -> float:
+        """
+        Takes a token from the bucket of the key and returns the number of seconds to wait
+        for it. A token for which the wait is longer than `max_delay` seconds is not taken.
+        """
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Backend keeping the buckets in memory of the process, shared by its threads.
+    """
+
+    blocking = False
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, limit: RateLimit, max_delay: Optional[float] = None) -> float:
+        with self._lock:
+            now = self.clock()
+            tokens, updated_at = self._buckets.get(key, (limit.burst, now))
+            tokens, delay = reserve_token(tokens, updated_at, now, limit)
+            if max_delay is None or delay <= max_delay:
+                self._buckets[key] = (tokens, now)
+        return delay
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Backend storing the buckets in a local SQLite file shared by all processes of the host.
+
+    The buckets use the wall clock, as the monotonic clock is not comparable between processes.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            path (str): path of the database file, created when it does not exist
+            clock (Callable): function returning the current time in seconds
+        """
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the current thread, the connections are not shared between
+        threads.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS octo_rate_limit "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def reserve(self, key: str, limit: RateLimit, max_delay: Optional[float] = None) -> float:
+        connection = self._connection()
+        # the write lock is taken upfront, so the bucket is not updated by another process
+        # between the read and the write
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = self.clock()
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM octo_rate_limit WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (limit.burst, now)
+            tokens, delay = reserve_token(tokens, updated_at, now, limit)
+            if max_delay is None or delay <= max_delay:
+                connection.execute(
+                    "INSERT OR REPLACE INTO octo_rate_limit (key, tokens, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return delay
+
+    def close(self) -> None:
+        """
+        Closes the connections of all threads.
+        """
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+class RateLimiter(object):
+    """
+    Client-side limit of the rate of the requests to the suppliers, a token bucket per supplier.
+
+    The limits are looked up by the supplier ID first, then by the host of the endpoint, whose
+    limit is shared by all suppliers on the host, and the `default` limit applies to the other
+    suppliers. Requests over the limit wait for their turn.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        default: Optional[RateLimit] = None,
+        backend: Optional[RateLimitBackend] = None,
+    ) -> None:
+        """
+        Args:
+            limits (dict): limits by supplier ID or by endpoint host
+            default (RateLimit): limit of each supplier without its own limit, unlimited
+                                 by default
+            backend (RateLimitBackend): storage of the buckets, in memory of the process
+                                        by default
+        """
+        self.limits = dict(limits or {})
+        self.default = default
+        self.backend = backend or MemoryRateLimitBackend()
+
+    def get_limit(self, supplier_id: Optional[str], url: str) -> Optional[Tuple[str, RateLimit]]:
+        """
+        Returns the key of the bucket and the limit of the requests to the URL.
+        """
+        if supplier_id is not None and supplier_id in self.limits:
+            return f"supplier:{supplier_id}", self.limits[supplier_id]
+        host = urlsplit(url).hostname or ""
+        if host in self.limits:
+            return f"host:{host}", self.limits[host]
+        if self.default is not None:
+            if supplier_id is not None:
+                return f"supplier:{supplier_id}", self.default
+            return f"host:{host}", self.default
+        return None
+
+    def reserve(
+        self, supplier_id: Optional[str], url: str, max_delay: Optional[float] = None
+    ) -> float:
+        """
+        Takes a token for a request and returns the number of seconds to wait before sending it.
+        A token for which the wait is longer than `max_delay` seconds is not taken.
+        """
+        supplier_limit = self.get_limit(supplier_id, url)
+        if supplier_limit is None:
+            return 0.0
+        key, limit = supplier_limit
+        return self.backend.reserve(key, limit, max_delay)
+
+    def acquire(
+        self, supplier_id: Optional[str], url: str, max_delay: Optional[float] = None
+    ) -> bool:
+        """
+        Blocks until the request can be sent. Returns False right away, without taking a token,
+        when the request would wait longer than `max_delay` seconds.
+        """
+        delay = self.reserve(supplier_id, url, max_delay)
+        if max_delay is not None and delay > max_delay:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def acquire_async(
+        self, supplier_id: Optional[str], url: str, max_delay: Optional[float] = None
+    ) -> bool:
+        """
+        Asyncio counterpart of `acquire`. A blocking backend is called in the default executor
+        of the event loop, so the other coroutines run while it waits for its lock.
+        """
+        supplier_limit = self.get_limit(supplier_id, url)
+        if supplier_limit is None:
+            return True
+        key, limit = supplier_limit
+        if self.backend.blocking:
+            delay = await asyncio.get_running_loop().run_in_executor(
+                None, self.backend.reserve, key, limit, max_delay
+            )
+        else:
+            delay = self.backend.reserve(key, limit, max_delay)
+        if max_delay is not None and delay > max_delay:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
@@ -0,0 +1,135 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Collection, Optional
+
+# statuses of the responses of overloaded or temporarily unavailable suppliers
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# POST endpoints which only read data
+IDEMPOTENT_POST_PATHS = frozenset({"availability", "availability/calendar"})
+
+
+class RetryPolicy(object):
+    """
+    Policy of retrying the requests failed with a connection error, a timeout or one of
+    the `retry_statuses`.
+
+    Idempotent requests, GETs and the availability POSTs, are retried on any of the failures.
+    Other requests, e.g. the booking mutations, are retried only when the supplier did not
+    process them: when the connection failed before the request was sent, or with 429 Too Many
+    Requests.
+
+    The n-th retry waits for a random delay between 0 and `backoff_factor * 2 ** (n - 1)` seconds
+    capped at `max_backoff` ("full jitter"), or for the `Retry-After` of the response. A call is
+    retried at most `max_retries` times and no retry starts after `max_retry_time` seconds
+    from the first attempt.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 10.0,
+        max_retry_time: float = 30.0,
+        retry_statuses: Collection[int] = RETRY_STATUSES,
+        idempotent_methods: Collection[str] = IDEMPOTENT_METHODS,
+        idempotent_post_paths: Collection[str] = IDEMPOTENT_POST_PATHS,
+        respect_retry_after: bool = True,
+        random: Callable[[], float] = random.random,
+    ) -> None:
+        """
+        Args:
+            max_retries (int): max number of retries of a single call
+            backoff_factor (float): upper bound of the delay of the first retry in seconds,
+                                    doubled with every retry
+            max_backoff (float): max delay between two attempts in seconds
+            max_retry_time (float): number of seconds from the first attempt after which
+                                    the call is not retried anymore
+            retry_statuses (Collection): HTTP statuses of the responses which are retried
+            idempotent_methods (Collection): HTTP methods which are safe to retry
+            idempotent_post_paths (Collection): paths of the POST endpoints which are safe to retry
+            respect_retry_after (bool): wait for the `Retry-After` of the response, the call
+                                        is not retried when it is longer than `max_backoff`
+            random (Callable): function returning a random number between 0 and 1
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_retry_time = max_retry_time
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(method.upper() for method in idempotent_methods)
+        self.idempotent_post_paths = frozenset(idempotent_post_paths)
+        self.respect_retry_after = respect_retry_after
+        self.random = random
+
+    def is_idempotent(self, http_method: str, path: str) -> bool:
+        http_method = http_method.upper()
+        return http_method in self.idempotent_methods or (
+            http_method == "POST" and path in self.idempotent_post_paths
+        )
+
+    def get_retry_delay(
+        self,
+        http_method: str,
+        path: str,
+        retries: int,
+        elapsed: float,
+        status_code: Optional[int] = None,
+        retry_after: Optional[str] = None,
+        sent: bool = True,
+    ) -> Optional[float]:
+        """Returns the number of seconds to wait before retrying a failed request.
+
+        Args:
+            http_method: HTTP method of the request.
+            path: path of the endpoint.
+            retries: number of the retries of the call so far.
+            elapsed: number of seconds since the first attempt of the call.
+            status_code: HTTP status of the response, None when the request failed with
+                a connection error or a timeout.
+            retry_after: value of the `Retry-After` header of the response.
+            sent: False when the request failed before it was sent to the supplier.
+
+        Returns: the delay, or None when the request must not be retried.
+        """
+        if retries >= self.max_retries:
+            return None
+        if status_code is not None and status_code not in self.retry_statuses:
+            return None
+        if not (self.is_idempotent(http_method, path) or not sent or status_code == 429):
+            return None
+
+        delay = self.random() * min(self.backoff_factor * 2**retries, self.max_backoff)
+        if retry_after is not None and self.respect_retry_after:
+            retry_after_delay = parse_retry_after(retry_after)
+            if retry_after_delay is not None:
+                if retry_after_delay > self.max_backoff:
+                    return None
+                delay = retry_after_delay
+        if elapsed + delay > self.max_retry_time:
+            return None
+        return delay
+
+
+def parse_retry_after(value: str, now: Optional[float] = None) -> Optional[float]:
+    """
+    Returns the number of seconds of a `Retry-After` header given in seconds or as an HTTP date,
+    None when the value is invalid.
+    """
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    current_time = datetime.fromtimestamp(time.time() if now is None else now, tz=timezone.utc)
+    return max((retry_at - current_time).total_seconds(), 0.0)
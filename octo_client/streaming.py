@@ -0,0 +1,125 @@
+"""
+Incremental parsing of the JSON arrays returned by the list endpoints.
+
+The elements of the array are decoded one at a time as the chunks of the response body arrive,
+so only the element being received is buffered instead of the whole body. The elements are
+decoded with the standard library, which finds where they end, not with the codec of the client.
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+# number of bytes read from the response body at once
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# characters which may continue a number, e.g. "1" followed by ".5" or "e3"
+_NUMBER_TAIL = re.compile(r"[0-9eE.+-]*")
+
+_VALUE = "value"
+_VALUE_OR_END = "value or end"
+_SEPARATOR = "separator"
+_END = "end"
+
+
+class JSONArrayParser(object):
+    """
+    Push parser of a JSON array, `feed` returns the elements completed by a chunk of the body.
+
+    Raises `ValueError` for a body that isn't a valid JSON array.
+    """
+
+    def __init__(self) -> None:
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._expected = _VALUE_OR_END
+        # size of the buffer needed before decoding an incomplete element again, growing
+        # geometrically so large elements received in many chunks are decoded in linear time
+        self._retry_size = 0
+
+    def feed(self, data: bytes) -> List[Any]:
+        self._buffer += self._text_decoder.decode(data)
+        if len(self._buffer) < self._retry_size:
+            return []
+        return self._parse(final=False)
+
+    def close(self) -> List[Any]:
+        """
+        Returns the remaining elements, raises `ValueError` when the array is incomplete.
+        """
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        elements = self._parse(final=True)
+        if self._expected != _END:
+            raise ValueError("Incomplete JSON array")
+        return elements
+
+    def _parse(self, final: bool) -> List[Any]:
+        buffer = self._buffer
+        position = 0
+        elements = []
+        self._retry_size = 0
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()  # type: ignore[union-attr]
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._started = True
+                position += 1
+            elif self._expected == _END:
+                raise ValueError("Extra data after the JSON array")
+            elif self._expected == _SEPARATOR or (self._expected == _VALUE_OR_END and char == "]"):
+                if char == "]":
+                    self._expected = _END
+                elif char == "," and self._expected == _SEPARATOR:
+                    self._expected = _VALUE
+                else:
+                    raise ValueError("Expected ',' or ']' after an element of the JSON array")
+                position += 1
+            else:
+                try:
+                    element, end = self._json_decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    self._retry_size = 2 * (len(buffer) - position)
+                    break
+                if (
+                    not final
+                    and type(element) in (int, float)
+                    and _NUMBER_TAIL.match(buffer, end).end() == len(buffer)  # type: ignore
+                ):
+                    # the number may continue in the next chunk
+                    break
+                elements.append(element)
+                self._expected = _SEPARATOR
+                position = end
+        self._buffer = buffer[position:]
+        return elements
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Yields the elements of the JSON array received in the chunks.
+    """
+    parser = JSONArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Asyncio counterpart of `iter_json_array`.
+    """
+    parser = JSONArrayParser()
+    async for chunk in chunks:
+        for element in parser.feed(chunk):
+            yield element
+    for element in parser.close():
+        yield element
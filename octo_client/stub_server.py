@@ -0,0 +1,576 @@
+"""
+Local OCTo-compatible stub server for load testing the clients without real suppliers.
+
+The server answers `/suppliers`, `/products`, `/availability`, `/availability/calendar` and
+`/bookings*` with generated data or with JSON files, and simulates slow and failing suppliers with
+a `Profile` per endpoint: latency, errors, 429 responses over a rate limit and slowly streamed
+bodies. Run it in-process:
+
+    with StubServer(profile=Profile(latency=Latency(0.05, sigma=0.5), error_rate=0.01)) as server:
+        client = OctoClient(server.url, "token")
+
+or as a subprocess, see `python -m octo_client.stub_server --help`.
+"""
+import argparse
+import copy
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from octo_client.instrumentation import endpoint_name
+from octo_client.rate_limit import RateLimit, reserve_token
+
+SUPPLIER_ID = "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"
+
+Route = Tuple[str, str]
+
+# files of the responses loaded from a `--fixtures` directory by default, named like the test
+# responses of the client, the first existing file of a route is used
+FIXTURE_FILES: Dict[Route, Tuple[str, ...]] = {
+    ("GET", "suppliers"): ("suppliers.json",),
+    ("GET", "products"): ("products.json",),
+    ("GET", "products/{id}"): ("product.json",),
+    ("POST", "availability"): (
+        "availability_start_times.json",
+        "availability_opening_hours.json",
+        "availability.json",
+    ),
+    ("POST", "availability/calendar"): (
+        "calendar_start_times.json",
+        "calendar_opening_hours.json",
+        "calendar.json",
+    ),
+    ("GET", "bookings"): ("bookings.json",),
+    ("POST", "bookings"): ("reservation.json",),
+}
+
+_BOOKING_PATH = re.compile(r"^bookings/([^/]+)(?:/(confirm|extend))?$")
+
+
+class Latency(NamedTuple):
+    """
+    Distribution of the time to the first byte of the responses: log-normal with the `median`
+    in seconds and the `sigma` of its logarithm, a fixed latency when `sigma` is 0. Samples are
+    capped at `max` seconds.
+    """
+
+    median: float = 0.0
+    sigma: float = 0.0
+    max: float = 60.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return min(self.median, self.max)
+        return min(rng.lognormvariate(math.log(self.median), self.sigma), self.max)
+
+
+class Profile(NamedTuple):
+    """
+    Behaviour of the server for an endpoint.
+
+    `error_rate` of the responses fail with `error_status`. With a `rate_limit`, requests over
+    the limit get 429 Too Many Requests with a `Retry-After` header. With `body_chunk_size`,
+    the body is sent in chunks of that many bytes, `body_chunk_delay` seconds apart.
+    """
+
+    latency: Latency = Latency()
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_limit: Optional[RateLimit] = None
+    body_chunk_size: int = 0
+    body_chunk_delay: float = 0.0
+
+
+def generate_responses(
+    products: int = 10,
+    options: int = 3,
+    units: int = 3,
+    days: int = 30,
+    slots_per_day: int = 8,
+    bookings: int = 20,
+    start: Optional[date] = None,
+) -> Dict[Route, Any]:
+    """
+    Returns generated responses of the endpoints by their method and path.
+    """
+    start = start or date.today()
+    product_list = [_product(index, options, units) for index in range(products)]
+    availability = []
+    for day in range(days):
+        for slot in range(slots_per_day):
+            starts_at = datetime.combine(start + timedelta(days=day), datetime.min.time())
+            starts_at += timedelta(hours=9 + slot)
+            availability.append(_availability(starts_at))
+    calendar = [
+        {
+            "localDate": (start + timedelta(days=day)).isoformat(),
+            "available": True,
+            "status": "AVAILABLE",
+            "vacancies": 10,
+            "capacity": 20,
+            "openingHours": [{"from": "09:00", "to": "17:00"}],
+        }
+        for day in range(days)
+    ]
+    booking_list = [
+        _booking(f"00000000-0000-4000-8000-{index:012d}", product_list[0], availability[0])
+        for index in range(bookings)
+    ]
+    return {
+        ("GET", "products"): product_list,
+        ("GET", "products/{id}"): product_list[0],
+        ("POST", "availability"): availability,
+        ("POST", "availability/calendar"): calendar,
+        ("GET", "bookings"): booking_list,
+        ("POST", "bookings"): _booking(
+            "00000000-0000-4000-8000-000000000000", product_list[0], availability[0]
+        ),
+    }
+
+
+def _product(index: int, options: int, units: int) -> Dict[str, Any]:
+    unit_list = [
+        {
+            "id": f"unit-{unit}",
+            "internalName": f"Unit {unit}",
+            "reference": f"unit-{unit}",
+            "type": "ADULT",
+            "requiredContactFields": [],
+            "restrictions": {
+                "minAge": 18,
+                "maxAge": 100,
+                "idRequired": False,
+                "minQuantity": None,
+                "maxQuantity": None,
+                "paxCount": 1,
+                "accompaniedBy": [],
+            },
+        }
+        for unit in range(units)
+    ]
+    return {
+        "id": f"product-{index}",
+        "internalName": f"Product {index}",
+        "reference": f"P{index}",
+        "locale": "en",
+        "timeZone": "Europe/Amsterdam",
+        "allowFreesale": False,
+        "instantConfirmation": True,
+        "instantDelivery": True,
+        "availabilityRequired": True,
+        "availabilityType": "START_TIME",
+        "deliveryFormats": ["QRCODE"],
+        "deliveryMethods": ["VOUCHER"],
+        "redemptionMethod": "DIGITAL",
+        "options": [
+            {
+                "id": "DEFAULT" if option == 0 else f"option-{option}",
+                "default": option == 0,
+                "internalName": f"Option {option}",
+                "reference": None,
+                "availabilityLocalStartTimes": ["09:00", "12:00", "15:00"],
+                "cancellationCutoff": "1 hour",
+                "cancellationCutoffAmount": 1,
+                "cancellationCutoffUnit": "hour",
+                "requiredContactFields": [],
+                "restrictions": {"minUnits": None, "maxUnits": 10},
+                "units": copy.deepcopy(unit_list),
+            }
+            for option in range(options)
+        ],
+    }
+
+
+def _availability(starts_at: datetime) -> Dict[str, Any]:
+    start_str = f"{starts_at.isoformat()}+01:00"
+    return {
+        "id": start_str,
+        "localDateTimeStart": start_str,
+        "localDateTimeEnd": f"{(starts_at + timedelta(hours=1)).isoformat()}+01:00",
+        "allDay": False,
+        "available": True,
+        "status": "AVAILABLE",
+        "vacancies": 10,
+        "capacity": 20,
+        "maxUnits": None,
+        "utcCutoffAt": f"{(starts_at - timedelta(hours=2)).isoformat()}Z",
+        "openingHours": [],
+    }
+
+
+def _booking(uuid: str, product: Dict[str, Any], availability: Dict[str, Any]) -> Dict[str, Any]:
+    option = product["options"][0]
+    contact: Dict[str, Any] = {
+        "fullName": None,
+        "firstName": None,
+        "lastName": None,
+        "emailAddress": None,
+        "phoneNumber": None,
+        "locales": [],
+        "country": None,
+        "notes": None,
+    }
+    return {
+        "id": uuid,
+        "uuid": uuid,
+        "testMode": True,
+        "resellerReference": None,
+        "supplierReference": uuid[-6:].upper(),
+        "status": "CONFIRMED",
+        "utcCreatedAt": "2022-05-25T10:34:22Z",
+        "utcUpdatedAt": "2022-05-25T10:34:22Z",
+        "utcExpiresAt": None,
+        "utcRedeemedAt": None,
+        "utcConfirmedAt": "2022-05-25T10:34:22Z",
+        "productId": product["id"],
+        "product": product,
+        "optionId": option["id"],
+        "option": option,
+        "cancellable": True,
+        "cancellation": None,
+        "freesale": False,
+        "availabilityId": availability["id"],
+        "availability": {
+            "id": availability["id"],
+            "localDateTimeStart": availability["localDateTimeStart"],
+            "localDateTimeEnd": availability["localDateTimeEnd"],
+            "allDay": False,
+            "openingHours": [],
+        },
+        "contact": contact,
+        "notes": None,
+        "deliveryMethods": ["VOUCHER"],
+        "voucher": {"redemptionMethod": "DIGITAL", "utcRedeemedAt": None, "deliveryOptions": []},
+        "unitItems": [
+            {
+                "uuid": f"{uuid[:-3]}{item:03d}",
+                "resellerReference": None,
+                "supplierReference": None,
+                "unit": option["units"][0],
+                "unitId": option["units"][0]["id"],
+                "status": "CONFIRMED",
+                "utcRedeemedAt": None,
+                "contact": contact,
+                "ticket": None,
+            }
+            for item in range(2)
+        ],
+    }
+
+
+def load_fixtures(path: str, files: Optional[Dict[Route, str]] = None) -> Dict[Route, Any]:
+    """
+    Returns the responses stored in the JSON files of the directory.
+
+    Args:
+        path (str): directory of the files
+        files (dict): names of the files by method and path, e.g. ("POST", "availability"),
+                      relative to `path`. By default the files of `FIXTURE_FILES` found in the
+                      directory are loaded.
+
+    Raises:
+        FileNotFoundError: a file of `files` is missing, or no file of `FIXTURE_FILES` is found
+    """
+    directory = Path(path)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"Fixtures directory {directory} not found")
+    if files is None:
+        files = {}
+        for route, names in FIXTURE_FILES.items():
+            for name in names:
+                if (directory / name).exists():
+                    files[route] = name
+                    break
+        if not files:
+            expected = ", ".join(name for names in FIXTURE_FILES.values() for name in names)
+            raise FileNotFoundError(f"No fixtures found in {directory}, expected any of {expected}")
+    responses = {}
+    for route, name in files.items():
+        fixture = directory / name
+        if not fixture.exists():
+            raise FileNotFoundError(f"Fixture {fixture} of {route[0]} /{route[1]} not found")
+        responses[route] = json.loads(fixture.read_text())
+    return responses
+
+
+def _fixture_file(value: str) -> Tuple[Route, str]:
+    """
+    Parses a `--fixture` option, "METHOD path=file".
+    """
+    route, _, name = value.partition("=")
+    method, _, path = route.strip().partition(" ")
+    if not name or not path:
+        raise argparse.ArgumentTypeError(f"expected 'METHOD path=file', got {value!r}")
+    return (method.upper(), path.strip().strip("/")), name.strip()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # the headers and the body are written separately, Nagle's algorithm would delay the body
+    disable_nagle_algorithm = True
+    server: "StubServer"
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_PATCH(self) -> None:
+        self._handle("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+    def _handle(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = urlsplit(self.path).path.strip("/")
+        status, headers, content, profile = self.server.respond(method, path, body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if profile.body_chunk_size <= 0:
+            self.wfile.write(content)
+            return
+        for offset in range(0, len(content), profile.body_chunk_size):
+            if offset:
+                time.sleep(profile.body_chunk_delay)
+            self.wfile.write(content[offset : offset + profile.body_chunk_size])
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Stub OCTo server running in a daemon thread, started on creation and stopped with `close()`.
+
+    The suppliers endpoint lists `supplier_ids` with the URL of the server as their endpoint,
+    the endpoints in `responses` are replaced with it too. The other endpoints answer with
+    `responses` looked up by the method and the path, then by the path without IDs,
+    e.g. ("GET", "products/{id}"), encoded once on creation. The bookings endpoints echo the UUID
+    of the booking with the status changed by the call.
+
+    The number of the responses by method, path without IDs and status is counted in `stats`.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        responses: Optional[Dict[Route, Any]] = None,
+        profile: Optional[Profile] = None,
+        profiles: Optional[Dict[str, Profile]] = None,
+        supplier_ids: Sequence[str] = (SUPPLIER_ID,),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            responses (dict): JSON responses by method and path, generated by default,
+                              see `generate_responses`
+            profile (Profile): behaviour of the endpoints without their own profile,
+                               fast and reliable by default
+            profiles (dict): behaviour of the endpoints by their path without IDs,
+                             e.g. "bookings/{id}/confirm"
+            supplier_ids (Sequence): IDs of the suppliers
+            host (str): address the server listens on
+            port (int): port the server listens on, a free port by default
+            seed (int): seed of the random latencies and errors
+        """
+        super().__init__((host, port), _Handler)
+        self.url = f"http://{host}:{self.server_address[1]}"
+        self.responses = dict(generate_responses() if responses is None else responses)
+        # the fixed responses are encoded once, so the server keeps up with many clients
+        self._encoded = {route: json.dumps(data).encode() for route, data in self.responses.items()}
+        self.profile = profile or Profile()
+        self.profiles = dict(profiles or {})
+        self.supplier_ids = list(supplier_ids)
+        self.stats: "Counter[Tuple[str, str, int]]" = Counter()
+        self._random = random.Random(seed)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="octo-stub-server", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "StubServer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def respond(
+        self, method: str, path: str, body: bytes
+    ) -> Tuple[int, Dict[str, str], bytes, Profile]:
+        """
+        Returns the status, the extra headers and the body of the response to a request, after
+        waiting for its latency, and the profile of the endpoint.
+        """
+        endpoint = endpoint_name(path)
+        profile = self.profiles.get(endpoint, self.profile)
+        with self._lock:
+            latency = profile.latency.sample(self._random)
+            failed = self._random.random() < profile.error_rate
+            retry_after = self._take_token(endpoint, profile)
+        if latency:
+            time.sleep(latency)
+        headers: Dict[str, str] = {}
+        if retry_after is not None:
+            status, content = 429, _error("TOO_MANY_REQUESTS", "Rate limit exceeded")
+            headers["Retry-After"] = str(retry_after)
+        elif failed:
+            status, content = profile.error_status, _error("INTERNAL_SERVER_ERROR", "Failure")
+        else:
+            status, content = self._route(method, path, endpoint, body)
+        with self._lock:
+            self.stats[method, endpoint, status] += 1
+        return status, headers, content, profile
+
+    def _take_token(self, endpoint: str, profile: Profile) -> Optional[int]:
+        """
+        Takes a token from the bucket of the profile, returns the seconds to retry after when
+        the bucket is empty.
+        """
+        if profile.rate_limit is None:
+            return None
+        key = endpoint if endpoint in self.profiles else "*"
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (profile.rate_limit.burst, now))
+        tokens, delay = reserve_token(tokens, updated_at, now, profile.rate_limit)
+        if delay > 0:
+            # the refused request doesn't take the token
+            return max(math.ceil(delay), 1)
+        self._buckets[key] = (tokens, now)
+        return None
+
+    def _route(self, method: str, path: str, endpoint: str, body: bytes) -> Tuple[int, bytes]:
+        if method == "GET" and path == "suppliers":
+            return 200, json.dumps(self._suppliers()).encode()
+        if method == "GET" and endpoint == "suppliers/{id}":
+            for supplier in self._suppliers():
+                if path == f"suppliers/{supplier['id']}":
+                    return 200, json.dumps(supplier).encode()
+            return 404, _error("NOT_FOUND", "Unknown supplier")
+        if not (method == "POST" and path == "bookings"):
+            for route in ((method, path), (method, endpoint)):
+                if route in self._encoded:
+                    return 200, self._encoded[route]
+        match = _BOOKING_PATH.match(path)
+        if path == "bookings" and method == "POST" or match:
+            return 200, json.dumps(self._booking(method, match, body)).encode()
+        return 404, _error("NOT_FOUND", f"Unknown endpoint {method} /{path}")
+
+    def _suppliers(self) -> List[Dict[str, Any]]:
+        suppliers = self.responses.get(("GET", "suppliers"))
+        if suppliers is None:
+            suppliers = [
+                {
+                    "id": supplier_id,
+                    "name": f"Supplier {supplier_id}",
+                    "endpoint": self.url,
+                    "contact": {"website": None, "email": None, "telephone": None, "address": None},
+                }
+                for supplier_id in self.supplier_ids
+            ]
+        return [{**supplier, "endpoint": self.url} for supplier in suppliers]
+
+    def _booking(self, method: str, match: Optional["re.Match[str]"], body: bytes) -> Any:
+        booking = self.responses.get(("POST", "bookings"))
+        if booking is None:
+            booking = _booking(
+                "00000000-0000-4000-8000-000000000000",
+                _product(0, 1, 1),
+                _availability(datetime(2030, 1, 1, 9)),
+            )
+        booking = dict(booking)
+        request = json.loads(body) if body else {}
+        if match is None:
+            booking.update(uuid=request.get("uuid", booking["uuid"]), status="ON_HOLD")
+            return booking
+        booking["uuid"] = match.group(1)
+        action = match.group(2)
+        if method == "DELETE":
+            booking["status"] = "CANCELLED"
+        elif action == "confirm":
+            booking["status"] = "CONFIRMED"
+        elif action == "extend":
+            booking["status"] = "ON_HOLD"
+        return booking
+
+
+def _error(error: str, message: str) -> bytes:
+    return json.dumps({"error": error, "errorMessage": message}).encode()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m octo_client.stub_server", description="Runs a stub OCTo server."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fixtures", help="directory with the JSON responses")
+    parser.add_argument(
+        "--fixture",
+        action="append",
+        type=_fixture_file,
+        help="file of a response in the --fixtures directory, e.g. 'POST availability=slots.json'",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the random latencies and errors")
+    parser.add_argument("--latency", type=float, default=0.0, help="median latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="sigma of log(latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="ratio of failed responses")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit", type=float, help="max number of requests per second")
+    parser.add_argument("--burst", type=int, default=1, help="burst of the rate limit")
+    parser.add_argument("--body-chunk-size", type=int, default=0, help="bytes per body chunk")
+    parser.add_argument("--body-chunk-delay", type=float, default=0.0, help="seconds per chunk")
+    args = parser.parse_args(argv)
+
+    responses = generate_responses()
+    if args.fixture and not args.fixtures:
+        parser.error("--fixture requires --fixtures")
+    if args.fixtures:
+        files = dict(args.fixture) if args.fixture else None
+        responses.update(load_fixtures(args.fixtures, files))
+    profile = Profile(
+        latency=Latency(args.latency, args.latency_sigma),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_limit=None if args.rate_limit is None else RateLimit(args.rate_limit, args.burst),
+        body_chunk_size=args.body_chunk_size,
+        body_chunk_delay=args.body_chunk_delay,
+    )
+    server = StubServer(responses, profile, host=args.host, port=args.port, seed=args.seed)
+    print(f"Serving OCTo stub on {server.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
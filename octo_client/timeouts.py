@@ -0,0 +1,133 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple, Optional, TypeVar
+
+from octo_client import exceptions
+
+T = TypeVar("T")
+
+
+class Timeout(NamedTuple):
+    """
+    Number of seconds to wait for the connection to the supplier and between two reads of
+    the response. A missing value falls back to the less specific timeout, see `call_timeout`,
+    and no timeout at all when it's missing everywhere.
+    """
+
+    connect: Optional[float] = None
+    read: Optional[float] = None
+
+    def with_defaults(self, default: "Timeout") -> "Timeout":
+        """
+        Returns the timeout with its missing values taken from `default`.
+        """
+        return Timeout(
+            default.connect if self.connect is None else self.connect,
+            default.read if self.read is None else self.read,
+        )
+
+    def limit(self, seconds: float) -> "Timeout":
+        """
+        Returns the timeout cut to at most `seconds`.
+        """
+        return Timeout(
+            seconds if self.connect is None else min(self.connect, seconds),
+            seconds if self.read is None else min(self.read, seconds),
+        )
+
+
+DEFAULT_TIMEOUT = Timeout(connect=5.0, read=30.0)
+
+
+class Deadline(object):
+    """
+    Point in time by which a call, including all of its retries, has to finish.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            seconds (float): number of seconds from now to the deadline
+            clock (Callable): function returning the current time in seconds
+        """
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """
+        Returns the number of seconds left until the deadline, 0 once it passed.
+        """
+        return max(self.expires_at - self.clock(), 0.0)
+
+    def check(self) -> None:
+        """
+        Raises `DeadlineExceededError` when the deadline passed.
+        """
+        if self.remaining() <= 0:
+            raise exceptions.DeadlineExceededError("Deadline exceeded")
+
+
+_deadline: "contextvars.ContextVar[Optional[Deadline]]" = contextvars.ContextVar(
+    "octo_client_deadline", default=None
+)
+_call_timeout: "contextvars.ContextVar[Optional[Timeout]]" = contextvars.ContextVar(
+    "octo_client_call_timeout", default=None
+)
+
+
+def get_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+
+def get_call_timeout() -> Optional[Timeout]:
+    return _call_timeout.get()
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[Deadline]:
+    """
+    Limits the calls made in the block to `seconds` in total: the timeouts of the requests are cut
+    to the remaining time, no retry starts after the deadline, and `DeadlineExceededError` is raised
+    for requests made once it passed. The batches and the parallel calendar chunks share
+    the deadline of the caller. A nested deadline can only shorten the outer one.
+
+        with deadline(2.5):
+            client.availability_check(...)
+    """
+    current = Deadline(seconds)
+    outer = _deadline.get()
+    if outer is not None and outer.expires_at <= current.expires_at:
+        current = outer
+    token = _deadline.set(current)
+    try:
+        yield current
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def call_timeout(connect: Optional[float] = None, read: Optional[float] = None) -> Iterator[None]:
+    """
+    Overrides the timeouts of the requests made in the block. The missing values fall back to
+    the timeout of the supplier (`supplier_timeouts` of the clients), then of the client.
+    """
+    token = _call_timeout.set(Timeout(connect, read))
+    try:
+        yield
+    finally:
+        _call_timeout.reset(token)
+
+
+def with_context(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Returns `func` running in a copy of the current context, so it keeps the deadline and
+    the call timeout of the caller when it's called from another thread.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        # a context can't be entered by two threads at the same time
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
@@ -1,6 +1,143 @@
-from typing import List, Union
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from octo_client.const import PRIVATE_DATA_KEYS, PRIVATE_DATA_REPLACEMENT
+from octo_client.const import LOG_TRUNCATION_MARKER, PRIVATE_DATA_KEYS, PRIVATE_DATA_REPLACEMENT
+
+
+class Redactor(object):
+    """
+    Replaces the values of the sensitive keys of nested dicts, a key is sensitive when it
+    contains one of `keys` case-insensitively.
+
+    The keys are compiled into a single regular expression and the decision is memoised for
+    up to `max_memoized_keys` distinct keys. With `max_items`, longer lists are cut to their first
+    `max_items` items followed by a note of the number of the omitted items.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = PRIVATE_DATA_KEYS,
+        replacement: str = PRIVATE_DATA_REPLACEMENT,
+        max_items: Optional[int] = None,
+        max_memoized_keys: int = 4096,
+    ) -> None:
+        keys = sorted({key.lower() for key in keys})
+        self.replacement = replacement
+        self.max_items = max_items
+        self.max_memoized_keys = max_memoized_keys
+        # a pattern which never matches without keys
+        self._pattern = re.compile("|".join(map(re.escape, keys)) or "(?!)")
+        self._decisions: Dict[Any, bool] = {}
+
+    def is_sensitive(self, key: Any) -> bool:
+        sensitive = self._decisions.get(key)
+        if sensitive is None:
+            sensitive = self._pattern.search(str(key).lower()) is not None
+            if len(self._decisions) >= self.max_memoized_keys:
+                self._decisions.clear()
+            self._decisions[key] = sensitive
+        return sensitive
+
+    def redact(self, data: Any) -> Any:
+        """
+        Returns a redacted copy of the data in a single pass, the dicts and lists are copied and
+        the other values are shared, `data` is not modified.
+        """
+        if isinstance(data, dict):
+            return self._redact_dict(data)
+        if isinstance(data, list):
+            return self._redact_list(data)
+        return data
+
+    def _redact_dict(self, data: dict) -> dict:
+        decisions = self._decisions
+        redacted: Dict[Any, Any] = {}
+        for key, value in data.items():
+            sensitive = decisions.get(key)
+            if sensitive is None:
+                sensitive = self.is_sensitive(key)
+            if sensitive:
+                redacted[key] = self.replacement
+            elif isinstance(value, dict):
+                redacted[key] = self._redact_dict(value)
+            elif isinstance(value, list):
+                redacted[key] = self._redact_list(value)
+            else:
+                redacted[key] = value
+        return redacted
+
+    def iterencode(self, data: Any) -> Iterator[str]:
+        """
+        Yields the JSON of the redacted data in chunks, so it can be serialised only partially.
+        """
+        if isinstance(data, dict):
+            separator = "{"
+            for key, value in data.items():
+                yield f"{separator}{_encode_json(str(key))}:"
+                separator = ","
+                if self.is_sensitive(key):
+                    yield _encode_json(self.replacement)
+                else:
+                    yield from self.iterencode(value)
+            yield "}" if data else "{}"
+        elif isinstance(data, (list, tuple)):
+            items = data if self.max_items is None else data[: self.max_items]
+            separator = "["
+            for item in items:
+                yield separator
+                separator = ","
+                yield from self.iterencode(item)
+            if len(items) < len(data):
+                yield f"{separator}{_encode_json(f'[{len(data) - len(items)} more items]')}"
+            yield "]" if data else "[]"
+        else:
+            yield _encode_json(data)
+
+    def _redact_list(self, data: list) -> list:
+        items = data if self.max_items is None else data[: self.max_items]
+        redacted = [
+            self._redact_dict(item)
+            if isinstance(item, dict)
+            else self._redact_list(item)
+            if isinstance(item, list)
+            else item
+            for item in items
+        ]
+        if len(items) < len(data):
+            redacted.append(f"[{len(data) - len(items)} more items]")
+        return redacted
+
+
+def _encode_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def truncate_json(chunks: Iterable[str], size_limit: int) -> Optional[str]:
+    """
+    Consumes the chunks of a JSON document until their UTF-8 size exceeds `size_limit` bytes.
+
+    Returns: None when the document fits into the limit, otherwise its prefix followed by
+             `LOG_TRUNCATION_MARKER`, together at most `size_limit` bytes long unless the limit
+             is shorter than the marker.
+    """
+    size = 0
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk) if chunk.isascii() else len(chunk.encode("utf-8"))
+        if size > size_limit:
+            prefix_size = max(size_limit - len(LOG_TRUNCATION_MARKER), 0)
+            prefix = "".join(parts).encode("utf-8")[:prefix_size]
+            # a character cut in the middle is dropped
+            return prefix.decode("utf-8", "ignore") + LOG_TRUNCATION_MARKER
+    return None
+
+
+@lru_cache(maxsize=16)
+def _get_redactor(keys: Tuple[str, ...]) -> Redactor:
+    return Redactor(keys)
 
 
 def hide_sensitive_data(
@@ -8,20 +145,29 @@ def hide_sensitive_data(
 ) -> Union[str, list, dict]:
     """
     Hide sensitive data from a nested dict by doing a partial match on the keys.
+    The dicts and lists are copied and the values are shared, `data` is not modified.
     data: dict to be filtered
     keys: list of keys to be filtered
     """
-    if isinstance(data, str):
-        return data
-
-    if isinstance(data, list):
-        return [hide_sensitive_data(item, keys) for item in data]
+    return _get_redactor(tuple(keys)).redact(data)
 
-    if isinstance(data, dict):
-        for k, v in data.items():
-            hide_sensitive_data(v, keys)
 
-            for key in keys:
-                if key in k.lower():
-                    data[k] = PRIVATE_DATA_REPLACEMENT
-    return data
+def filter_log_data(
+    data: Union[str, list, dict],
+    size_limit: Optional[int] = None,
+    keys: List[str] = PRIVATE_DATA_KEYS,
+) -> Union[str, list, dict]:
+    """
+    Returns the data to log: the redacted data, or when the data is longer than `size_limit`
+    bytes, the prefix of its redacted JSON, see `truncate_json`. Only the prefix is serialised.
+    """
+    redactor = _get_redactor(tuple(keys))
+    if size_limit:
+        if isinstance(data, str):
+            chunks: Iterable[str] = [data[: size_limit + 1]]
+        else:
+            chunks = redactor.iterencode(data)
+        truncated = truncate_json(chunks, size_limit)
+        if truncated is not None:
+            return truncated
+    return redactor.redact(data)
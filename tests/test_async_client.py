@@ -0,0 +1,490 @@
+import asyncio
+import json
+import sqlite3
+import time
+from datetime import date
+from unittest import mock
+
+import pytest
+
+from octo_client import AsyncOctoClient, const, exceptions
+from octo_client import models as m
+from octo_client.batch import AvailabilityQuery
+from octo_client.circuit_breaker import CircuitBreaker, CircuitState
+from octo_client.hedging import HedgingPolicy
+from octo_client.instrumentation import MetricsHook
+from octo_client.rate_limit import RateLimiter
+from octo_client.retry import RetryPolicy
+from octo_client.stub_server import SUPPLIER_ID, Profile, StubServer
+from octo_client.timeouts import Timeout, call_timeout, deadline
+
+from .conftest import load_json_response
+
+httpx = pytest.importorskip("httpx")
+
+
+def make_transport(routes, calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status_code, body = routes[(request.method, request.url.path)]
+        return httpx.Response(status_code, json=body)
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def routes():
+    return {("GET", "/suppliers"): (200, load_json_response("suppliers.json"))}
+
+
+@pytest.fixture
+def async_client(routes, calls):
+    return AsyncOctoClient(
+        "http://fake-api.local", "secret-token", transport=make_transport(routes, calls)
+    )
+
+
+def test_get_products(async_client: AsyncOctoClient, routes, calls):
+    # GIVEN
+    routes[("GET", "/products")] = (200, load_json_response("products.json"))
+
+    # WHEN
+    async def run():
+        async with async_client:
+            return await async_client.get_products(
+                "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", headers={"Header-A": "test"}
+            )
+
+    products = asyncio.run(run())
+
+    # THEN
+    assert [product.id for product in products] == ["6b903d44-dc24-4ca4-ae71-6bde6c4f4854"]
+    assert products[0].options[0].units[0].type == const.UnitType.YOUTH
+    assert async_client.supplier_url_map == {
+        "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2": "http://fake-api.local",
+    }
+    assert [str(call.url) for call in calls] == [
+        "http://fake-api.local/suppliers",
+        "http://fake-api.local/products",
+    ]
+    assert calls[1].headers["Authorization"] == "Bearer secret-token"
+    assert calls[1].headers["Header-A"] == "test"
+    assert async_client._http_client is None
+
+
+def test_availability_check(async_client: AsyncOctoClient, routes, calls):
+    # GIVEN
+    routes[("POST", "/availability")] = (
+        200,
+        load_json_response("availability_start_times.json"),
+    )
+
+    # WHEN
+    availability = asyncio.run(
+        async_client.availability_check(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            local_date_start=date(2022, 6, 25),
+            local_date_end=date(2022, 6, 30),
+            units=[m.UnitQuantity(id="adult", quantity=2)],
+        )
+    )
+
+    # THEN
+    assert [item.id for item in availability] == [
+        "2022-06-30T12:00:00+01:00",
+        "2022-06-30T14:00:00+01:00",
+    ]
+    assert json.loads(calls[1].content) == {
+        "productId": "6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+        "optionId": "DEFAULT",
+        "localDateStart": "2022-06-25",
+        "localDateEnd": "2022-06-30",
+        "units": [{"id": "adult", "quantity": 2}],
+    }
+
+
+def test_iter_calendar(async_client: AsyncOctoClient, routes):
+    # GIVEN
+    calendar_response = load_json_response("calendar_start_times.json")
+    routes[("POST", "/availability/calendar")] = (200, calendar_response)
+
+    # WHEN
+    async def run():
+        async with async_client:
+            calendar = async_client.iter_calendar(
+                "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+                "6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+                "DEFAULT",
+                date(2022, 6, 1),
+                date(2022, 6, 30),
+            )
+            return [item async for item in calendar]
+
+    calendar = asyncio.run(run())
+
+    # THEN
+    assert calendar == [m.AvailabilityCalendarItem.from_dict(item) for item in calendar_response]
+
+
+def test_iter_calendar_non_json_array(async_client: AsyncOctoClient, routes):
+    # GIVEN
+    routes[("POST", "/availability/calendar")] = (200, {"error": "FAILED"})
+
+    # WHEN
+    async def run():
+        async with async_client:
+            calendar = async_client.iter_calendar(
+                "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+                "6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+                "DEFAULT",
+                date(2022, 6, 1),
+                date(2022, 6, 30),
+            )
+            return [item async for item in calendar]
+
+    # THEN
+    with pytest.raises(exceptions.ApiError):
+        asyncio.run(run())
+
+
+def test_retry_policy(routes, calls):
+    # GIVEN
+    statuses = [503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.path == "/products":
+            return httpx.Response(statuses.pop(0), json=load_json_response("products.json"))
+        return httpx.Response(200, json=routes[(request.method, request.url.path)][1])
+
+    client = AsyncOctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(random=lambda: 0),
+    )
+
+    # WHEN
+    products = asyncio.run(client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"))
+
+    # THEN
+    assert len(products) == 1
+    assert [call.url.path for call in calls] == ["/suppliers", "/products", "/products"]
+
+
+@pytest.mark.parametrize("cancelled", [True, False])
+def test_half_open_circuit_is_released_when_rate_limiter_fails(routes, calls, cancelled):
+    # GIVEN
+    now = [0.0]
+    statuses = [503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.path == "/products":
+            return httpx.Response(statuses.pop(0), json=[])
+        return httpx.Response(200, json=routes[(request.method, request.url.path)][1])
+
+    async def wait_for_token(*args):
+        if cancelled:
+            await asyncio.sleep(10)
+        raise sqlite3.OperationalError("database is locked")
+
+    circuit_breaker = CircuitBreaker(
+        minimum_calls=1, window_size=1, open_duration=10, clock=lambda: now[0]
+    )
+    rate_limiter = mock.Mock(spec=RateLimiter)
+    client = AsyncOctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        transport=httpx.MockTransport(handler),
+        rate_limiter=rate_limiter,
+        circuit_breaker=circuit_breaker,
+    )
+
+    async def get_products():
+        with pytest.raises(exceptions.ApiError):
+            await client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+        now[0] = 10
+        rate_limiter.acquire_async.side_effect = wait_for_token
+        with pytest.raises((asyncio.TimeoutError, sqlite3.OperationalError)):
+            await asyncio.wait_for(
+                client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"), timeout=0.01
+            )
+        rate_limiter.acquire_async.side_effect = None
+        return await client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # WHEN
+    products = asyncio.run(get_products())
+
+    # THEN
+    assert products == []
+    assert circuit_breaker.get_state("http://fake-api.local") == CircuitState.CLOSED
+
+
+def test_slow_availability_check_is_hedged(routes, calls):
+    # GIVEN
+    availability = load_json_response("availability_start_times.json")
+    delays = [10, 0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.path == "/availability":
+            await asyncio.sleep(delays.pop(0))
+            return httpx.Response(200, json=availability)
+        return httpx.Response(200, json=routes[(request.method, request.url.path)][1])
+
+    client = AsyncOctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        transport=httpx.MockTransport(handler),
+        hedging=HedgingPolicy(delay=0.01, budget=1),
+    )
+
+    # WHEN
+    availability = asyncio.run(
+        asyncio.wait_for(
+            client.availability_check(
+                supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+                product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+                option_id="DEFAULT",
+                local_date=date(2022, 6, 30),
+            ),
+            timeout=1,
+        )
+    )
+
+    # THEN
+    assert len(availability) == 2
+    assert [call.url.path for call in calls] == ["/suppliers", "/availability", "/availability"]
+
+
+def test_request_timeouts(routes, calls):
+    # GIVEN
+    routes[("GET", "/products")] = (200, [])
+    client = AsyncOctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        transport=make_transport(routes, calls),
+        timeout=Timeout(connect=2, read=10),
+    )
+
+    async def get_products():
+        await client.get_suppliers()
+        with call_timeout(read=3):
+            return await client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # WHEN
+    asyncio.run(get_products())
+
+    # THEN
+    assert [call.extensions["timeout"] for call in calls] == [
+        {"connect": 2, "read": 10, "write": 10, "pool": 10},
+        {"connect": 2, "read": 3, "write": 3, "pool": 3},
+    ]
+
+
+def test_deadline_limits_reading_slow_body():
+    # GIVEN
+    profile = Profile(body_chunk_size=1000, body_chunk_delay=0.05)
+
+    async def get_products(url):
+        async with AsyncOctoClient(url, "secret-token") as client:
+            await client.get_suppliers()
+            with deadline(0.2):
+                return await client.get_products(SUPPLIER_ID)
+
+    # WHEN
+    with StubServer(profiles={"products": profile}) as server:
+        started_at = time.monotonic()
+        with pytest.raises(exceptions.DeadlineExceededError):
+            asyncio.run(get_products(server.url))
+        duration = time.monotonic() - started_at
+
+    # THEN
+    assert duration < 0.5
+
+
+def test_stalled_body_opens_circuit():
+    # GIVEN
+    profile = Profile(body_chunk_size=1000, body_chunk_delay=0.05)
+    circuit_breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+
+    async def get_products(url):
+        async with AsyncOctoClient(url, "secret-token", circuit_breaker=circuit_breaker) as client:
+            await client.get_suppliers()
+            with deadline(0.1):
+                return await client.get_products(SUPPLIER_ID)
+
+    # WHEN
+    with StubServer(profiles={"products": profile}) as server:
+        with pytest.raises(exceptions.DeadlineExceededError):
+            asyncio.run(get_products(server.url))
+
+    # THEN
+    assert circuit_breaker.get_state(server.url) == CircuitState.OPEN
+
+
+def test_metrics_hook(routes, calls):
+    # GIVEN
+    routes[("GET", "/products")] = (200, load_json_response("products.json"))
+    hook = mock.Mock(spec=MetricsHook)
+    client = AsyncOctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        transport=make_transport(routes, calls),
+        metrics_hook=hook,
+    )
+
+    # WHEN
+    asyncio.run(client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"))
+
+    # THEN
+    metrics = hook.on_request.call_args.args[0]
+    assert (metrics.endpoint, metrics.status_code, metrics.attempts) == ("products", 200, 1)
+    assert metrics.json_decode is not None
+    assert hook.on_decode.call_args.args[0].items == 1
+
+
+def test_reservation(async_client: AsyncOctoClient, routes):
+    # GIVEN
+    routes[("POST", "/bookings")] = (200, load_json_response("reservation.json"))
+
+    # WHEN
+    booking = asyncio.run(
+        async_client.booking_reservation(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            uuid="559aed3d-6d5b-4fe0-bfca-99f5e7218a56",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            availability_id="2021-10-27T00:00:00-04:00",
+            unit_items=[m.UnitItem(unitId="adult")],
+        )
+    )
+
+    # THEN
+    assert booking.status == const.BookingStatus.ON_HOLD
+    assert booking.supplierReference == "XOPSUT"
+
+
+def test_unknown_supplier(async_client: AsyncOctoClient):
+    with pytest.raises(exceptions.InvalidRequest):
+        asyncio.run(async_client.get_products("unknown-supplier"))
+
+
+def test_error_response(async_client: AsyncOctoClient, routes):
+    # GIVEN
+    routes[("GET", "/products")] = (400, {"error": "INVALID_PRODUCT_ID"})
+
+    # WHEN / THEN
+    with pytest.raises(exceptions.InvalidRequest):
+        asyncio.run(async_client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"))
+
+
+def test_availability_check_batch(async_client: AsyncOctoClient, routes):
+    # GIVEN
+    routes[("POST", "/availability")] = (
+        200,
+        load_json_response("availability_start_times.json"),
+    )
+    queries = [
+        AvailabilityQuery(
+            supplier_id=supplier_id,
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+        )
+        for supplier_id in ["48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "unknown-supplier"]
+    ]
+
+    # WHEN
+    async def run():
+        await async_client.get_suppliers()
+        return [
+            result
+            async for result in async_client.availability_check_batch(queries, max_concurrency=1)
+        ]
+
+    results = asyncio.run(run())
+
+    # THEN
+    assert [result.ok for result in results] == [True, False]
+    assert len(results[0].result) == 2
+    assert isinstance(results[1].error, exceptions.InvalidRequest)
+
+
+def test_unknown_supplier_is_remembered(async_client: AsyncOctoClient, calls):
+    # WHEN
+    async def run():
+        for _ in range(3):
+            with pytest.raises(exceptions.InvalidRequest):
+                await async_client.get_products("unknown-supplier")
+
+    asyncio.run(run())
+
+    # THEN
+    assert [call.url.path for call in calls] == ["/suppliers"]
+
+
+def test_concurrent_supplier_refreshes_are_coalesced(async_client: AsyncOctoClient, calls):
+    # WHEN
+    async def run():
+        return await asyncio.gather(
+            *(
+                async_client._build_endpoint_url_for_request(
+                    "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "products"
+                )
+                for _ in range(10)
+            )
+        )
+
+    urls = asyncio.run(run())
+
+    # THEN
+    assert urls == ["http://fake-api.local/products"] * 10
+    assert [call.url.path for call in calls] == ["/suppliers"]
+
+
+def test_calendar_in_chunks(routes, calls):
+    # GIVEN
+    routes[("POST", "/availability/calendar")] = (
+        200,
+        load_json_response("calendar_start_times.json"),
+    )
+    async_client = AsyncOctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        transport=make_transport(routes, calls),
+        calendar_chunk_days=5,
+    )
+
+    # WHEN
+    calendar = asyncio.run(
+        async_client.get_calendar(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            local_date_start=date(2022, 6, 10),
+            local_date_end=date(2022, 6, 20),
+        )
+    )
+
+    # THEN
+    assert [item.localDate for item in calendar] == [
+        date(2022, 6, 14),
+        date(2022, 6, 15),
+        date(2022, 6, 16),
+    ]
+    assert sorted(
+        (payload["localDateStart"], payload["localDateEnd"])
+        for payload in (json.loads(call.content) for call in calls[1:])
+    ) == [
+        ("2022-06-10", "2022-06-14"),
+        ("2022-06-15", "2022-06-19"),
+        ("2022-06-20", "2022-06-20"),
+    ]
@@ -0,0 +1,49 @@
+from benchmarks import payloads
+from benchmarks.runner import Result, find_regressions, measure
+from octo_client import models as m
+
+
+def test_payloads_are_valid():
+    # WHEN
+    products = [m.Product.from_dict(item, strict=True) for item in payloads.products(2, 3, 2)]
+    calendar = [m.AvailabilityCalendarItem.from_dict(item) for item in payloads.calendar(3)]
+    availability = [m.Availability.from_dict(item) for item in payloads.availability(2, 3)]
+    bookings = [m.Booking.from_dict(item, strict=True) for item in payloads.bookings(2, 3)]
+
+    # THEN
+    assert [len(product.options) for product in products] == [3, 3]
+    assert [len(option.units) for option in products[0].options] == [2, 2, 2]
+    assert [item.localDate.isoformat() for item in calendar] == [
+        "2030-01-01",
+        "2030-01-02",
+        "2030-01-03",
+    ]
+    assert len({item.id for item in availability}) == 6
+    assert [len(booking.unitItems) for booking in bookings] == [3, 3]
+
+
+def test_find_regressions():
+    # GIVEN
+    results = [
+        Result("fast", best=1.1, median=1.2, number=1),
+        Result("slow", best=1.3, median=1.3, number=1),
+        Result("noisy", best=1.4, median=1.5, number=1),
+        Result("new", best=5.0, median=5.0, number=1),
+    ]
+
+    # WHEN
+    regressions = find_regressions(
+        results, {"fast": 1.0, "slow": 1.0, "noisy": 1.0}, {"noisy": 0.5}, default_tolerance=0.2
+    )
+
+    # THEN
+    assert [regression.split(":")[0] for regression in regressions] == ["slow"]
+
+
+def test_measure():
+    # WHEN
+    result = measure(lambda: None, repeat=2, min_time=0.001)
+
+    # THEN
+    assert result.number >= 1
+    assert 0 < result.best <= result.median
@@ -0,0 +1,335 @@
+import asyncio
+import fnmatch
+import threading
+import time
+
+import pytest
+
+from octo_client.cache import (
+    AsyncSingleFlight,
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    SingleFlight,
+    SQLiteCacheBackend,
+    TTLCache,
+    normalise_payload,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expiration():
+    # GIVEN
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, clock=clock)
+    cache.set("key", "value", ttl=10)
+
+    # WHEN / THEN
+    clock.now = 9
+    assert cache.get("key") == "value"
+    clock.now = 10
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_lru_eviction():
+    # GIVEN
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=10)
+    cache.get("a")
+
+    # WHEN
+    cache.set("c", 3, ttl=10)
+
+    # THEN
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_response_cache_ttls():
+    # GIVEN
+    clock = FakeClock()
+    cache = ResponseCache(ttls={"products": 60}, clock=clock)
+    products_key = ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "en", None
+    )
+    product_key = ResponseCache.make_key(
+        "product", "http://fake-api.local", "supplier-1", "products/1", "en", None
+    )
+
+    # WHEN
+    cache.set(products_key, ["product"])
+    cache.set(product_key, "product")
+
+    # THEN
+    assert cache.get(products_key) == ["product"]
+    assert cache.get(product_key) is None
+    clock.now = 60
+    assert cache.get(products_key) is None
+
+
+def test_response_cache_key():
+    assert ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "en", {"B": "1", "A": "2"}
+    ) == ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "en", {"A": "2", "B": "1"}
+    )
+    assert ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "en", None
+    ) != ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "de", None
+    )
+    assert ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "en", None, token="a"
+    ) != ResponseCache.make_key(
+        "products", "http://fake-api.local", "supplier-1", "products", "en", None, token="b"
+    )
+
+
+def test_response_cache_invalidate():
+    # GIVEN
+    cache = ResponseCache()
+    for endpoint, supplier_id, path in [
+        ("products", "supplier-1", "products"),
+        ("product", "supplier-1", "products/1"),
+        ("products", "supplier-2", "products"),
+    ]:
+        cache.set(
+            ResponseCache.make_key(
+                endpoint, "http://fake-api.local", supplier_id, path, "en", None
+            ),
+            path,
+        )
+
+    # WHEN / THEN
+    assert cache.invalidate(supplier_id="supplier-1", endpoint="product") == 1
+    assert cache.invalidate(supplier_id="supplier-1") == 1
+    assert len(cache.backend) == 1
+    assert cache.invalidate() == 1
+
+
+def test_response_cache_serialisation(tmp_path):
+    # GIVEN
+    cache = ResponseCache(
+        compress_threshold=100, backend=SQLiteCacheBackend(str(tmp_path / "cache.sqlite"))
+    )
+    small_key = ResponseCache.make_key(
+        "product", "http://fake-api.local", "1", "products/1", "en", None
+    )
+    large_key = ResponseCache.make_key(
+        "products", "http://fake-api.local", "1", "products", "en", None
+    )
+    large_response = [{"id": str(i), "internalName": "Museum ticket – adult"} for i in range(100)]
+
+    # WHEN
+    cache.set(small_key, {"id": "1"})
+    cache.set(large_key, large_response)
+
+    # THEN
+    assert cache.backend.get(small_key) == b'j{"id":"1"}'
+    assert cache.backend.get(large_key)[:1] == b"z"
+    assert cache.get(small_key) == {"id": "1"}
+    assert cache.get(large_key) == large_response
+
+
+def test_response_cache_backend_failure():
+    # GIVEN
+    class BrokenBackend(CacheBackend):
+        def get(self, key):
+            raise ConnectionError("cache is down")
+
+        def set(self, key, value, ttl):
+            raise ConnectionError("cache is down")
+
+    cache = ResponseCache(backend=BrokenBackend())
+    key = ResponseCache.make_key("products", "http://fake-api.local", "1", "products", "en", None)
+
+    # WHEN / THEN
+    cache.set(key, ["product"])
+    assert cache.get(key) is None
+
+
+def test_memory_backend_delete_matching():
+    # GIVEN
+    backend = MemoryCacheBackend()
+    backend.set("products:supplier-1:abc", b"1", ttl=10)
+    backend.set("product:supplier-1:abc", b"2", ttl=10)
+    backend.set("products:supplier-2:abc", b"3", ttl=10)
+
+    # WHEN / THEN
+    assert backend.delete_matching("products:*:*") == 2
+    assert backend.get("product:supplier-1:abc") == b"2"
+
+
+def test_sqlite_backend(tmp_path):
+    # GIVEN
+    clock = FakeClock()
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite"), clock=clock)
+    backend.set("products:supplier-1:abc", b"1", ttl=10)
+    backend.set("products:supplier-2:abc", b"2", ttl=20)
+
+    # WHEN / THEN
+    assert backend.get("products:supplier-1:abc") == b"1"
+    clock.now = 10
+    assert backend.get("products:supplier-1:abc") is None
+    assert backend.get("products:supplier-2:abc") == b"2"
+    assert backend.delete_matching("products:supplier-2:*") == 1
+    assert backend.get("products:supplier-2:abc") is None
+    backend.close()
+
+
+def test_sqlite_backend_maxsize(tmp_path):
+    # GIVEN
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite"), maxsize=2, purge_interval=3)
+
+    # WHEN
+    for ttl in [30, 10, 20]:
+        backend.set(f"products:supplier:{ttl}", b"value", ttl=ttl)
+
+    # THEN
+    assert backend.get("products:supplier:10") is None
+    assert backend.get("products:supplier:20") == b"value"
+    assert backend.get("products:supplier:30") == b"value"
+    backend.close()
+
+
+def test_sqlite_backend_shared_between_caches(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "cache.sqlite")
+    key = ResponseCache.make_key("products", "http://fake-api.local", "1", "products", "en", None)
+    ResponseCache(backend=SQLiteCacheBackend(path)).set(key, [{"id": "1"}])
+
+    # WHEN
+    other_cache = ResponseCache(backend=SQLiteCacheBackend(path))
+
+    # THEN
+    assert other_cache.get(key) == [{"id": "1"}]
+    assert other_cache.invalidate(supplier_id="1") == 1
+    assert other_cache.get(key) is None
+
+
+def test_redis_backend():
+    # GIVEN
+    class FakeRedis:
+        def __init__(self):
+            self.data = {}
+
+        def get(self, name):
+            return self.data.get(name)
+
+        def set(self, name, value, px=None):
+            self.data[name] = value
+
+        def scan_iter(self, match=None):
+            return [name for name in self.data if fnmatch.fnmatchcase(name, match)]
+
+        def delete(self, *names):
+            for name in names:
+                del self.data[name]
+            return len(names)
+
+    redis = FakeRedis()
+    backend = RedisCacheBackend(redis, prefix="test:")
+
+    # WHEN
+    backend.set("products:supplier-1:abc", b"1", ttl=10)
+    backend.set("products:supplier-2:abc", b"2", ttl=10)
+
+    # THEN
+    assert redis.data["test:products:supplier-1:abc"] == b"1"
+    assert backend.get("products:supplier-1:abc") == b"1"
+    assert backend.delete_matching("*:supplier-1:*") == 1
+    backend.clear()
+    assert redis.data == {}
+
+
+def test_normalise_payload():
+    assert normalise_payload(
+        {
+            "productId": "1",
+            "optionId": "DEFAULT",
+            "units": [{"id": "child", "quantity": 1}, {"id": "adult", "quantity": 2}],
+        }
+    ) == normalise_payload(
+        {
+            "units": [{"quantity": 2, "id": "adult"}, {"id": "child", "quantity": 1}],
+            "optionId": "DEFAULT",
+            "productId": "1",
+        }
+    )
+
+
+def test_single_flight():
+    # GIVEN
+    single_flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def load():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+
+    def worker():
+        results.append(single_flight.do("key", load))
+
+    # WHEN
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    # THEN
+    assert results == ["value"] * 6
+    assert len(calls) == 1
+
+
+def test_single_flight_error():
+    # GIVEN
+    single_flight = SingleFlight()
+
+    def load():
+        raise ValueError("error")
+
+    # WHEN / THEN
+    with pytest.raises(ValueError):
+        single_flight.do("key", load)
+    assert single_flight.do("key", lambda: "value") == "value"
+
+
+def test_async_single_flight():
+    # GIVEN
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(single_flight.do("key", load) for _ in range(5)))
+
+    # WHEN
+    results = asyncio.run(run())
+
+    # THEN
+    assert results == ["value"] * 5
+    assert len(calls) == 1
@@ -0,0 +1,100 @@
+import pytest
+
+from octo_client import exceptions
+from octo_client.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def changes():
+    return []
+
+
+@pytest.fixture
+def breaker(changes):
+    return CircuitBreaker(
+        failure_rate_threshold=0.5,
+        slow_call_duration=5,
+        window_size=4,
+        minimum_calls=4,
+        open_duration=30,
+        on_state_change=lambda key, old, new: changes.append((key, old, new)),
+        clock=FakeClock(),
+    )
+
+
+def call(breaker: CircuitBreaker, failed: bool = False, duration: float = 0.1):
+    breaker.before_call("http://api.local")
+    breaker.record("http://api.local", duration, failed)
+
+
+def test_circuit_opens_on_failures(breaker: CircuitBreaker, changes):
+    # WHEN
+    for failed in [False, True, False, True]:
+        call(breaker, failed=failed)
+
+    # THEN
+    assert breaker.get_state("http://api.local") == CircuitState.OPEN
+    assert changes == [("http://api.local", CircuitState.CLOSED, CircuitState.OPEN)]
+    with pytest.raises(exceptions.CircuitOpenError):
+        breaker.before_call("http://api.local")
+    assert breaker.get_state("http://other-api.local") == CircuitState.CLOSED
+
+
+def test_circuit_opens_on_slow_calls(breaker: CircuitBreaker):
+    # GIVEN
+    breaker.slow_call_rate_threshold = 0.75
+
+    # WHEN
+    for duration in [6, 0.1, 6, 6]:
+        call(breaker, duration=duration)
+
+    # THEN
+    assert breaker.get_state("http://api.local") == CircuitState.OPEN
+
+
+def test_half_open_circuit(breaker: CircuitBreaker, changes):
+    # GIVEN
+    for _ in range(4):
+        call(breaker, failed=True)
+
+    # WHEN
+    breaker.clock.now = 30
+    call(breaker, failed=True)
+    breaker.clock.now = 60
+    breaker.before_call("http://api.local")
+    with pytest.raises(exceptions.CircuitOpenError):
+        breaker.before_call("http://api.local")
+    breaker.record("http://api.local", 0.1, failed=False)
+
+    # THEN
+    assert breaker.get_state("http://api.local") == CircuitState.CLOSED
+    assert [new for _, _, new in changes] == [
+        CircuitState.OPEN,
+        CircuitState.HALF_OPEN,
+        CircuitState.OPEN,
+        CircuitState.HALF_OPEN,
+        CircuitState.CLOSED,
+    ]
+
+
+def test_released_trial_call(breaker: CircuitBreaker):
+    # GIVEN
+    for _ in range(4):
+        call(breaker, failed=True)
+    breaker.clock.now = 30
+    breaker.before_call("http://api.local")
+
+    # WHEN
+    breaker.release("http://api.local")
+
+    # THEN
+    breaker.before_call("http://api.local")
+    assert breaker.get_state("http://api.local") == CircuitState.HALF_OPEN
@@ -1,12 +1,29 @@
+import json
+import logging
+import sqlite3
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time, timedelta, timezone
 from typing import Dict
 from typing import Optional
+from unittest import mock
 
 import pytest
+import requests
 import responses
 
-from octo_client import OctoClient, const
+from octo_client import OctoClient, const, exceptions
 from octo_client import models as m
+from octo_client.batch import AvailabilityQuery
+from octo_client.cache import ResponseCache, SQLiteCacheBackend
+from octo_client.circuit_breaker import CircuitBreaker, CircuitState
+from octo_client.hedging import HedgingPolicy
+from octo_client.instrumentation import MetricsHook
+from octo_client.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimiter
+from octo_client.retry import RetryPolicy
+from octo_client.stub_server import SUPPLIER_ID, Profile, StubServer
+from octo_client.timeouts import Timeout, call_timeout, deadline
 
 from .conftest import load_json_response
 
@@ -159,6 +176,19 @@ def test_get_products(client: OctoClient, mocked_responses, custom_header: Optio
     assert mocked_responses.calls[1].request.body is None
 
 
+def test_successful_response_is_not_decoded_to_text(client: OctoClient, mocked_responses):
+    # GIVEN
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=[])
+
+    # WHEN
+    with mock.patch.object(requests.Response, "text", new_callable=mock.PropertyMock) as text:
+        products = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert products == []
+    assert not text.called
+
+
 @pytest.mark.parametrize(
     "custom_header", [{"Header-A": "test"}, None]
 )
@@ -676,3 +706,1015 @@ def test_reservation(client: OctoClient, mocked_responses, custom_header: Option
         for header_name, header_value in custom_header.items():
             assert mocked_responses.calls[1].request.headers.get(header_name) == header_value
     assert mocked_responses.calls[1].request.body
+
+
+def test_log_data_built_only_when_logged(client: OctoClient, mocked_responses, caplog):
+    # GIVEN
+    client.log_requests = client.log_responses = True
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=[{"id": "1", "name": "Tour"}]
+    )
+    client.get_suppliers()
+    filtered = []
+    client._filter_response_log_data = lambda content: filtered.append(content) or content
+
+    # WHEN
+    client._http_get("products", supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    with caplog.at_level(logging.DEBUG, logger="octo_client"):
+        client._http_get("products", supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert filtered == [[{"id": "1", "name": "Tour"}]]
+    assert caplog.records[-1].response == [{"id": "1", "name": "Tour"}]
+
+
+def test_retry_policy(mocked_responses):
+    # GIVEN
+    sleeps = []
+    client = OctoClient(
+        "http://fake-api.local", "secret-token", retry_policy=RetryPolicy(random=lambda: 0.5)
+    )
+    mocked_responses.add(responses.GET, "http://fake-api.local/suppliers", status=503)
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/suppliers",
+        status=429,
+        headers={"Retry-After": "2"},
+    )
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/suppliers",
+        body=requests.ConnectTimeout("Connection timed out"),
+    )
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/suppliers",
+        json=load_json_response("suppliers.json"),
+    )
+
+    # WHEN
+    with mock.patch("time.sleep", sleeps.append):
+        suppliers = client.get_suppliers()
+
+    # THEN
+    assert [supplier.id for supplier in suppliers] == ["48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"]
+    assert sleeps == [0.25, 2, 1]
+
+
+def test_booking_mutations_not_retried(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.retry_policy = RetryPolicy(random=lambda: 0)
+    mocked_responses.add(responses.POST, "http://fake-api.local/bookings/1/confirm", status=503)
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/bookings/2/confirm",
+        body=requests.ConnectionError("Connection aborted"),
+    )
+
+    # WHEN / THEN
+    with pytest.raises(exceptions.ApiError):
+        client.booking_confirmation("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "1")
+    with pytest.raises(requests.ConnectionError):
+        client.booking_confirmation("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "2")
+    assert len(mocked_responses.calls) == 3
+
+
+def test_rate_limiter(client: OctoClient, mocked_responses):
+    # GIVEN
+    sleeps = []
+    client.rate_limiter = RateLimiter(
+        limits={"fake-api.local": RateLimit(rate=2)},
+        backend=MemoryRateLimitBackend(clock=lambda: 0),
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+
+    # WHEN
+    with mock.patch("time.sleep", sleeps.append):
+        for _ in range(2):
+            client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert sleeps == [0.5, 1.0], "Requests to the host are not limited"
+
+
+def test_circuit_breaker(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.circuit_breaker = CircuitBreaker(minimum_calls=3, window_size=3)
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", status=503)
+
+    # WHEN
+    for _ in range(2):
+        with pytest.raises(exceptions.ApiError):
+            client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    with pytest.raises(exceptions.CircuitOpenError):
+        client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    assert len(mocked_responses.calls) == 3
+
+
+def test_broken_body_is_retried(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.retry_policy = RetryPolicy(random=lambda: 0)
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/products",
+        body=requests.exceptions.ChunkedEncodingError("Connection broken: IncompleteRead"),
+    )
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=[])
+
+    # WHEN
+    with mock.patch("time.sleep"):
+        products = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert products == []
+    assert len(mocked_responses.calls) == 3
+
+
+def test_stalled_body_opens_circuit():
+    # GIVEN
+    profile = Profile(body_chunk_size=1000, body_chunk_delay=0.05)
+    with StubServer(profiles={"products": profile}) as server:
+        client = OctoClient(server.url, "secret-token")
+        client.circuit_breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+        client.get_suppliers()
+
+        # WHEN
+        with deadline(0.1):
+            with pytest.raises(exceptions.DeadlineExceededError):
+                client.get_products(SUPPLIER_ID)
+        client.close()
+
+    # THEN
+    assert client.circuit_breaker.get_state(server.url) == CircuitState.OPEN
+
+
+@pytest.mark.parametrize(
+    "error", [sqlite3.OperationalError("database is locked"), KeyboardInterrupt()]
+)
+def test_half_open_circuit_is_released_when_rate_limiter_fails(
+    client: OctoClient, mocked_responses, error
+):
+    # GIVEN
+    now = [0.0]
+    client.circuit_breaker = CircuitBreaker(
+        minimum_calls=1, window_size=1, open_duration=10, clock=lambda: now[0]
+    )
+    client.rate_limiter = mock.Mock(spec=RateLimiter)
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", status=503)
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=[])
+    with pytest.raises(exceptions.ApiError):
+        client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    now[0] = 10
+    client.rate_limiter.acquire.side_effect = error
+    with pytest.raises(type(error)):
+        client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    client.rate_limiter.acquire.side_effect = None
+
+    # WHEN
+    products = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert products == []
+    assert client.circuit_breaker.get_state("http://fake-api.local") == CircuitState.CLOSED
+
+
+def test_iter_products(client: OctoClient, mocked_responses):
+    # GIVEN
+    products_response = load_json_response("products.json") * 3
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=products_response)
+
+    # WHEN
+    products = client.iter_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert len(mocked_responses.calls) == 0, "Request sent before iterating"
+    assert list(products) == [m.Product.from_dict(product) for product in products_response]
+
+
+def test_iter_calendar_errors(client: OctoClient, mocked_responses):
+    # GIVEN
+    mocked_responses.add(
+        responses.POST, "http://fake-api.local/availability/calendar", json={"error": "FAILED"}
+    )
+    mocked_responses.add(
+        responses.POST, "http://fake-api.local/availability/calendar", status=400, body="Invalid"
+    )
+
+    # WHEN
+    calendars = [
+        client.iter_calendar(
+            "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            "6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            "DEFAULT",
+            date(2022, 6, 1),
+            date(2022, 6, 30),
+        )
+        for _ in range(2)
+    ]
+
+    # THEN
+    with pytest.raises(exceptions.ApiError):
+        list(calendars[0])
+    with pytest.raises(exceptions.InvalidRequest):
+        list(calendars[1])
+
+
+def test_lazy_bookings(mocked_responses):
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token", lazy_bookings=True)
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/suppliers",
+        json=load_json_response("suppliers.json"),
+    )
+    reservation_response = load_json_response("reservation.json")
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/bookings", json=[reservation_response]
+    )
+
+    # WHEN
+    bookings = client.list_bookings(
+        supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", reseller_reference="ref"
+    )
+
+    # THEN
+    assert [type(booking) for booking in bookings] == [m.LazyBooking]
+    assert bookings == [m.Booking.from_dict(reservation_response)]
+
+
+def test_sessions_are_pooled_per_supplier_endpoint(client: OctoClient, mocked_responses):
+    # GIVEN
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/products/6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+        json=load_json_response("product.json"),
+    )
+
+    # WHEN
+    client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    session = client._get_session("http://fake-api.local")
+    client.get_product(
+        "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "6b903d44-dc24-4ca4-ae71-6bde6c4f4854"
+    )
+
+    # THEN
+    assert list(client._sessions) == ["http://fake-api.local"]
+    assert client._get_session("http://fake-api.local") is session
+
+
+def test_sessions_pool_limits():
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token", pool_size=2, pool_idle_timeout=60)
+    first_session = client._get_session("http://supplier-1.local")
+    client._get_session("http://supplier-2.local")
+
+    # WHEN
+    client._get_session("http://supplier-3.local")
+
+    # THEN
+    assert list(client._sessions) == ["http://supplier-2.local", "http://supplier-3.local"]
+    assert client._get_session("http://supplier-1.local") is not first_session
+
+    # WHEN
+    idle_session = client._get_session("http://supplier-3.local")
+    session, _ = client._sessions["http://supplier-3.local"]
+    client._sessions["http://supplier-3.local"] = (session, time_module.monotonic() - 120)
+
+    # THEN
+    assert client._get_session("http://supplier-3.local") is not idle_session
+
+
+def test_close_sessions():
+    # GIVEN
+    with OctoClient("http://fake-api.local", "secret-token") as client:
+        client._get_session("http://supplier-1.local")
+        assert len(client._sessions) == 1
+
+    # THEN
+    assert len(client._sessions) == 0
+
+
+def test_availability_check_batch(client: OctoClient, mocked_responses):
+    # GIVEN
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability",
+        json=load_json_response("availability_start_times.json"),
+        match=[responses.matchers.json_params_matcher(
+            {"productId": "product-1", "optionId": "DEFAULT"}
+        )],
+    )
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability",
+        json={"error": "INVALID_OPTION_ID"},
+        status=400,
+        match=[responses.matchers.json_params_matcher(
+            {"productId": "product-2", "optionId": "DEFAULT"}
+        )],
+    )
+    queries = [
+        AvailabilityQuery(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id=product_id,
+            option_id="DEFAULT",
+        )
+        for product_id in ["product-1", "product-2"]
+    ]
+    client.get_suppliers()
+
+    # WHEN
+    results = {
+        result.query.product_id: result
+        for result in client.availability_check_batch(queries, max_workers=2)
+    }
+
+    # THEN
+    assert results["product-1"].ok
+    assert [item.id for item in results["product-1"].result] == [
+        "2022-06-30T12:00:00+01:00",
+        "2022-06-30T14:00:00+01:00",
+    ]
+    assert not results["product-2"].ok
+    assert isinstance(results["product-2"].error, exceptions.InvalidRequest)
+
+
+def test_unknown_supplier_is_remembered(client: OctoClient, mocked_responses):
+    # WHEN
+    for _ in range(3):
+        with pytest.raises(exceptions.InvalidRequest):
+            client.get_products("unknown-supplier")
+
+    # THEN
+    assert len(mocked_responses.calls) == 1, "Too many requests"
+
+
+def test_supplier_map_replaced_during_request(client: OctoClient, mocked_responses):
+    # GIVEN
+    class RefreshedMap(dict):
+        """
+        Map replaced by a refresh of the suppliers right after a lookup.
+        """
+
+        def __getitem__(self, key):
+            client.supplier_url_map = {}
+            return super().__getitem__(key)
+
+        def get(self, key, default=None):
+            client.supplier_url_map = {}
+            return super().get(key, default)
+
+    client.get_suppliers()
+    client.supplier_url_map = RefreshedMap(client.supplier_url_map)
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=[])
+
+    # WHEN
+    products = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert products == []
+    assert [call.request.url for call in mocked_responses.calls] == [
+        "http://fake-api.local/suppliers",
+        "http://fake-api.local/products",
+    ]
+
+
+def test_concurrent_supplier_refreshes_are_coalesced(mocked_responses):
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token")
+
+    def slow_suppliers(request):
+        time_module.sleep(0.1)
+        return 200, {}, json.dumps(load_json_response("suppliers.json"))
+
+    mocked_responses.add_callback(
+        responses.GET, "http://fake-api.local/suppliers", callback=slow_suppliers
+    )
+
+    # WHEN
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        urls = list(
+            pool.map(
+                lambda _: client._build_endpoint_url_for_request(
+                    "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "products"
+                ),
+                range(10),
+            )
+        )
+
+    # THEN
+    assert urls == ["http://fake-api.local/products"] * 10
+    assert len(mocked_responses.calls) == 1, "Too many requests"
+
+
+def test_supplier_map_refreshed_in_background(mocked_responses):
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token", supplier_map_ttl=60)
+    suppliers = load_json_response("suppliers.json")
+    mocked_responses.add(responses.GET, "http://fake-api.local/suppliers", json=suppliers)
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/suppliers",
+        json=[{**suppliers[0], "endpoint": "http://new-api.local"}],
+    )
+    client.get_suppliers()
+    client._suppliers_refreshed_at -= 61
+
+    # WHEN
+    stale_url = client._build_endpoint_url_for_request(
+        "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "products"
+    )
+    client._suppliers_refresh.join()
+
+    # THEN
+    assert stale_url == "http://fake-api.local/products"
+    assert client.supplier_url_map == {
+        "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2": "http://new-api.local"
+    }
+    assert len(mocked_responses.calls) == 2
+
+
+def test_get_calendar_batch(client: OctoClient, mocked_responses):
+    # GIVEN
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability/calendar",
+        json=load_json_response("calendar_start_times.json"),
+    )
+    queries = [
+        AvailabilityQuery(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id=option_id,
+            local_date_start=date(2022, 6, 10),
+            local_date_end=date(2022, 6, 20),
+        )
+        for option_id in ["OPTION-1", "OPTION-2", "OPTION-3"]
+    ]
+    queries.append(
+        AvailabilityQuery(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="NO-DATES",
+        )
+    )
+    client.get_suppliers()
+
+    # WHEN
+    results = list(client.get_calendar_batch(queries, max_workers=2))
+
+    # THEN
+    assert len(results) == 4
+    assert sorted(result.query.option_id for result in results if result.ok) == [
+        "OPTION-1",
+        "OPTION-2",
+        "OPTION-3",
+    ]
+    assert all(len(result.result) == 3 for result in results if result.ok)
+    failed = [result for result in results if not result.ok]
+    assert failed[0].query.option_id == "NO-DATES"
+    assert isinstance(failed[0].error, ValueError)
+
+
+def test_calendar_chunks():
+    assert OctoClient._calendar_chunks(date(2022, 6, 1), date(2022, 6, 10), None) == [
+        (date(2022, 6, 1), date(2022, 6, 10))
+    ]
+    assert OctoClient._calendar_chunks(date(2022, 6, 1), date(2022, 6, 10), 4) == [
+        (date(2022, 6, 1), date(2022, 6, 4)),
+        (date(2022, 6, 5), date(2022, 6, 8)),
+        (date(2022, 6, 9), date(2022, 6, 10)),
+    ]
+    assert OctoClient._calendar_chunks(date(2022, 6, 1), date(2022, 6, 1), 4) == [
+        (date(2022, 6, 1), date(2022, 6, 1))
+    ]
+    with pytest.raises(ValueError):
+        OctoClient._calendar_chunks(date(2022, 6, 1), date(2022, 6, 10), 0)
+
+
+def test_merge_calendar_chunks():
+    assert OctoClient._merge_calendar_chunks(
+        [
+            [{"localDate": "2022-06-11"}, {"status": "AVAILABLE"}],
+            [{"localDate": "2022-06-10"}, {"localDate": "2022-06-11", "status": "CLOSED"}],
+        ]
+    ) == [{"localDate": "2022-06-10"}, {"localDate": "2022-06-11"}, {"status": "AVAILABLE"}]
+    assert OctoClient._merge_calendar_chunks([[], {"error": "FAILED"}]) == {"error": "FAILED"}
+
+
+def test_calendar_in_chunks(client: OctoClient, mocked_responses):
+    # GIVEN
+    def calendar_day(local_date: str) -> Dict:
+        return {
+            "localDate": local_date,
+            "available": True,
+            "status": "AVAILABLE",
+            "vacancies": 10,
+            "capacity": 10,
+            "openingHours": [],
+        }
+
+    chunk_responses = {
+        ("2022-06-10", "2022-06-16"): ["2022-06-15", "2022-06-10"],
+        ("2022-06-17", "2022-06-20"): ["2022-06-17", "2022-06-16"],
+    }
+    for (start, end), days in chunk_responses.items():
+        mocked_responses.add(
+            responses.POST,
+            "http://fake-api.local/availability/calendar",
+            json=[calendar_day(day) for day in days],
+            match=[responses.matchers.json_params_matcher(
+                {
+                    "productId": "6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+                    "optionId": "DEFAULT",
+                    "localDateStart": start,
+                    "localDateEnd": end,
+                }
+            )],
+        )
+
+    # WHEN
+    response = client.get_calendar(
+        supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+        product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+        option_id="DEFAULT",
+        local_date_start=date(2022, 6, 10),
+        local_date_end=date(2022, 6, 20),
+        chunk_days=7,
+    )
+
+    # THEN
+    assert [item.localDate for item in response] == [
+        date(2022, 6, 10),
+        date(2022, 6, 15),
+        date(2022, 6, 16),
+        date(2022, 6, 17),
+    ]
+    assert len(mocked_responses.calls) == 3, "Too many requests"
+
+
+def test_calendar_chunk_without_date(client: OctoClient, mocked_responses):
+    # GIVEN
+    calendar_day = {
+        "available": True,
+        "status": "AVAILABLE",
+        "vacancies": 10,
+        "capacity": 10,
+        "openingHours": [],
+    }
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability/calendar",
+        json=[{**calendar_day, "localDate": "2022-06-10"}, calendar_day],
+    )
+    errors = []
+
+    # WHEN
+    for chunk_days in [None, 7]:
+        with pytest.raises(Exception) as error:
+            client.get_calendar(
+                supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+                product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+                option_id="DEFAULT",
+                local_date_start=date(2022, 6, 10),
+                local_date_end=date(2022, 6, 20),
+                chunk_days=chunk_days,
+            )
+        errors.append(error.type)
+
+    # THEN
+    assert errors[0] is not KeyError
+    assert errors[1] is errors[0], "Sharded calendar raised another error"
+
+
+def test_cached_products(mocked_responses):
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token", cache=ResponseCache())
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+
+    # WHEN
+    first_response = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    second_response = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", headers={"Header-A": "test"})
+
+    # THEN
+    assert first_response == second_response
+    assert len(mocked_responses.calls) == 3, "Too many requests"
+
+    # WHEN
+    assert client.invalidate_cache(supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2") == 2
+    client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert len(mocked_responses.calls) == 4
+
+
+def test_cached_products_are_not_parsed_again(mocked_responses):
+    # GIVEN
+    hook = mock.Mock(spec=MetricsHook)
+    client = OctoClient(
+        "http://fake-api.local", "secret-token", cache=ResponseCache(), metrics_hook=hook
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+
+    # WHEN
+    first_response = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    second_response = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert first_response == second_response
+    assert [call.args[0].endpoint for call in hook.on_decode.call_args_list] == [
+        "suppliers",
+        "products",
+    ]
+
+
+def test_cached_models_are_copied(mocked_responses):
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token", cache=ResponseCache())
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+    first_response = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # WHEN
+    first_response[0].internalName = "Modified"
+    first_response.append(first_response[0])
+    second_response = client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert [product.internalName for product in second_response] == ["Amazon River Tour"]
+    assert second_response[0] is not first_response[0]
+    assert second_response[0].options is first_response[0].options, "Nested models are copied"
+
+
+def test_cache_shared_by_clients_with_different_tokens(mocked_responses):
+    # GIVEN
+    cache = ResponseCache()
+    clients = [
+        OctoClient("http://fake-api.local", token, cache=cache) for token in ["token-a", "token-b"]
+    ]
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+
+    # WHEN
+    for client in clients:
+        client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+        client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    products_calls = [
+        call for call in mocked_responses.calls if call.request.url.endswith("/products")
+    ]
+    assert [call.request.headers["Authorization"] for call in products_calls] == [
+        "Bearer token-a",
+        "Bearer token-b",
+    ]
+
+
+def test_cached_calendar_shared_between_clients(mocked_responses, tmp_path):
+    # GIVEN
+    cache_path = str(tmp_path / "cache.sqlite")
+    clients = [
+        OctoClient(
+            "http://fake-api.local",
+            "secret-token",
+            cache=ResponseCache(ttls={"calendar": 5}, backend=SQLiteCacheBackend(cache_path)),
+        )
+        for _ in range(2)
+    ]
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability/calendar",
+        json=load_json_response("calendar_opening_hours.json"),
+    )
+
+    # WHEN
+    first_response, second_response = [
+        client.get_calendar(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            local_date_start=date(2022, 6, 10),
+            local_date_end=date(2022, 6, 20),
+        )
+        for client in clients
+    ]
+
+    # THEN
+    assert first_response == second_response
+    assert first_response[0].openingHours == [m.OpeningHours(from_=time(9, 0), to=time(17, 0))]
+    assert len(mocked_responses.calls) == 2, "Too many requests"
+
+
+def test_cached_availability(mocked_responses):
+    # GIVEN
+    client = OctoClient(
+        "http://fake-api.local", "secret-token", cache=ResponseCache(ttls={"availability": 5})
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability",
+        json=load_json_response("availability_start_times.json"),
+    )
+
+    def check_availability(local_date: date, units):
+        return client.availability_check(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            local_date=local_date,
+            units=units,
+        )
+
+    adult = m.UnitQuantity(id="adult", quantity=2)
+    child = m.UnitQuantity(id="child", quantity=1)
+
+    # WHEN
+    first_response = check_availability(date(2022, 6, 30), [adult, child])
+    second_response = check_availability(date(2022, 6, 30), [child, adult])
+    check_availability(date(2022, 7, 1), [adult, child])
+
+    # THEN
+    assert first_response == second_response
+    assert len(mocked_responses.calls) == 3, "Too many requests"
+
+
+def test_slow_availability_check_is_hedged(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.hedging = HedgingPolicy(delay=0.01, budget=1)
+    availability = load_json_response("availability_start_times.json")
+    delays = [0.5, 0]
+
+    def availability_response(request):
+        delay = delays.pop(0)
+        time_module.sleep(delay)
+        return 200, {}, json.dumps(availability[:1] if delay else availability)
+
+    mocked_responses.add_callback(
+        responses.POST, "http://fake-api.local/availability", callback=availability_response
+    )
+
+    # WHEN
+    started_at = time_module.monotonic()
+    response = client.availability_check(
+        supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+        product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+        option_id="DEFAULT",
+        local_date=date(2022, 6, 30),
+    )
+
+    # THEN
+    assert len(response) == 2, "The response of the hedged request is used"
+    assert time_module.monotonic() - started_at < 0.5
+    client.close()
+
+
+def test_hedging_doesnt_limit_concurrent_availability_checks(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.hedging = HedgingPolicy(delay=5, max_workers=2)
+    client.get_suppliers()
+
+    def availability_response(request):
+        time_module.sleep(0.2)
+        return 200, {}, "[]"
+
+    mocked_responses.add_callback(
+        responses.POST, "http://fake-api.local/availability", callback=availability_response
+    )
+
+    def availability_check(_):
+        return client.availability_check(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            local_date=date(2022, 6, 30),
+        )
+
+    # WHEN
+    started_at = time_module.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(availability_check, range(8)))
+
+    # THEN
+    assert results == [[]] * 8
+    assert time_module.monotonic() - started_at < 0.6, "The requests waited for hedging threads"
+    assert len(mocked_responses.calls) == 9, "Requests hedged"
+    client.close()
+
+
+def test_hedged_requests_threads_are_limited(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.hedging = HedgingPolicy(delay=5, max_request_workers=2)
+    client.get_suppliers()
+    threads = set()
+
+    def availability_response(request):
+        threads.add(threading.current_thread().name)
+        time_module.sleep(0.1)
+        return 200, {}, "[]"
+
+    mocked_responses.add_callback(
+        responses.POST, "http://fake-api.local/availability", callback=availability_response
+    )
+
+    def availability_check(_):
+        return client.availability_check(
+            supplier_id="48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2",
+            product_id="6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+            option_id="DEFAULT",
+            local_date=date(2022, 6, 30),
+        )
+
+    # WHEN
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(availability_check, range(6)))
+
+    # THEN
+    assert results == [[]] * 6
+    assert len(threads) == 2
+    assert all(name.startswith("octo-client-hedged-request") for name in threads)
+    client.close()
+
+
+def test_request_timeouts(mocked_responses):
+    # GIVEN
+    client = OctoClient(
+        "http://fake-api.local",
+        "secret-token",
+        timeout=Timeout(connect=2, read=10),
+        supplier_timeouts={"48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2": Timeout(read=20)},
+    )
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/suppliers", json=load_json_response("suppliers.json")
+    )
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=[])
+
+    # WHEN
+    client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    with call_timeout(connect=1):
+        client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+        with deadline(5):
+            client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    timeouts = [call.request.req_kwargs["timeout"] for call in mocked_responses.calls]
+    assert timeouts[:3] == [(2, 10), (2, 20), (1, 20)]
+    assert timeouts[3][0] == 1
+    assert 4.9 < timeouts[3][1] <= 5
+
+
+def test_deadline_stops_retries(client: OctoClient, mocked_responses):
+    # GIVEN
+    sleeps = []
+    client.retry_policy = RetryPolicy(random=lambda: 0)
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/products",
+        status=503,
+        headers={"Retry-After": "2"},
+    )
+
+    # WHEN
+    with mock.patch("time.sleep", sleeps.append), deadline(1):
+        with pytest.raises(exceptions.ApiError):
+            client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert sleeps == []
+    assert len(mocked_responses.calls) == 2
+
+
+def test_deadline_exceeded(mocked_responses):
+    # GIVEN
+    client = OctoClient("http://fake-api.local", "secret-token")
+
+    # WHEN
+    with deadline(0):
+        with pytest.raises(exceptions.DeadlineExceededError):
+            client.get_suppliers()
+
+    # THEN
+    assert len(mocked_responses.calls) == 0
+
+
+def test_deadline_limits_waiting_for_rate_limit(client: OctoClient, mocked_responses):
+    # GIVEN
+    client.rate_limiter = RateLimiter(default=RateLimit(rate=0.1))
+    mocked_responses.add(responses.GET, "http://fake-api.local/products", json=[])
+    client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # WHEN
+    started_at = time_module.monotonic()
+    with deadline(1):
+        with pytest.raises(exceptions.DeadlineExceededError):
+            client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+
+    # THEN
+    assert time_module.monotonic() - started_at < 0.5, "The call waited for the rate limit"
+    assert len(mocked_responses.calls) == 2
+
+
+def test_deadline_limits_reading_slow_body():
+    # GIVEN
+    profile = Profile(body_chunk_size=1000, body_chunk_delay=0.05)
+    with StubServer(profiles={"products": profile}) as server:
+        client = OctoClient(server.url, "secret-token")
+        client.get_suppliers()
+
+        # WHEN
+        started_at = time_module.monotonic()
+        with deadline(0.2):
+            with pytest.raises(exceptions.DeadlineExceededError):
+                client.get_products(SUPPLIER_ID)
+        duration = time_module.monotonic() - started_at
+        client.close()
+
+    # THEN
+    assert duration < 0.5
+
+
+class RecordingHook(MetricsHook):
+    def __init__(self):
+        self.requests = []
+        self.decodes = []
+
+    def on_request(self, metrics):
+        self.requests.append(metrics)
+
+    def on_decode(self, metrics):
+        self.decodes.append(metrics)
+
+
+def test_metrics_hook(client: OctoClient, mocked_responses):
+    # GIVEN
+    hook = client.metrics_hook = RecordingHook()
+    mocked_responses.add(
+        responses.GET, "http://fake-api.local/products", json=load_json_response("products.json")
+    )
+    mocked_responses.add(responses.GET, "http://fake-api.local/bookings/1", status=500)
+
+    # WHEN
+    client.get_products("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2")
+    with pytest.raises(exceptions.ApiError):
+        client.get_booking("48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "1")
+
+    # THEN
+    suppliers, products, booking = hook.requests
+    assert (suppliers.endpoint, suppliers.supplier_id) == ("suppliers", None)
+    assert (products.http_method, products.endpoint, products.status_code) == (
+        "GET",
+        "products",
+        200,
+    )
+    assert products.supplier_id == "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2"
+    assert set(products.phases()) == {"ttfb", "download", "json_decode"}
+    assert products.duration >= products.ttfb
+    assert (booking.endpoint, booking.status_code) == ("bookings/{id}", 500)
+    assert isinstance(booking.error, exceptions.ApiError)
+    assert [(decode.endpoint, decode.items) for decode in hook.decodes] == [
+        ("suppliers", 1),
+        ("products", 1),
+    ]
+
+
+def test_failing_metrics_hook_is_ignored(client: OctoClient, caplog):
+    # GIVEN
+    client.metrics_hook = mock.Mock(on_request=mock.Mock(side_effect=RuntimeError))
+
+    # WHEN
+    suppliers = client.get_suppliers()
+
+    # THEN
+    assert len(suppliers) == 1
+    assert "Metrics hook failed" in caplog.text
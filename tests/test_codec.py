@@ -0,0 +1,102 @@
+import json
+
+import pytest
+import responses
+
+from octo_client import OctoClient
+from octo_client.cache import ResponseCache, SQLiteCacheBackend
+from octo_client.codec import OrjsonCodec, StdlibJSONCodec, UjsonCodec, default_codec
+
+from .conftest import load_json_response
+
+
+def installed_codecs():
+    codecs = [StdlibJSONCodec()]
+    for codec_class in (OrjsonCodec, UjsonCodec):
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            pass
+    return codecs
+
+
+class CountingCodec(StdlibJSONCodec):
+    def __init__(self):
+        self.dumped = 0
+        self.loaded = 0
+
+    def dumps(self, value):
+        self.dumped += 1
+        return super().dumps(value)
+
+    def loads(self, data):
+        self.loaded += 1
+        return super().loads(data)
+
+
+@pytest.mark.parametrize("codec", installed_codecs(), ids=lambda codec: codec.name)
+def test_codec(codec):
+    # GIVEN
+    value = {"products": load_json_response("products.json"), "name": "Café €/😀", "n": 1.5}
+
+    # WHEN
+    data = codec.dumps(value)
+
+    # THEN
+    assert isinstance(data, bytes)
+    assert json.loads(data) == value
+    assert codec.loads(data) == value
+    assert codec.loads(data.decode("utf-8")) == value
+    with pytest.raises(ValueError):
+        codec.loads(b"Internal Server Error")
+
+
+def test_default_codec():
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        pytest.skip("orjson is not installed")
+
+    assert default_codec().name == "orjson"
+
+
+def test_client_codec(mocked_responses):
+    # GIVEN
+    codec = CountingCodec()
+    client = OctoClient("http://fake-api.local", "secret-token", codec=codec)
+    mocked_responses.add(
+        responses.GET,
+        "http://fake-api.local/suppliers",
+        json=load_json_response("suppliers.json"),
+    )
+    mocked_responses.add(
+        responses.POST,
+        "http://fake-api.local/availability",
+        json=load_json_response("availability_start_times.json"),
+    )
+
+    # WHEN
+    client.availability_check(
+        "48b4d2e9-cd8b-4ac2-a5ee-4217bf2622d2", "6b903d44-dc24-4ca4-ae71-6bde6c4f4854", "DEFAULT"
+    )
+
+    # THEN
+    assert (codec.dumped, codec.loaded) == (1, 2)
+    assert json.loads(mocked_responses.calls[1].request.body) == {
+        "productId": "6b903d44-dc24-4ca4-ae71-6bde6c4f4854",
+        "optionId": "DEFAULT",
+    }
+
+
+def test_cache_codec(tmp_path):
+    # GIVEN
+    codec = CountingCodec()
+    cache = ResponseCache(codec=codec, backend=SQLiteCacheBackend(str(tmp_path / "cache.sqlite")))
+    key = cache.make_key("products", "http://fake-api.local", "1", "products", "en", None)
+
+    # WHEN
+    cache.set(key, load_json_response("products.json"))
+
+    # THEN
+    assert cache.get(key) == load_json_response("products.json")
+    assert (codec.dumped, codec.loaded) == (1, 1)
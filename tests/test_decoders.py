@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Union
+
+import pytest
+from tonalite.core import from_dict
+from tonalite.exceptions import MissingValueError, UnexpectedDataError, WrongTypeError
+
+from octo_client import const
+from octo_client import models as m
+from octo_client.decoders import Conversions
+
+from .conftest import load_json_response
+
+
+@pytest.mark.parametrize(
+    "model, filename",
+    [
+        (m.Supplier, "supplier.json"),
+        (m.Product, "product.json"),
+        (m.Availability, "availability_opening_hours.json"),
+        (m.AvailabilityCalendarItem, "calendar_opening_hours.json"),
+        (m.Booking, "reservation.json"),
+    ],
+)
+def test_decoders_match_tonalite(model, filename):
+    # GIVEN
+    data = load_json_response(filename)
+    items = data if isinstance(data, list) else [data]
+    conversions = model._conversions or m.DEFAULT_CONVERSIONS
+
+    # WHEN
+    decoded = [model.from_dict(item) for item in items]
+
+    # THEN
+    assert decoded == [from_dict(model, item, conversions.config(strict=False)) for item in items]
+
+
+def test_decoder_errors():
+    # GIVEN
+    data = load_json_response("product.json")
+    data["options"][0]["units"][0]["restrictions"]["minAge"] = "18"
+
+    # WHEN
+    with pytest.raises(WrongTypeError) as error:
+        m.Product.from_dict(data)
+
+    # THEN
+    assert error.value.field_path == "options.units.restrictions.minAge"
+
+    # WHEN
+    del data["options"][0]["id"]
+    with pytest.raises(MissingValueError) as missing_error:
+        m.Product.from_dict(data)
+
+    # THEN
+    assert missing_error.value.field_path == "options.id"
+
+
+def test_decoder_strict_mode():
+    # GIVEN
+    data = load_json_response("product.json")
+    data["options"][0]["unexpected"] = True
+
+    # WHEN / THEN
+    # models with their own conversions are parsed in the non-strict mode when nested
+    assert m.Product.from_dict(data, strict=True).options[0].id == "DEFAULT"
+    data["unexpected"] = True
+    with pytest.raises(UnexpectedDataError):
+        m.Product.from_dict(data, strict=True)
+
+
+def test_decoder_renamed_keys():
+    # GIVEN
+    data = {"from": "09:00", "to": "17:00"}
+
+    # WHEN
+    opening_hours = m.OpeningHours.from_dict(data)
+
+    # THEN
+    assert opening_hours.from_.hour == 9
+    assert data == {"from": "09:00", "to": "17:00"}
+
+
+def test_decoder_unsupported_types():
+    # GIVEN
+    @dataclass
+    class Model:
+        value: Union[int, str]
+        day: Optional[date] = None
+        statuses: List[const.AvailabilityStatus] = field(default_factory=list)
+
+    conversions = Conversions(
+        type_hooks={date: date.fromisoformat}, cast=[const.AvailabilityStatus]
+    )
+    data = {"value": "a", "day": "2022-06-10", "statuses": ["SOLD_OUT"]}
+
+    # WHEN
+    model = conversions.get_decoder(Model)(data)
+
+    # THEN
+    assert model == Model(
+        value="a", day=date(2022, 6, 10), statuses=[const.AvailabilityStatus.SOLD_OUT]
+    )
+    assert model == from_dict(Model, data, conversions.config(strict=False))
@@ -0,0 +1,39 @@
+from octo_client.hedging import HedgingPolicy
+
+
+def test_delay_is_percentile_of_latencies():
+    # GIVEN
+    policy = HedgingPolicy(percentile=0.9, min_samples=10, window_size=10)
+    for latency in range(20):
+        policy.record_latency("supplier", latency / 10)
+
+    # WHEN
+    delay = policy.get_delay("supplier")
+
+    # THEN
+    assert delay == 1.8
+    assert policy.get_delay("other-supplier") == policy.initial_delay
+
+
+def test_delay_limits():
+    # GIVEN
+    policy = HedgingPolicy(min_samples=1, min_delay=0.1)
+    policy.record_latency("supplier", 0.01)
+
+    # THEN
+    assert policy.get_delay("supplier") == 0.1
+    assert HedgingPolicy(delay=0.3).get_delay("supplier") == 0.3
+
+
+def test_hedge_budget():
+    # GIVEN
+    policy = HedgingPolicy(budget=0.25, max_budget=1)
+
+    # WHEN
+    hedges = []
+    for _ in range(12):
+        policy.record_request()
+        hedges.append(policy.acquire_hedge())
+
+    # THEN
+    assert hedges == [False, False, False, True] * 3
@@ -0,0 +1,111 @@
+import pytest
+
+from octo_client.instrumentation import (
+    DecodeMetrics,
+    OpenTelemetryHook,
+    PrometheusHook,
+    RequestMetrics,
+    endpoint_name,
+)
+
+
+class FakeHistogram:
+    def __init__(self):
+        self.observations = []
+
+    def labels(self, **labels):
+        return FakeObserver(self.observations, labels)
+
+
+class FakeObserver:
+    def __init__(self, observations, labels):
+        self.observations = observations
+        self.labels = labels
+
+    def observe(self, value):
+        self.observations.append((self.labels, value))
+
+
+class FakeSpan:
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.exceptions = []
+        self.end_time = None
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = FakeSpan(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+@pytest.mark.parametrize(
+    "path, endpoint",
+    [
+        ("suppliers", "suppliers"),
+        ("suppliers/1", "suppliers/{id}"),
+        ("products/abc", "products/{id}"),
+        ("availability/calendar", "availability/calendar"),
+        ("bookings/abc/confirm", "bookings/{id}/confirm"),
+    ],
+)
+def test_endpoint_name(path, endpoint):
+    assert endpoint_name(path) == endpoint
+
+
+def test_prometheus_hook():
+    # GIVEN
+    hook = PrometheusHook(request_histogram=FakeHistogram(), decode_histogram=FakeHistogram())
+    metrics = RequestMetrics(
+        "GET", "products", "supplier", 100.0, status_code=200, duration=0.5, ttfb=0.3
+    )
+
+    # WHEN
+    hook.on_request(metrics)
+    hook.on_decode(DecodeMetrics("products", "supplier", 100.5, 0.01, items=3))
+
+    # THEN
+    labels = {"supplier": "supplier", "endpoint": "products", "method": "GET", "status": "200"}
+    assert hook.request_histogram.observations == [
+        ({"phase": "ttfb", **labels}, 0.3),
+        ({"phase": "total", **labels}, 0.5),
+    ]
+    assert hook.decode_histogram.observations == [
+        ({"supplier": "supplier", "endpoint": "products"}, 0.01)
+    ]
+
+
+def test_opentelemetry_hook():
+    # GIVEN
+    tracer = FakeTracer()
+    hook = OpenTelemetryHook(tracer)
+    error = ConnectionError("Connection refused")
+
+    # WHEN
+    hook.on_request(
+        RequestMetrics("POST", "availability", "supplier", 100.0, duration=0.25, error=error)
+    )
+
+    # THEN
+    [span] = tracer.spans
+    assert span.name == "octo_client.request"
+    assert (span.start_time, span.end_time) == (100_000_000_000, 100_250_000_000)
+    assert span.attributes == {
+        "http.request.method": "POST",
+        "octo.endpoint": "availability",
+        "octo.attempts": 0,
+        "octo.supplier_id": "supplier",
+    }
+    assert span.exceptions == [error]
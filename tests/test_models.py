@@ -1,13 +1,22 @@
+import json
+import pickle
+from datetime import datetime, time, timezone
 from typing import List
 
 import pytest
+from tonalite.exceptions import WrongTypeError
 
 from octo_client.const import DeliveryFormat
 from octo_client.const import UnitType
+from octo_client.models import Availability
+from octo_client.models import Booking
 from octo_client.models import DeliveryOption
+from octo_client.models import LazyBooking
 from octo_client.models import Product
 from octo_client.models import Unit
 
+from .conftest import load_json_response
+
 
 @pytest.mark.parametrize(
     "input_unity_type_value, expected_value", [
@@ -98,3 +107,77 @@ def test_map_unknown_delivery_format_in_product(input_delivery_format_value: str
 
     # THEN
     assert instance.deliveryFormats == expected_value
+
+
+def test_memoized_iso_format_parsing():
+    # GIVEN
+    data = {
+        "id": "2022-06-30T12:00:00+01:00",
+        "localDateTimeStart": "2022-06-30T12:00:00+01:00",
+        "localDateTimeEnd": "2022-06-30T13:00:00+01:00",
+        "allDay": False,
+        "available": True,
+        "status": "AVAILABLE",
+        "utcCutoffAt": "2022-06-30T10:00:00Z",
+    }
+
+    # WHEN
+    first = Availability.from_dict(data)
+    second = Availability.from_dict(data)
+
+    # THEN
+    assert first.utcCutoffAt == datetime(2022, 6, 30, 10, tzinfo=timezone.utc)
+    assert first.localDateTimeStart is second.localDateTimeStart
+    assert first.utcCutoffAt is second.utcCutoffAt
+    with pytest.raises(ValueError):
+        Availability.from_dict({**data, "utcCutoffAt": "30/06/2022"})
+
+
+def test_slotted_models():
+    # GIVEN
+    data = {
+        "id": "2022-06-30T12:00:00+01:00",
+        "localDateTimeStart": "2022-06-30T12:00:00+01:00",
+        "localDateTimeEnd": "2022-06-30T13:00:00+01:00",
+        "allDay": False,
+        "available": True,
+        "status": "AVAILABLE",
+        "utcCutoffAt": "2022-06-30T10:00:00Z",
+        "openingHours": [{"from": "09:00", "to": "17:00"}],
+    }
+
+    # WHEN
+    availability = Availability.from_dict(json.loads(json.dumps(data)))
+    other_availability = Availability.from_dict(json.loads(json.dumps(data)))
+
+    # THEN
+    assert not hasattr(availability, "__dict__")
+    assert not hasattr(availability.openingHours[0], "__dict__")
+    with pytest.raises(AttributeError):
+        availability.unknown = 1
+    assert availability == other_availability
+    assert availability.id is other_availability.id, "Strings are not interned"
+    assert availability.as_dict()["openingHours"] == [{"from_": time(9), "to": time(17)}]
+    assert pickle.loads(pickle.dumps(availability)) == availability
+    assert Availability.__name__ == "Availability"
+
+
+def test_lazy_booking():
+    # GIVEN
+    data = load_json_response("reservation.json")
+    broken_data = {**data, "product": {**data["product"], "id": 1}}
+
+    # WHEN
+    booking = LazyBooking.from_dict(data)
+    broken_booking = LazyBooking.from_dict(broken_data)
+
+    # THEN
+    assert booking == Booking.from_dict(data)
+    assert Booking.from_dict(data) == booking
+    assert booking.product is booking.product, "Nested object is not cached"
+    assert pickle.loads(pickle.dumps(booking)) == booking
+    assert not hasattr(booking, "__dict__")
+    assert broken_booking.optionId == data["optionId"]
+    with pytest.raises(WrongTypeError) as error:
+        broken_booking.product
+    assert error.value.field_path == "product.id"
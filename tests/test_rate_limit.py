@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from octo_client.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimit,
+    RateLimitBackend,
+    RateLimiter,
+    SQLiteRateLimitBackend,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket():
+    # GIVEN
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(clock=clock)
+    limit = RateLimit(rate=2, burst=2)
+
+    # WHEN
+    delays = [backend.reserve("key", limit) for _ in range(4)]
+    clock.now += 10
+    delay_after_pause = backend.reserve("key", limit)
+
+    # THEN
+    assert delays == [0, 0, 0.5, 1.0]
+    assert delay_after_pause == 0
+
+
+def test_rate_limiter_limits():
+    # GIVEN
+    limiter = RateLimiter(
+        limits={"supplier-a": RateLimit(10), "api.shared.local": RateLimit(5)},
+        default=RateLimit(1, burst=3),
+    )
+
+    # WHEN / THEN
+    assert limiter.get_limit("supplier-a", "https://api.shared.local/products") == (
+        "supplier:supplier-a",
+        RateLimit(10),
+    )
+    assert limiter.get_limit("supplier-b", "https://api.shared.local/products") == (
+        "host:api.shared.local",
+        RateLimit(5),
+    )
+    assert limiter.get_limit("supplier-c", "https://api.other.local/products") == (
+        "supplier:supplier-c",
+        RateLimit(1, burst=3),
+    )
+    assert RateLimiter().reserve("supplier-a", "https://api.shared.local/products") == 0
+
+
+def test_rate_limiter_shared_between_threads():
+    # GIVEN
+    clock = FakeClock()
+    limiter = RateLimiter(
+        default=RateLimit(rate=10, burst=1), backend=MemoryRateLimitBackend(clock=clock)
+    )
+
+    # WHEN
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        delays = list(pool.map(lambda _: limiter.reserve("a", "http://a.local"), range(20)))
+
+    # THEN
+    assert sorted(delays) == pytest.approx([i / 10 for i in range(20)])
+
+
+def test_sqlite_backend_shared_between_processes(tmp_path):
+    # GIVEN
+    clock = FakeClock()
+    path = str(tmp_path / "rate_limit.sqlite")
+    backends = [SQLiteRateLimitBackend(path, clock=clock) for _ in range(2)]
+    limit = RateLimit(rate=1, burst=1)
+
+    # WHEN
+    delays = [backends[i % 2].reserve("key", limit) for i in range(4)]
+
+    # THEN
+    assert delays == [0, 1, 2, 3]
+    for backend in backends:
+        backend.close()
+
+
+def test_acquire_async():
+    # GIVEN
+    limiter = RateLimiter(default=RateLimit(rate=100, burst=1))
+
+    # WHEN
+    async def run():
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        await asyncio.gather(*(limiter.acquire_async("a", "http://a.local") for _ in range(3)))
+        return loop.time() - started_at
+
+    elapsed = asyncio.run(run())
+
+    # THEN
+    assert elapsed >= 0.015
+
+
+def test_acquire_async_with_blocking_backend():
+    # GIVEN
+    class SlowBackend(RateLimitBackend):
+        def __init__(self):
+            self.threads = []
+
+        def reserve(self, key, limit, max_delay=None):
+            self.threads.append(threading.current_thread())
+            time.sleep(0.1)
+            return 0.0
+
+    backend = SlowBackend()
+    limiter = RateLimiter(default=RateLimit(rate=1), backend=backend)
+    ticks = []
+
+    async def tick():
+        while True:
+            await asyncio.sleep(0.01)
+            ticks.append(None)
+
+    # WHEN
+    async def run():
+        ticker = asyncio.ensure_future(tick())
+        await limiter.acquire_async("a", "http://a.local")
+        ticker.cancel()
+
+    asyncio.run(run())
+
+    # THEN
+    assert backend.threads[0] is not threading.current_thread()
+    assert len(ticks) > 1, "The event loop was blocked by the backend"
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (-1, 1), (1, 0)])
+def test_invalid_rate_limit(rate, burst):
+    with pytest.raises(ValueError):
+        RateLimit(rate=rate, burst=burst)
+
+
+@pytest.mark.parametrize("backend_type", ["memory", "sqlite"])
+def test_token_over_max_delay_is_not_taken(tmp_path, backend_type):
+    # GIVEN
+    clock = FakeClock()
+    if backend_type == "memory":
+        backend = MemoryRateLimitBackend(clock=clock)
+    else:
+        backend = SQLiteRateLimitBackend(str(tmp_path / "rate_limit.sqlite"), clock=clock)
+    limiter = RateLimiter(default=RateLimit(rate=1), backend=backend)
+
+    # WHEN
+    acquired = [limiter.acquire("a", "http://a.local", max_delay=0.5) for _ in range(2)]
+
+    # THEN
+    assert acquired == [True, False]
+    assert limiter.reserve("a", "http://a.local") == 1.0, "The refused token was taken"
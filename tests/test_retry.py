@@ -0,0 +1,56 @@
+import pytest
+
+from octo_client.retry import RetryPolicy, parse_retry_after
+
+
+@pytest.mark.parametrize(
+    "http_method, path, status_code, sent, retried",
+    [
+        ("GET", "products", 503, True, True),
+        ("GET", "products", None, True, True),
+        ("GET", "products", 500, True, False),
+        ("GET", "products", 404, True, False),
+        ("POST", "availability", 502, True, True),
+        ("POST", "availability/calendar", None, True, True),
+        ("POST", "bookings", 503, True, False),
+        ("POST", "bookings", None, True, False),
+        ("POST", "bookings", None, False, True),
+        ("POST", "bookings", 429, True, True),
+        ("DELETE", "bookings/1", 504, True, False),
+    ],
+)
+def test_retried_requests(http_method, path, status_code, sent, retried):
+    # GIVEN
+    policy = RetryPolicy()
+
+    # WHEN
+    delay = policy.get_retry_delay(http_method, path, 0, 0, status_code=status_code, sent=sent)
+
+    # THEN
+    assert (delay is not None) == retried
+
+
+def test_retry_delay():
+    # GIVEN
+    policy = RetryPolicy(
+        max_retries=5, backoff_factor=1, max_backoff=5, max_retry_time=20, random=lambda: 0.5
+    )
+
+    # WHEN
+    delays = [policy.get_retry_delay("GET", "products", retries, 0) for retries in range(6)]
+
+    # THEN
+    assert delays == [0.5, 1, 2, 2.5, 2.5, None]
+    assert policy.get_retry_delay("GET", "products", 1, 19.5) is None, "Retry time exceeded"
+
+
+def test_retry_after():
+    # GIVEN
+    policy = RetryPolicy(max_backoff=10)
+
+    # WHEN / THEN
+    assert policy.get_retry_delay("GET", "products", 0, 0, 429, retry_after="3") == 3
+    assert policy.get_retry_delay("GET", "products", 0, 0, 429, retry_after="60") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412490) == 0
+    assert parse_retry_after("soon") is None
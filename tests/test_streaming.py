@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from octo_client.streaming import JSONArrayParser, aiter_json_array, iter_json_array
+
+from .conftest import load_json_response
+
+
+def split(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+def test_iter_json_array(size: int):
+    # GIVEN
+    array = load_json_response("products.json") + [1, -2.5e3, "é€😀", None, True, [], {}]
+    data = json.dumps(array, ensure_ascii=False).encode()
+
+    # WHEN
+    elements = list(iter_json_array(split(data, size)))
+
+    # THEN
+    assert elements == array
+
+
+def test_aiter_json_array():
+    # GIVEN
+    array = load_json_response("products.json") + [1, "é€😀", None]
+    data = json.dumps(array, ensure_ascii=False).encode()
+
+    async def chunks():
+        for chunk in split(data, 7):
+            yield chunk
+
+    async def collect():
+        return [element async for element in aiter_json_array(chunks())]
+
+    # WHEN
+    elements = asyncio.run(collect())
+
+    # THEN
+    assert elements == array
+
+
+def test_elements_yielded_while_received():
+    # GIVEN
+    parser = JSONArrayParser()
+
+    # WHEN
+    first = parser.feed(b' [{"id": "1"}, {"id"')
+    second = parser.feed(b': "2"}, 12')
+    third = parser.feed(b"3]")
+
+    # THEN
+    assert first == [{"id": "1"}]
+    assert second == [{"id": "2"}]
+    assert third == [123]
+    assert parser.close() == []
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b'{"id": "1"}', b"[1, 2", b"[1 2]", b"[1,]", b"[,1]", b"[1]]", b"[tru]"]
+)
+def test_invalid_json_array(data: bytes):
+    with pytest.raises(ValueError):
+        list(iter_json_array(split(data, 1)))
@@ -0,0 +1,202 @@
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from octo_client import OctoClient
+from octo_client import models as m
+from octo_client.const import BookingStatus
+from octo_client.exceptions import ApiError
+from octo_client.rate_limit import RateLimit
+from octo_client.retry import RetryPolicy
+from octo_client.stub_server import (
+    SUPPLIER_ID,
+    Latency,
+    Profile,
+    StubServer,
+    generate_responses,
+    load_fixtures,
+)
+
+RESPONSES_PATH = str(Path(__file__).parent / "responses")
+
+
+def test_generated_responses_are_valid():
+    # WHEN
+    responses = generate_responses(products=2, options=3, units=2, days=2, slots_per_day=3)
+
+    # THEN
+    products = [m.Product.from_dict(item, strict=True) for item in responses["GET", "products"]]
+    assert [len(product.options) for product in products] == [3, 3]
+    availability = [m.Availability.from_dict(item) for item in responses["POST", "availability"]]
+    assert len({item.id for item in availability}) == 6
+    m.Booking.from_dict(responses["POST", "bookings"], strict=True)
+
+
+def test_client_calls():
+    # GIVEN
+    with StubServer(seed=1) as server:
+        client = OctoClient(server.url, "secret-token")
+
+        # WHEN
+        suppliers = client.get_suppliers()
+        products = client.get_products(SUPPLIER_ID)
+        availability = client.availability_check(
+            SUPPLIER_ID,
+            "product-0",
+            "DEFAULT",
+            local_date_start=date(2030, 1, 1),
+            local_date_end=date(2030, 1, 31),
+        )
+        calendar = client.get_calendar(
+            SUPPLIER_ID, "product-0", "DEFAULT", date(2030, 1, 1), date(2030, 1, 31)
+        )
+
+    # THEN
+    assert [(supplier.id, supplier.endpoint) for supplier in suppliers] == [
+        (SUPPLIER_ID, server.url)
+    ]
+    assert len(products) == 10
+    assert len(availability) == 240
+    assert len(calendar) == 30
+    assert server.stats == {
+        ("GET", "suppliers", 200): 1,
+        ("GET", "products", 200): 1,
+        ("POST", "availability", 200): 1,
+        ("POST", "availability/calendar", 200): 1,
+    }
+
+
+def test_booking_flow():
+    # GIVEN
+    with StubServer() as server:
+        client = OctoClient(server.url, "secret-token")
+
+        # WHEN
+        reservation = client.booking_reservation(
+            SUPPLIER_ID, "my-uuid", "product-0", "DEFAULT", "slot", [m.UnitItem(unitId="unit-0")]
+        )
+        confirmation = client.booking_confirmation(SUPPLIER_ID, "my-uuid")
+        cancellation = client.booking_cancellation(SUPPLIER_ID, "my-uuid")
+
+    # THEN
+    assert (reservation.uuid, reservation.status) == ("my-uuid", BookingStatus.ON_HOLD)
+    assert (confirmation.uuid, confirmation.status) == ("my-uuid", BookingStatus.CONFIRMED)
+    assert (cancellation.uuid, cancellation.status) == ("my-uuid", BookingStatus.CANCELLED)
+
+
+def test_errors():
+    # GIVEN
+    profiles = {"products": Profile(error_rate=1.0, error_status=502)}
+    with StubServer(profiles=profiles) as server:
+        client = OctoClient(server.url, "secret-token")
+
+        # WHEN
+        with pytest.raises(ApiError):
+            client.get_products(SUPPLIER_ID)
+
+    # THEN
+    assert server.stats[("GET", "products", 502)] == 1
+
+
+def test_rate_limit():
+    # GIVEN
+    profiles = {"products": Profile(rate_limit=RateLimit(rate=0.1, burst=2))}
+    with StubServer(profiles=profiles) as server:
+        client = OctoClient(server.url, "secret-token")
+
+        # WHEN
+        client.get_products(SUPPLIER_ID)
+        client.get_products(SUPPLIER_ID)
+        with pytest.raises(ApiError):
+            client.get_products(SUPPLIER_ID)
+
+    # THEN
+    assert server.stats[("GET", "products", 200)] == 2
+    assert server.stats[("GET", "products", 429)] == 1
+
+
+def test_retried_errors():
+    # GIVEN
+    profile = Profile(error_rate=0.5)
+    retry_policy = RetryPolicy(max_retries=10, backoff_factor=0.001)
+    with StubServer(profile=profile, seed=3) as server:
+        client = OctoClient(server.url, "secret-token", retry_policy=retry_policy)
+
+        # WHEN
+        products = client.get_products(SUPPLIER_ID)
+
+    # THEN
+    assert len(products) == 10
+    assert server.stats[("GET", "products", 503)] > 0
+
+
+def test_latency_and_slow_body():
+    # GIVEN
+    profile = Profile(latency=Latency(0.05), body_chunk_size=10000, body_chunk_delay=0.01)
+    with StubServer() as fast_server, StubServer(profile=profile) as slow_server:
+        fast_client = OctoClient(fast_server.url, "secret-token")
+        slow_client = OctoClient(slow_server.url, "secret-token")
+        slow_client.get_suppliers()
+
+        # WHEN
+        started_at = time.perf_counter()
+        products = slow_client.get_products(SUPPLIER_ID)
+        duration = time.perf_counter() - started_at
+        expected = fast_client.get_products(SUPPLIER_ID)
+
+    # THEN
+    assert products == expected
+    assert duration >= 0.05 + 0.01
+
+
+def test_test_responses_as_fixtures():
+    # GIVEN
+    responses = load_fixtures(RESPONSES_PATH)
+    with StubServer(responses) as server:
+        client = OctoClient(server.url, "secret-token")
+
+        # WHEN
+        products = client.get_products(SUPPLIER_ID)
+        availability = client.availability_check(SUPPLIER_ID, "product-0", "DEFAULT")
+
+    # THEN
+    assert sorted(responses) == [
+        ("GET", "products"),
+        ("GET", "products/{id}"),
+        ("GET", "suppliers"),
+        ("POST", "availability"),
+        ("POST", "availability/calendar"),
+        ("POST", "bookings"),
+    ]
+    assert [product.internalName for product in products] == ["Amazon River Tour"]
+    assert [item.id for item in availability] == [
+        "2022-06-30T12:00:00+01:00",
+        "2022-06-30T14:00:00+01:00",
+    ]
+
+
+def test_fixtures_by_endpoint():
+    # WHEN
+    responses = load_fixtures(
+        RESPONSES_PATH, {("POST", "availability"): "availability_opening_hours.json"}
+    )
+
+    # THEN
+    assert list(responses) == [("POST", "availability")]
+    assert responses["POST", "availability"][0]["openingHours"]
+
+
+@pytest.mark.parametrize(
+    "path, files",
+    [
+        (RESPONSES_PATH, {("GET", "bookings"): "bookings.json"}),
+        (str(Path(RESPONSES_PATH) / "missing"), None),
+        (str(Path(__file__).parent), None),
+    ],
+)
+def test_missing_fixtures(path, files):
+    # WHEN / THEN
+    with pytest.raises(FileNotFoundError):
+        load_fixtures(path, files)
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from octo_client import exceptions
+from octo_client.timeouts import (
+    Deadline,
+    Timeout,
+    call_timeout,
+    deadline,
+    get_call_timeout,
+    get_deadline,
+    with_context,
+)
+
+
+def test_timeout_defaults_and_limit():
+    # GIVEN
+    timeout = Timeout(read=20)
+
+    # WHEN
+    timeout = timeout.with_defaults(Timeout(connect=5, read=30))
+
+    # THEN
+    assert timeout == Timeout(connect=5, read=20)
+    assert timeout.limit(10) == Timeout(connect=5, read=10)
+    assert Timeout().limit(3) == Timeout(connect=3, read=3)
+
+
+def test_deadline_remaining():
+    # GIVEN
+    now = [100.0]
+    call_deadline = Deadline(2, clock=lambda: now[0])
+
+    # WHEN
+    now[0] += 1.5
+
+    # THEN
+    assert call_deadline.remaining() == 0.5
+    call_deadline.check()
+    now[0] += 1
+    assert call_deadline.remaining() == 0
+    with pytest.raises(exceptions.DeadlineExceededError):
+        call_deadline.check()
+
+
+def test_nested_deadline_only_shortens_outer_deadline():
+    # WHEN
+    with deadline(1) as outer:
+        with deadline(10) as longer:
+            assert longer is outer
+        with deadline(0.5) as shorter:
+            assert get_deadline() is shorter
+        assert get_deadline() is outer
+
+    # THEN
+    assert get_deadline() is None
+
+
+def test_context_is_passed_to_threads():
+    # GIVEN
+    def get_context(_):
+        return get_deadline(), get_call_timeout()
+
+    # WHEN
+    with deadline(1) as call_deadline, call_timeout(read=2):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            contexts = list(pool.map(with_context(get_context), range(4)))
+            bare_contexts = list(pool.map(get_context, range(2)))
+
+    # THEN
+    assert contexts == [(call_deadline, Timeout(read=2))] * 4
+    assert bare_contexts == [(None, None)] * 2
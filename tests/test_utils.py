@@ -1,4 +1,4 @@
-from octo_client.utils import hide_sensitive_data
+from octo_client.utils import Redactor, filter_log_data, hide_sensitive_data
 
 
 def test_hide_sensitive_data():
@@ -71,3 +71,67 @@ def test_hide_sensitive_data():
             ],
         }
     ]
+
+
+def test_hide_sensitive_data_does_not_modify_data():
+    # GIVEN
+    data = {"contact": {"fullName": "John Doe", "country": "NL"}, "notes": ["test"]}
+
+    # WHEN
+    result = hide_sensitive_data(data)
+
+    # THEN
+    assert result == {
+        "contact": {"fullName": "[Filtered private data]", "country": "[Filtered private data]"},
+        "notes": ["test"],
+    }
+    assert data == {"contact": {"fullName": "John Doe", "country": "NL"}, "notes": ["test"]}
+    assert result["notes"] is not data["notes"]
+
+
+def test_redactor():
+    # GIVEN
+    redactor = Redactor(keys=["Phone", "email"], replacement="***", max_items=2)
+    data = {"contacts": [{"PHONE": "1", "emailAddress": "a@b.c", "id": 1}] * 3, "id": "1"}
+
+    # WHEN
+    result = redactor.redact(data)
+
+    # THEN
+    assert result == {
+        "contacts": [{"PHONE": "***", "emailAddress": "***", "id": 1}] * 2 + ["[1 more items]"],
+        "id": "1",
+    }
+    assert redactor.is_sensitive("mobilePhone")
+    assert not redactor.is_sensitive("id")
+
+
+def test_redactor_memoized_keys():
+    # GIVEN
+    redactor = Redactor(max_memoized_keys=2)
+
+    # WHEN
+    result = redactor.redact({"a": 1, "b": 2, "userName": "John"})
+
+    # THEN
+    assert result == {"a": 1, "b": 2, "userName": "[Filtered private data]"}
+    assert len(redactor._decisions) <= 2
+
+
+def test_filter_log_data_size_limit():
+    # GIVEN
+    data = [{"id": "1", "title": "Château €"}, {"id": "2", "phone": "1234567890"}] * 1000
+
+    # WHEN
+    small = filter_log_data(data[:2], size_limit=200)
+    truncated = filter_log_data(data, size_limit=40)
+    truncated_text = filter_log_data("Château " * 10, size_limit=20)
+
+    # THEN
+    assert small == [
+        {"id": "1", "title": "Château €"},
+        {"id": "2", "phone": "[Filtered private data]"},
+    ]
+    assert truncated == '[{"id":"1","title":"Château...TRUNCATED'
+    assert len(truncated.encode("utf-8")) <= 40
+    assert truncated_text == "Château...TRUNCATED"